@@ -1,4 +1,7 @@
 import streamlit as st
+from warmup import start_warmup
+from asset_pipeline import render_image
+from profiling import profile_page
 
 st.set_page_config(
     page_title="MoodFit",
@@ -6,10 +9,17 @@ st.set_page_config(
     layout="centered"
 )
 
+# ?profile=1 또는 MOODFIT_PROFILE=1 이면 재실행마다 cProfile/tracemalloc 기록 (profiling.py)
+profile_page(__file__)
+
+# 홈 화면을 보는 동안 무거운 모듈/시트 연결을 백그라운드에서 미리 준비 (프로세스당 1회)
+start_warmup()
+
 # ====== 중앙 정렬 전체 컨테이너 ======
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
-    st.image("assets/home_fitness.jpg", width=340)
+    # 미리 줄여 둔 340/680px WebP·JPEG 중 브라우저에 맞는 것 하나만 전송 (python asset_pipeline.py)
+    render_image(st, "home_fitness.jpg", width=340, alt="MoodFit")
 
     st.markdown(
         """
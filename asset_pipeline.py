@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+정적 이미지 빌드 파이프라인.
+
+assets/ 의 원본 이미지를 자주 쓰는 폭(340 / 680 / 1024px)의 WebP + JPEG 로 미리 줄여서
+static/img/ 에 "이름-폭.해시.확장자" 로 저장하고, static/img/manifest.json 에 목록을 남깁니다.
+
+- 화면에서는 <picture> + srcset 으로 브라우저가 화면 폭/픽셀 밀도에 맞는 파일 하나만 받음
+  (WebP 를 지원하지 않으면 JPEG)
+- 파일은 Streamlit 정적 서빙(server.enableStaticServing)으로 /app/static/ 에서 제공
+- 파일 이름에 내용 해시가 들어 있어 내용이 바뀌면 URL 도 바뀜
+  → 브라우저/프록시가 오래 캐시해도 안전 (같은 URL 은 ETag 로 304 응답)
+
+새 정적 이미지도 assets/ 에 넣고 `python asset_pipeline.py` 만 다시 실행하면 됩니다.
+Pillow 는 빌드할 때만 필요하고, 페이지는 manifest 만 읽습니다.
+"""
+import os
+import io
+import json
+import html
+import hashlib
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+SOURCE_DIR = "assets"
+STATIC_DIR = "static"
+OUTPUT_SUBDIR = "img"
+MANIFEST = os.path.join(STATIC_DIR, OUTPUT_SUBDIR, "manifest.json")
+STATIC_URL = "app/static"
+
+WIDTHS = (340, 680, 1024)
+FORMATS = {"webp": {"quality": 80, "method": 6}, "jpeg": {"quality": 82, "optimize": True, "progressive": True}}
+SOURCE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+# ========================= 빌드 =========================
+def _resized(src, width):
+    im = Image.open(src)
+    # JPEG 는 디코딩 단계에서 먼저 1/2, 1/4, 1/8 로 줄여서 읽음 (5000px 원본도 빠르게)
+    im.draft("RGB", (width, width * im.height // im.width))
+    im = im.convert("RGB")
+    height = round(im.height * width / im.width)
+    return im.resize((width, height), Image.LANCZOS)
+
+
+def build_asset(filename, source_dir=SOURCE_DIR, out_dir=os.path.join(STATIC_DIR, OUTPUT_SUBDIR)):
+    """원본 하나 → {형식: {폭: 상대 경로}} (원본보다 큰 폭은 만들지 않음)"""
+    if Image is None:
+        raise RuntimeError("이미지 빌드에는 Pillow 가 필요합니다 (pip install pillow).")
+    src = os.path.join(source_dir, filename)
+    stem = os.path.splitext(filename)[0]
+    with Image.open(src) as probe:
+        src_width = probe.width
+
+    os.makedirs(out_dir, exist_ok=True)
+    variants = {fmt: {} for fmt in FORMATS}
+    for width in WIDTHS:
+        if width > src_width:
+            continue
+        im = _resized(src, width)
+        for fmt, options in FORMATS.items():
+            buf = io.BytesIO()
+            im.save(buf, format=fmt.upper(), **options)
+            data = buf.getvalue()
+            digest = hashlib.sha1(data).hexdigest()[:10]
+            ext = "jpg" if fmt == "jpeg" else fmt
+            name = f"{stem}-{width}.{digest}.{ext}"
+            with open(os.path.join(out_dir, name), "wb") as f:
+                f.write(data)
+            variants[fmt][str(width)] = f"{OUTPUT_SUBDIR}/{name}"  # JSON 키와 같게 문자열
+    return variants
+
+
+def build_all(source_dir=SOURCE_DIR, manifest_path=MANIFEST):
+    """assets/ 전체를 빌드하고 manifest 갱신. 더 이상 쓰지 않는 이전 해시 파일은 지움."""
+    manifest = {}
+    for filename in sorted(os.listdir(source_dir)):
+        if filename.lower().endswith(SOURCE_EXTS):
+            manifest[filename] = build_asset(filename, source_dir, os.path.dirname(manifest_path))
+
+    keep = {os.path.basename(p) for v in manifest.values() for by_w in v.values() for p in by_w.values()}
+    out_dir = os.path.dirname(manifest_path)
+    for name in os.listdir(out_dir):
+        if name != os.path.basename(manifest_path) and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return manifest
+
+
+# ========================= 페이지에서 사용 =========================
+_MANIFEST_CACHE = {}
+
+
+def load_manifest(path=MANIFEST):
+    """manifest.json (없으면 빈 dict). 파일이 바뀌었을 때만 다시 읽음."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    cached = _MANIFEST_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, encoding="utf-8") as f:
+            cached = (mtime, json.load(f))
+        _MANIFEST_CACHE[path] = cached
+    return cached[1]
+
+
+def picture_html(filename, display_width, alt="", manifest=None):
+    """
+    미리 줄인 변형들로 <picture> 태그 생성 (1x/2x 밀도별 srcset).
+    manifest 에 없는 이미지면 None.
+    """
+    manifest = load_manifest() if manifest is None else manifest
+    variants = manifest.get(filename)
+    if not variants:
+        return None
+
+    def srcset(by_width):
+        return ", ".join(f"{STATIC_URL}/{by_width[w]} {w}w" for w in sorted(by_width, key=int))
+
+    sizes = f"{display_width}px"
+    jpeg = variants.get("jpeg", {})
+    fallback_w = min((int(w) for w in jpeg if int(w) >= display_width), default=None)
+    if fallback_w is None:
+        return None
+    fallback = jpeg[str(fallback_w)]
+    sources = "".join(
+        f'<source type="image/{fmt}" srcset="{srcset(by_w)}" sizes="{sizes}">'
+        for fmt, by_w in variants.items() if fmt != "jpeg" and by_w
+    )
+    return (
+        f'<picture>{sources}'
+        f'<img src="{STATIC_URL}/{fallback}" srcset="{srcset(jpeg)}" sizes="{sizes}" '
+        f'width="{display_width}" alt="{html.escape(alt)}" style="max-width:100%;height:auto;" '
+        f'loading="eager" decoding="async"></picture>'
+    )
+
+
+def render_image(st, filename, width, alt=""):
+    """빌드된 변형이 있으면 <picture>, 없으면 원본을 st.image 로 (빌드 전에도 화면은 깨지지 않게)"""
+    tag = picture_html(filename, width, alt)
+    if tag:
+        st.markdown(f'<div style="text-align:center;">{tag}</div>', unsafe_allow_html=True)
+    else:
+        st.image(os.path.join(SOURCE_DIR, filename), width=width)
+
+
+if __name__ == "__main__":
+    # 빌드 + 첫 화면 이미지 전송량 비교
+    #   python asset_pipeline.py
+    manifest = build_all()
+    for filename, variants in manifest.items():
+        original = os.path.getsize(os.path.join(SOURCE_DIR, filename))
+        print(f"{filename}: 원본 {original / 1024:,.0f} KB")
+        for fmt, by_w in variants.items():
+            sizes = ", ".join(
+                f"{w}px {os.path.getsize(os.path.join(STATIC_DIR, p)) / 1024:,.1f} KB" for w, p in by_w.items()
+            )
+            print(f"  {fmt:<5} {sizes}")
+
+    # 홈 화면(340px 표시) 기준 첫 로딩 시 받는 이미지 크기
+    home = manifest.get("home_fitness.jpg", {})
+    before = os.path.getsize(os.path.join(SOURCE_DIR, "home_fitness.jpg"))
+    for label, fmt, w in [("1x WebP", "webp", 340), ("2x WebP", "webp", 680), ("1x JPEG", "jpeg", 340)]:
+        path = home.get(fmt, {}).get(str(w))
+        if path:
+            after = os.path.getsize(os.path.join(STATIC_DIR, path))
+            print(f"첫 로딩 ({label}): {before / 1024:,.0f} KB → {after / 1024:,.1f} KB ({1 - after / before:.1%} 감소)")
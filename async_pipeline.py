@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+추천 파이프라인 비동기 I/O 코어.
+
+날씨 → 시트 두 번 읽기 → LLM → 운동별 (키워드 LLM → Spotify) → 셀 쓰기를 한 줄로 차례대로 기다리지 않고,
+서로 기다릴 필요가 없는 호출은 겹쳐서 실행합니다.
+
+- AsyncBridge: 프로세스에 하나뿐인 이벤트 루프(전용 스레드). Streamlit 스크립트는 이 다리만 통해 비동기 코드를 부름
+    · run(coro)      : 끝날 때까지 기다려 결과 반환
+    · submit(coro)   : concurrent.futures.Future 반환 (기존 job.result(timeout) 코드 그대로 사용)
+    · iterate(agen)  : async generator → 보통 generator (스트리밍 청크를 스크립트 스레드에서 화면에 그림)
+- TaskGraph: 이름 붙인 async 작업 + 의존 관계. 의존이 끝난 작업부터 바로 시작하고,
+  실패한 작업은 fallback 값으로 대체(오류는 errors 에 남김). 작업별 시작/끝 시각으로 임계 경로 계산
+- blocking(fn, ...): 동기 전용 클라이언트(gspread, spotipy)는 루프의 스레드 풀에서 실행
+- get_async_openai(key): 루프에 묶인 AsyncOpenAI 클라이언트 (키별로 하나, 연결 재사용)
+- http_get_json(url): httpx(requirements.txt) 가 있으면 루프에 묶인 AsyncClient 하나로,
+  없으면 requests 를 스레드 풀에서 (spotipy 가 함께 설치하는 대체 경로 — 동작은 같고 연결만 재사용하지 않음)
+
+    python async_pipeline.py    # 추천 흐름을 가짜 지연으로 순차 vs 그래프 비교
+"""
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+IO_THREADS = 16     # 동기 클라이언트용 스레드 수 (기본값은 CPU 수 + 4 라 셀 쓰기 6개도 줄을 섬)
+
+
+# ========================= 다리 =========================
+class AsyncBridge:
+    def __init__(self, io_threads=IO_THREADS):
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(ThreadPoolExecutor(io_threads, thread_name_prefix="moodfit-io"))
+        self._thread = threading.Thread(target=self.loop.run_forever, name="moodfit-async", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        return self.submit(coro).result(timeout)
+
+    def iterate(self, agen, timeout=None):
+        """
+        async generator 를 스크립트 스레드에서 for 문으로 소비.
+        도중에 break 하면 agen 을 닫아서 스트림 연결도 정리됨.
+        """
+        try:
+            while True:
+                try:
+                    yield self.submit(agen.__anext__()).result(timeout)
+                except StopAsyncIteration:
+                    return
+        finally:
+            try:
+                self.submit(agen.aclose()).result(5)
+            except Exception:
+                pass
+
+
+@st.cache_resource
+def get_bridge():
+    """프로세스 공용 이벤트 루프 (모든 세션이 같이 씀)"""
+    return AsyncBridge()
+
+
+async def blocking(fn, *args, **kwargs):
+    """동기 함수를 루프의 스레드 풀에서 (gspread / spotipy 처럼 async 클라이언트가 없는 경우)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+
+
+# 공유 클라이언트 (여러 세션의 스크립트 스레드가 동시에 처음 요청해도 하나만 만들어지게)
+_OPENAI = {}        # 키 → AsyncOpenAI
+_HTTP = {}          # 루프 → httpx.AsyncClient
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_async_openai(api_key):
+    """AsyncOpenAI (키별로 하나). 요청마다 timeout 은 with_options 로."""
+    from openai import AsyncOpenAI
+
+    with _CLIENTS_LOCK:
+        client = _OPENAI.get(api_key)
+        if client is None:
+            client = _OPENAI[api_key] = AsyncOpenAI(api_key=api_key, max_retries=0)
+        return client
+
+
+def get_async_http():
+    """지금 루프에 묶인 httpx.AsyncClient (루프별로 하나, 연결 재사용). 요청마다 timeout 은 get(..., timeout=)."""
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        client = _HTTP.get(loop)
+        if client is None:
+            client = _HTTP[loop] = httpx.AsyncClient()
+        return client
+
+
+async def http_get_json(url, timeout):
+    if httpx is not None:
+        r = await get_async_http().get(url, timeout=timeout)
+        r.raise_for_status()
+        return r.json()
+
+    import requests
+
+    def fetch():
+        r = requests.get(url, timeout=timeout)
+        r.raise_for_status()
+        return r.json()
+
+    return await blocking(fetch)
+
+
+# ========================= 의존 그래프 =========================
+class TaskGraph:
+    """
+    graph.add("daily", read_daily)
+    graph.add("top3", call_llm, deps=("daily", "weather"), fallback=None)
+    results = bridge.run(graph.run())
+    작업 함수는 의존 작업의 결과를 deps 순서대로 인자로 받는 async 함수.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self.errors = {}
+        self.timings = {}
+
+    def add(self, name, fn, deps=(), fallback=None):
+        for d in deps:
+            if d not in self._nodes:
+                raise ValueError(f"'{name}' 의 의존 작업 '{d}' 이 먼저 등록되어야 합니다.")
+        self._nodes[name] = (fn, tuple(deps), fallback)
+        return self
+
+    async def run(self):
+        t0 = time.perf_counter()
+        tasks = {}
+
+        async def node(name):
+            fn, deps, fallback = self._nodes[name]
+            args = [await tasks[d] for d in deps]
+            start = time.perf_counter() - t0
+            try:
+                return await fn(*args)
+            except Exception as e:
+                self.errors[name] = e
+                return fallback
+            finally:
+                self.timings[name] = (start, time.perf_counter() - t0)
+
+        for name in self._nodes:   # 등록 순서 = 의존 순서
+            tasks[name] = asyncio.ensure_future(node(name))
+        values = await asyncio.gather(*tasks.values())
+        return dict(zip(tasks, values))
+
+    def critical_path(self):
+        """(가장 늦게 끝난 작업까지 이어지는 작업 이름 목록, 그 경로의 끝 시각)"""
+        if not self.timings:
+            return [], 0.0
+        name = max(self.timings, key=lambda n: self.timings[n][1])
+        end = self.timings[name][1]
+        path = [name]
+        while self._nodes[name][1]:
+            name = max(self._nodes[name][1], key=lambda d: self.timings[d][1])
+            path.append(name)
+        return path[::-1], end
+
+    def busy_seconds(self):
+        """작업 시간 합 (모두 차례대로 했을 때 걸렸을 시간)"""
+        return sum(end - start for start, end in self.timings.values())
+
+
+if __name__ == "__main__":
+    # 추천 한 번의 I/O 를 가짜 지연으로 재현: 순차 합계 vs 그래프 실행 vs 임계 경로 (검증은 tests/test_async_pipeline.py)
+    #   python async_pipeline.py
+    LAT = {"weather": 0.3, "daily": 0.5, "users": 0.4, "llm": 3.0, "keyword": 0.6, "spotify": 0.4, "write": 0.3}
+    NAME_AT = (1.0, 1.8, 2.6)   # LLM 스트림에서 운동명이 나오는 시각
+
+    def sleep_sync(name):
+        time.sleep(LAT[name])
+
+    async def io(name, value=None):
+        await blocking(sleep_sync, name)   # 동기 클라이언트처럼 스레드 풀에서
+        return value
+
+    async def top3_stream():
+        t = 0.0
+        for i, at in enumerate(NAME_AT):
+            await asyncio.sleep(at - t)
+            t = at
+            yield i
+        await asyncio.sleep(LAT["llm"] - t)
+
+    async def playlist(i):
+        await io("keyword")
+        await io("spotify")
+        return i
+
+    bridge = AsyncBridge()
+
+    # 1) 지금까지의 순차 흐름
+    t0 = time.perf_counter()
+    for step in ("weather", "daily", "users", "llm") + ("keyword", "spotify") * 3 + ("write",) * 6:
+        sleep_sync(step)
+    sequential = time.perf_counter() - t0
+
+    # 2) 페이지 로딩: 날씨 / daily / users 를 한 번에
+    t0 = time.perf_counter()
+    load = TaskGraph()
+    for name in ("weather", "daily", "users"):
+        load.add(name, lambda n=name: io(n, n))
+    bridge.run(load.run())
+    # 3) 버튼: 스트림은 스크립트 스레드에서 소비, 운동명이 나올 때마다 쓰기/플레이리스트 시작
+    writes, playlists = [], []
+    for i in bridge.iterate(top3_stream()):
+        writes.append(bridge.submit(io("write")))
+        playlists.append(bridge.submit(playlist(i)))
+    writes += [bridge.submit(io("write")) for _ in range(3)]   # 이유 셀
+    for j in writes:
+        j.result()
+    written = time.perf_counter() - t0
+    for j in playlists:
+        j.result()
+    overlapped = time.perf_counter() - t0
+
+    path, end = load.critical_path()
+    critical = end + LAT["llm"] + LAT["write"]
+    print(f"순차 합계        {sequential:.2f}s  (호출 {4 + 6 + 6}개를 하나씩)")
+    print(f"Top3 + 시트 기록 {written:.2f}s  (임계 경로: 로딩 {' → '.join(path)} {end:.2f}s + LLM + 쓰기 1번 "
+          f"= {critical:.2f}s)")
+    print(f"플레이리스트까지 {overlapped:.2f}s  (마지막 운동명 뒤 키워드 LLM → Spotify 가 남음: "
+          f"{end + NAME_AT[-1] + LAT['keyword'] + LAT['spotify']:.2f}s)")
+    print(f"로딩 그래프: 작업 합 {load.busy_seconds():.2f}s → 경과 {end:.2f}s")
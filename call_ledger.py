@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+외부 호출 장부 (OpenAI / Spotify / 날씨).
+
+호출 한 번마다 한 줄(JSON)을 .moodfit/ledger/ledger.jsonl 에 추가만 합니다.
+- 필드: ts, dependency, op, model, user, prompt_tokens, completion_tokens, cached_tokens,
+        latency_ms, ttft_ms(스트리밍 첫 토큰), cache(hit/miss), outcome, cost_usd
+        (estimated=True 면 prompt_tokens 가 API usage 가 아닌 로컬 추정치)
+- 파일이 MAX_BYTES 를 넘으면 ledger-YYYYmmdd-HHMMSS.jsonl 로 이름을 바꾸고 새 파일에 이어 씀
+  (회전된 파일은 KEEP_FILES 개까지만 보관)
+- 집계(summarize)는 저장된 파일을 읽어 일별/사용자별 호출 수, 토큰, p50/p95 지연, 비용을 계산
+
+사용:
+    with get_ledger().track("openai", op="top3", model="gpt-4o-mini", user=name) as call:
+        resp = client.chat.completions.create(...)
+        call.set_usage(resp.usage)
+예외가 나면 outcome 에 오류 종류가 남고 예외는 그대로 올라갑니다.
+"""
+import os
+import glob
+import json
+import time
+import threading
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from resilience import is_timeout
+
+LEDGER_DIR = os.getenv("MOODFIT_LEDGER_DIR", os.path.join(".moodfit", "ledger"))
+MAX_BYTES = int(os.getenv("MOODFIT_LEDGER_MAX_BYTES", str(5 * 1024 * 1024)))
+KEEP_FILES = 20
+
+# 1M 토큰당 USD (입력 / 캐시된 입력 / 출력). 표에 없는 모델은 비용 0 으로 집계
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+
+def call_cost(model, prompt_tokens=0, completion_tokens=0, cached_tokens=0):
+    price = PRICES.get(model)
+    if price is None:
+        return 0.0
+    p_in, p_cached, p_out = price
+    uncached = max(0, (prompt_tokens or 0) - (cached_tokens or 0))
+    return (uncached * p_in + (cached_tokens or 0) * p_cached + (completion_tokens or 0) * p_out) / 1e6
+
+
+def outcome_of(exc):
+    """예외 → outcome 문자열 (서킷 open / 시간 초과 / 그 외 예외 이름)"""
+    name = type(exc).__name__
+    if name == "CircuitOpenError":
+        return "circuit_open"
+    if is_timeout(exc):
+        return "timeout"
+    return f"error:{name}"
+
+
+class LedgerCall:
+    """track() 이 넘겨주는 기록 하나 (블록 안에서 토큰/캐시/결과를 채움)"""
+
+    def __init__(self, dependency, op="", model=None, user=None):
+        self.entry = {
+            "dependency": dependency, "op": op, "model": model, "user": user,
+            "prompt_tokens": None, "completion_tokens": None, "cached_tokens": None,
+            "ttft_ms": None, "cache": None, "outcome": "ok",
+        }
+        self.started = time.perf_counter()
+
+    def set_usage(self, usage):
+        """OpenAI usage 객체 (없으면 무시)"""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        self.entry.update(
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None),
+            cached_tokens=cached,
+            cache="hit" if cached else "miss",
+            estimated=False,
+        )
+
+    def estimate(self, prompt_tokens):
+        """API usage 를 못 받았을 때 쓸 로컬 추정 토큰 (usage 가 오면 덮어씀)"""
+        if self.entry["prompt_tokens"] is None:
+            self.entry.update(prompt_tokens=prompt_tokens, estimated=True)
+
+    def first_token(self):
+        """스트리밍 첫 내용이 도착한 시점 (처음 한 번만)"""
+        if self.entry["ttft_ms"] is None:
+            self.entry["ttft_ms"] = round((time.perf_counter() - self.started) * 1000, 1)
+
+    def set(self, **fields):
+        self.entry.update(fields)
+
+
+class CallLedger:
+    def __init__(self, directory=LEDGER_DIR, max_bytes=MAX_BYTES, keep=KEEP_FILES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.path = os.path.join(directory, "ledger.jsonl")
+        self._lock = threading.Lock()
+
+    # ---------- 기록 ----------
+    def record(self, dependency, op="", model=None, user=None, latency_ms=None, outcome="ok", **fields):
+        entry = {"dependency": dependency, "op": op, "model": model, "user": user,
+                 "latency_ms": latency_ms, "outcome": outcome, **fields}
+        self._append(entry)
+        return entry
+
+    def track(self, dependency, op="", model=None, user=None):
+        return _Tracker(self, LedgerCall(dependency, op, model, user))
+
+    def _append(self, entry):
+        entry.setdefault("ts", datetime.now().isoformat(timespec="milliseconds"))
+        entry["cost_usd"] = call_cost(entry.get("model"), entry.get("prompt_tokens"),
+                                      entry.get("completion_tokens"), entry.get("cached_tokens"))
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                if os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    self._rotate()
+            except OSError:
+                pass
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def _rotate(self):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        os.replace(self.path, os.path.join(self.directory, f"ledger-{stamp}.jsonl"))
+        rotated = sorted(glob.glob(os.path.join(self.directory, "ledger-*.jsonl")))
+        for old in rotated[:-self.keep]:
+            os.remove(old)
+
+    # ---------- 조회 ----------
+    def files(self):
+        """회전된 파일(오래된 순) + 현재 파일"""
+        rotated = sorted(glob.glob(os.path.join(self.directory, "ledger-*.jsonl")))
+        return rotated + ([self.path] if os.path.exists(self.path) else [])
+
+    def load(self, since=None) -> pd.DataFrame:
+        """기록 전체 (since: 이 시각 이후만, datetime 또는 ISO 문자열)"""
+        since = pd.Timestamp(since) if since is not None else None
+        rows = []
+        for path in self.files():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        continue  # 쓰다 끊긴 마지막 줄
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return df
+        df["ts"] = pd.to_datetime(df["ts"])
+        if since is not None:
+            df = df[df["ts"] >= since]
+        return df.reset_index(drop=True)
+
+
+class _Tracker:
+    def __init__(self, ledger, call):
+        self.ledger = ledger
+        self.call = call
+
+    def __enter__(self):
+        return self.call
+
+    def __exit__(self, exc_type, exc, tb):
+        entry = self.call.entry
+        entry["latency_ms"] = round((time.perf_counter() - self.call.started) * 1000, 1)
+        if exc is not None:
+            entry["outcome"] = outcome_of(exc)
+        try:
+            self.ledger._append(entry)
+        except OSError:
+            pass  # 장부 기록 실패가 추천을 막지 않게
+        return False
+
+
+# ========================= 집계 =========================
+def summarize(df, by=("date",)):
+    """
+    by: "date" / "user" / "dependency" / "op" 조합.
+    호출 수, 실패율, 분당 처리량(활동 구간 기준), 토큰, p50/p95 지연, 비용
+    """
+    if df.empty:
+        return pd.DataFrame()
+    df = df.assign(date=df["ts"].dt.strftime("%Y-%m-%d"), user=df["user"].fillna("-"),
+                   failed=df["outcome"].ne("ok"))
+    for col in ("prompt_tokens", "completion_tokens", "latency_ms", "cost_usd"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    g = df.groupby(list(by), sort=True)
+    span_min = g["ts"].agg(lambda s: max((s.max() - s.min()).total_seconds() / 60, 1.0))
+    out = pd.DataFrame({
+        "호출": g.size(),
+        "실패율": g["failed"].mean().round(3),
+        "분당호출": (g.size() / span_min).round(2),
+        "prompt토큰": g["prompt_tokens"].sum().astype("int64"),
+        "평균prompt": g["prompt_tokens"].mean().round(0),
+        "completion토큰": g["completion_tokens"].sum().astype("int64"),
+        "p50_ms": g["latency_ms"].quantile(0.5).round(0),
+        "p95_ms": g["latency_ms"].quantile(0.95).round(0),
+        "비용_USD": g["cost_usd"].sum().round(4),
+    })
+    return out.reset_index()
+
+
+@st.cache_resource
+def get_ledger():
+    """프로세스 공용 장부 (여러 세션/작업 스레드가 같이 씀)"""
+    return CallLedger()
+
+
+if __name__ == "__main__":
+    # 임시 폴더에 가짜 호출을 쌓아 회전 / 집계 / 기록 비용 확인 (검증은 tests/test_call_ledger.py)
+    #   python call_ledger.py
+    import random
+    import shutil
+    import tempfile
+    from types import SimpleNamespace
+
+    tmp = tempfile.mkdtemp()
+    ledger = CallLedger(tmp, max_bytes=64 * 1024, keep=3)
+    random.seed(0)
+    n = 3000
+    t0 = time.perf_counter()
+    for i in range(n):
+        user = random.choice(["kim", "lee", "park"])
+        dep = random.choice(["openai", "openai", "spotify", "weather"])
+        if dep == "openai":
+            with ledger.track("openai", op=random.choice(["top3", "keyword"]), model="gpt-4o-mini", user=user) as c:
+                c.set_usage(SimpleNamespace(prompt_tokens=random.randint(100, 1600), completion_tokens=120,
+                                            prompt_tokens_details=SimpleNamespace(cached_tokens=random.choice([0, 1024]))))
+        else:
+            ledger.record(dep, op="search", user=user, latency_ms=random.expovariate(1 / 300))
+    t1 = time.perf_counter()
+
+    try:
+        with ledger.track("openai", op="top3", model="gpt-4o-mini") as c:
+            raise TimeoutError("budget")
+    except TimeoutError:
+        pass
+
+    files = ledger.files()
+    df = ledger.load()
+    print(f"기록 {n:,}건: {(t1 - t0) / n * 1e6:.0f}µs/건, 보관 파일 {len(files)}개 (남은 {len(df):,}건)")
+    print(summarize(df, by=("dependency", "op")).to_string(index=False))
+    print(summarize(df[df["dependency"] == "openai"], by=("user",))[["user", "호출", "평균prompt", "비용_USD"]]
+          .to_string(index=False))
+    shutil.rmtree(tmp)
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+운동 카탈로그 빌드/로딩.
+
+두 CSV 를 선언된 스키마로 합쳐서, 파싱 없이 바로 읽히는 바이너리(npz) 하나로 만듭니다.
+
+- workout.csv                            : 기본 소스 (에너지소비량 / 감정매핑 / 운동강도 / 운동목적)
+- workout_purpose_subjective_final.csv   : 운동목적 보강 소스 (같은 운동에 대한 주관 평가 목적)
+
+병합 규칙
+- 행 매칭은 (운동명, 같은 이름 안에서의 순번) — 같은 이름의 변형 운동(예: 킥복싱 2종)도 1:1 대응
+- 모든 컬럼은 기본 소스 값, 보강 소스의 운동목적은 별도 컬럼(운동목적_주관)으로 보관
+- 태그는 띄어쓰기를 무시하고 정해진 표기로 통일 ("체중감량" → "체중 감량", daily 시트 선택지와 동일)
+- 불일치/중복/범위 이탈/알 수 없는 태그는 report 로 모아서 보여줌 (값은 임의로 고치지 않음)
+
+산출물(workout_catalog.npz)
+- 문자열/숫자 컬럼은 고정폭 배열, 강도는 코드 + 사전, 태그는 CSR(indptr + 코드) + 사전
+- np.load(allow_pickle=False) 만으로 읽히므로 시작 시 CSV 파서/인코딩 추정이 필요 없음
+
+    python catalog.py          # 빌드 + 리포트 + 로딩 시간 비교
+"""
+import os
+import csv
+import hashlib
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from emotion_model import TAG_VA
+
+SOURCE_PRIMARY = "workout.csv"
+SOURCE_PURPOSE = "workout_purpose_subjective_final.csv"
+ARTIFACT = "workout_catalog.npz"
+SCHEMA_VERSION = 1
+
+# 컬럼 → 타입 (str / float / tags / category)
+SCHEMA = {
+    "운동명": "str",
+    "단위체중당에너지소비량": "float",
+    "감정매핑": "tags",
+    "운동목적": "tags",
+    "운동강도": "category",
+}
+# 보강 소스에서 가져오는 컬럼 (기본 소스 스키마에는 없음)
+EXTRA_COLUMN = "운동목적_주관"
+
+# 정해진 태그 표기 (daily 시트 선택지 / 감정 좌표표와 같은 표기)
+PURPOSES = ["체중 감량", "체력 향상", "스트레스 해소", "체형 교정"]
+INTENSITIES = ["저강도", "중강도", "고강도"]
+EMOTION_TAGS = list(TAG_VA)
+
+# 단위체중당에너지소비량(MET) 허용 범위 — 벗어나면 오타 가능성으로 리포트
+MET_RANGE = (0.5, 25.0)
+
+
+def _key(tag):
+    return str(tag).replace(" ", "").strip()
+
+
+_PURPOSE_CANON = {_key(t): t for t in PURPOSES}
+_EMOTION_CANON = {_key(t): t for t in EMOTION_TAGS}
+
+
+@dataclass
+class BuildReport:
+    issues: list = field(default_factory=list)   # (종류, 운동명, 행 번호, 내용)
+
+    def add(self, kind, name, row, detail):
+        self.issues.append((kind, name, row, detail))
+
+    def counts(self):
+        out = {}
+        for kind, *_ in self.issues:
+            out[kind] = out.get(kind, 0) + 1
+        return out
+
+    def format(self, limit=20):
+        lines = [f"{k}: {n}건" for k, n in self.counts().items()]
+        for kind, name, row, detail in self.issues[:limit]:
+            lines.append(f"  [{kind}] {row}행 {name}: {detail}")
+        if len(self.issues) > limit:
+            lines.append(f"  ... 외 {len(self.issues) - limit}건")
+        return "\n".join(lines)
+
+
+# ========================= 소스 읽기 (빌드 시에만) =========================
+def _read_rows(path):
+    """UTF-8(BOM 허용) CSV → dict 목록. 카탈로그 소스는 UTF-8 로 고정."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _split(value):
+    return [t.strip() for t in str(value or "").split(",") if t.strip()]
+
+
+def _normalize_tags(values, canon, name, row, report, column):
+    out = []
+    for t in values:
+        c = canon.get(_key(t))
+        if c is None:
+            report.add("알 수 없는 태그", name, row, f"{column}={t!r}")
+            c = t
+        if c not in out:
+            out.append(c)
+    return out
+
+
+def _occurrence_keys(rows):
+    """(운동명, 같은 이름 안에서의 순번) 키 목록"""
+    seen = {}
+    keys = []
+    for r in rows:
+        name = (r.get("운동명") or "").strip()
+        seen[name] = seen.get(name, 0) + 1
+        keys.append((name, seen[name]))
+    return keys
+
+
+def build(primary=SOURCE_PRIMARY, purpose=SOURCE_PURPOSE):
+    """두 소스를 병합해서 (columns dict, BuildReport) 반환"""
+    report = BuildReport()
+    base = _read_rows(primary)
+    extra = _read_rows(purpose) if purpose and os.path.exists(purpose) else []
+
+    for col in SCHEMA:
+        if base and col not in base[0]:
+            raise ValueError(f"{primary} 에 '{col}' 컬럼이 없습니다.")
+
+    extra_by_key = dict(zip(_occurrence_keys(extra), extra))
+    base_keys = _occurrence_keys(base)
+    base_key_set = set(base_keys)
+    for (name, n), row in zip(_occurrence_keys(extra), range(2, len(extra) + 2)):
+        if (name, n) not in base_key_set:
+            report.add("보강 소스에만 있음", name, row, SOURCE_PURPOSE)
+
+    names, mets, intensities, emotions, purposes, subjective = [], [], [], [], [], []
+    for row_no, (r, key) in enumerate(zip(base, base_keys), start=2):
+        name = key[0]
+        if not name:
+            report.add("누락", "", row_no, "운동명 없음")
+            continue
+        if key[1] == 2:
+            report.add("중복 운동명", name, row_no, "같은 이름의 행이 여러 개 (순번으로 구분해 병합)")
+
+        try:
+            met = float(r["단위체중당에너지소비량"])
+        except (TypeError, ValueError):
+            report.add("누락", name, row_no, "단위체중당에너지소비량 숫자 아님")
+            met = float("nan")
+        if met == met and not (MET_RANGE[0] <= met <= MET_RANGE[1]):
+            report.add("에너지소비량 범위", name, row_no, f"{met} (허용 {MET_RANGE[0]}~{MET_RANGE[1]})")
+
+        intensity = (r.get("운동강도") or "").strip()
+        if intensity not in INTENSITIES:
+            report.add("알 수 없는 태그", name, row_no, f"운동강도={intensity!r}")
+
+        emo = _normalize_tags(_split(r.get("감정매핑")), _EMOTION_CANON, name, row_no, report, "감정매핑")
+        pur = _normalize_tags(_split(r.get("운동목적")), _PURPOSE_CANON, name, row_no, report, "운동목적")
+
+        other = extra_by_key.get(key)
+        pur2 = []
+        if other is not None:
+            pur2 = _normalize_tags(_split(other.get("운동목적")), _PURPOSE_CANON, name, row_no, report, "운동목적")
+            if set(pur2) != set(pur):
+                report.add("운동목적 불일치", name, row_no, f"{', '.join(pur)} | {', '.join(pur2)}")
+            if (other.get("운동강도") or "").strip() != intensity:
+                report.add("운동강도 불일치", name, row_no, f"{intensity} | {other.get('운동강도')} → 기본 소스")
+            try:
+                met2 = float(other.get("단위체중당에너지소비량"))
+            except (TypeError, ValueError):
+                met2 = met
+            if met2 != met and met == met:
+                report.add("에너지소비량 불일치", name, row_no, f"{met} | {met2} → 기본 소스")
+
+        names.append(name)
+        mets.append(met)
+        intensities.append(intensity)
+        emotions.append(emo)
+        purposes.append(pur)
+        subjective.append(pur2)
+
+    columns = {
+        "운동명": names,
+        "단위체중당에너지소비량": mets,
+        "감정매핑": emotions,
+        "운동목적": purposes,
+        "운동강도": intensities,
+        EXTRA_COLUMN: subjective,
+    }
+    return columns, report
+
+
+# ========================= 배열 인코딩 =========================
+def _encode_category(values, vocab):
+    vocab = list(vocab) + [v for v in dict.fromkeys(values) if v not in vocab]
+    pos = {v: i for i, v in enumerate(vocab)}
+    return np.array([pos[v] for v in values], dtype=np.int16), vocab
+
+
+def _encode_tags(lists, vocab):
+    vocab = list(vocab) + [t for t in dict.fromkeys(t for ts in lists for t in ts) if t not in vocab]
+    pos = {t: i for i, t in enumerate(vocab)}
+    indptr = np.zeros(len(lists) + 1, dtype=np.int32)
+    np.cumsum([len(ts) for ts in lists], out=indptr[1:])
+    codes = np.array([pos[t] for ts in lists for t in ts], dtype=np.int16)
+    return indptr, codes, vocab
+
+
+def source_digest(*paths):
+    h = hashlib.sha1()
+    for p in paths:
+        if p and os.path.exists(p):
+            with open(p, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def save(columns, path=ARTIFACT, digest=""):
+    intensity_codes, intensity_vocab = _encode_category(columns["운동강도"], INTENSITIES)
+    emo_ptr, emo_codes, emo_vocab = _encode_tags(columns["감정매핑"], EMOTION_TAGS)
+    pur_ptr, pur_codes, pur_vocab = _encode_tags(columns["운동목적"], PURPOSES)
+    sub_ptr, sub_codes, sub_vocab = _encode_tags(columns[EXTRA_COLUMN], PURPOSES)
+    tmp = path + ".tmp.npz"
+    np.savez(
+        tmp,
+        schema_version=np.int16(SCHEMA_VERSION),
+        source_digest=np.asarray(digest),
+        names=np.asarray(columns["운동명"], dtype=str),
+        met=np.asarray(columns["단위체중당에너지소비량"], dtype=np.float32),
+        intensity_codes=intensity_codes,
+        intensity_vocab=np.asarray(intensity_vocab, dtype=str),
+        emotion_indptr=emo_ptr,
+        emotion_codes=emo_codes,
+        emotion_vocab=np.asarray(emo_vocab, dtype=str),
+        purpose_indptr=pur_ptr,
+        purpose_codes=pur_codes,
+        purpose_vocab=np.asarray(pur_vocab, dtype=str),
+        subjective_indptr=sub_ptr,
+        subjective_codes=sub_codes,
+        subjective_vocab=np.asarray(sub_vocab, dtype=str),
+    )
+    os.replace(tmp, path)
+
+
+# ========================= 로딩 =========================
+class Catalog:
+    """배열 기반 카탈로그 (np.load 결과를 그대로 들고 있음)"""
+
+    # 태그 컬럼 → npz 키 접두어
+    TAG_COLUMNS = {"감정매핑": "emotion", "운동목적": "purpose", EXTRA_COLUMN: "subjective"}
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.names = arrays["names"]
+        self.met = arrays["met"]
+        self.intensity_codes = arrays["intensity_codes"]
+        self.intensity_vocab = arrays["intensity_vocab"]
+        self.source_digest = str(arrays["source_digest"])
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def intensities(self):
+        return self.intensity_vocab[self.intensity_codes]
+
+    def _tag_arrays(self, column):
+        prefix = self.TAG_COLUMNS[column]
+        a = self.arrays
+        return a[f"{prefix}_indptr"], a[f"{prefix}_codes"], a[f"{prefix}_vocab"]
+
+    def tag_vocab(self, column):
+        return self._tag_arrays(column)[2].tolist()
+
+    def tag_lists(self, column):
+        indptr, codes, vocab = self._tag_arrays(column)
+        words = vocab[codes].tolist()
+        return [words[indptr[i]:indptr[i + 1]] for i in range(len(self.names))]
+
+    def tag_matrix(self, column) -> np.ndarray:
+        """(W, T) 0/1 행렬 — 태그 일치 계산을 행렬 연산으로 할 때"""
+        indptr, codes, vocab = self._tag_arrays(column)
+        m = np.zeros((len(self.names), len(vocab)), dtype=np.uint8)
+        m[np.repeat(np.arange(len(self.names)), np.diff(indptr)), codes] = 1
+        return m
+
+    def to_frame(self):
+        """기존 코드가 쓰던 workout.csv 와 같은 컬럼(+운동목적_주관)의 DataFrame"""
+        import pandas as pd
+
+        df = pd.DataFrame({
+            "운동명": self.names.tolist(),
+            "단위체중당에너지소비량": self.met.astype(float),
+            "감정매핑": [", ".join(ts) for ts in self.tag_lists("감정매핑")],
+            "운동목적": [", ".join(ts) for ts in self.tag_lists("운동목적")],
+            "운동강도": self.intensities.tolist(),
+        })
+        df[EXTRA_COLUMN] = [", ".join(ts) for ts in self.tag_lists(EXTRA_COLUMN)]
+        return df
+
+
+def _stale(path, sources=(SOURCE_PRIMARY, SOURCE_PURPOSE)):
+    if not os.path.exists(path):
+        return True
+    built = os.path.getmtime(path)
+    return any(os.path.exists(s) and os.path.getmtime(s) > built for s in sources)
+
+
+def compile_catalog(path=ARTIFACT, primary=SOURCE_PRIMARY, purpose=SOURCE_PURPOSE):
+    """소스 CSV → 산출물. BuildReport 반환."""
+    columns, report = build(primary, purpose)
+    save(columns, path, digest=source_digest(primary, purpose))
+    return report
+
+
+def load_catalog(path=ARTIFACT) -> Catalog:
+    """
+    산출물을 읽어 Catalog 반환.
+    소스 CSV 가 산출물보다 새로우면(카탈로그를 고친 뒤 빌드를 안 한 경우) 한 번 다시 빌드.
+    """
+    if _stale(path):
+        try:
+            compile_catalog(path)
+        except OSError:
+            if not os.path.exists(path):
+                raise
+    with np.load(path, allow_pickle=False) as z:
+        if int(z["schema_version"]) != SCHEMA_VERSION:
+            raise ValueError(f"{path}: schema_version {int(z['schema_version'])} != {SCHEMA_VERSION}")
+        return Catalog({k: z[k] for k in z.files})
+
+
+if __name__ == "__main__":
+    import time
+
+    t0 = time.perf_counter()
+    rep = compile_catalog()
+    t1 = time.perf_counter()
+    print(f"빌드: {t1 - t0:.3f}s → {ARTIFACT} ({os.path.getsize(ARTIFACT) / 1024:.1f} KB)")
+    print(rep.format())
+
+    t0 = time.perf_counter()
+    for _ in range(20):
+        cat = load_catalog()
+    t1 = time.perf_counter()
+    for _ in range(20):
+        cat.to_frame()
+    t2 = time.perf_counter()
+
+    import pandas as pd
+
+    t3 = time.perf_counter()
+    for _ in range(20):
+        for enc in ["utf-8-sig", "utf-8", "cp949"]:
+            try:
+                pd.read_csv(SOURCE_PRIMARY, encoding=enc)
+                break
+            except Exception:
+                pass
+    t4 = time.perf_counter()
+    print(f"로딩: npz {(t1 - t0) / 20 * 1000:.2f}ms (+DataFrame 변환 {(t2 - t1) / 20 * 1000:.2f}ms)"
+          f" / 기존 read_csv {(t4 - t3) / 20 * 1000:.2f}ms")
+    print(f"{len(cat)}개 운동, 운동목적 {cat.tag_vocab('운동목적')}, 운동강도 {cat.intensity_vocab.tolist()}")
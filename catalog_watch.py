@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+카탈로그 핫 리로드.
+
+workout.csv / workout_purpose_subjective_final.csv 를 고치면 재시작 없이 반영됩니다.
+
+- CatalogSnapshot: 카탈로그 한 버전(소스 내용 해시)과 거기서 만든 파생 데이터
+  (DataFrame, 감정×운동 친화도 행렬, 검색 인덱스, 운동명→강도) 묶음. 만든 뒤에는 바꾸지 않음
+- CatalogWatcher : 백그라운드 스레드가 POLL_SECONDS 마다 소스 CSV 의 mtime 만 확인하고,
+  바뀌었으면 내용 해시를 비교 → 내용이 달라졌을 때만 산출물(npz) 재빌드 + 파생 데이터 생성 →
+  현재 스냅샷 참조를 한 번에 교체
+- 페이지는 rerun 시작 시 current() 로 스냅샷 하나를 잡고 끝까지 그것만 씀
+  → 도중에 교체돼도 한 rerun 안에서는 같은 버전, 읽는 쪽은 재빌드 비용을 내지 않음
+- 카탈로그에 딸린 캐시(예: 운동별 플레이리스트 검색 결과)는 snapshot.cache(이름) 에 두면
+  새 버전으로 바뀔 때 자동으로 비워짐 (다른 버전의 캐시를 읽지 않음)
+
+재빌드가 실패하면(CSV 깨짐 등) 이전 스냅샷을 계속 쓰고 last_error 에 남깁니다.
+환경변수 MOODFIT_CATALOG_POLL=0 이면 감시 스레드를 띄우지 않습니다 (check() 수동 호출).
+"""
+import os
+import time
+import logging
+import threading
+
+import streamlit as st
+
+from catalog import ARTIFACT, SOURCE_PRIMARY, SOURCE_PURPOSE, compile_catalog, load_catalog, source_digest
+from emotion_model import EmotionWorkoutIndex
+from workout_search import load_or_build as load_search_index
+
+logger = logging.getLogger("moodfit.catalog")
+
+POLL_SECONDS = float(os.getenv("MOODFIT_CATALOG_POLL", "5"))
+
+
+class CatalogSnapshot:
+    """카탈로그 한 버전의 읽기 전용 묶음 (workouts DataFrame 도 여러 세션이 공유하므로 수정 금지)"""
+
+    def __init__(self, catalog, index_path=None):
+        df = catalog.to_frame()
+        df["운동목적_list"] = [[t.strip() for t in str(x).split(",") if t.strip()] for x in df["운동목적"]]
+        self.version = catalog.source_digest
+        self.built_at = time.time()
+        self.workouts = df
+        self.emotion_index = EmotionWorkoutIndex.from_catalog(df)
+        self.search_index = load_search_index(df, index_path)
+        self.intensity_map = dict(zip(df["운동명"], df["운동강도"]))
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def cache(self, name) -> dict:
+        """이 버전에만 유효한 캐시 dict (버전이 바뀌면 새 스냅샷의 빈 dict 를 쓰게 됨)"""
+        with self._lock:
+            return self._caches.setdefault(name, {})
+
+
+class CatalogWatcher:
+    def __init__(self, path=ARTIFACT, sources=(SOURCE_PRIMARY, SOURCE_PURPOSE), interval=POLL_SECONDS,
+                 index_path=None):
+        self.path = path
+        self.sources = tuple(sources)
+        self.interval = interval
+        self.index_path = index_path
+        self.swaps = 0
+        self.last_error = None
+        self._check_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # 첫 스냅샷만 동기로 (프로세스당 한 번, 보통 워밍업 스레드가 먼저 만들어 둠)
+        self._mtimes = self._stat()
+        catalog = load_catalog(path) if os.path.exists(path) else None
+        if catalog is None or catalog.source_digest != source_digest(*self.sources):
+            compile_catalog(path, *self.sources)
+            catalog = load_catalog(path)
+        self._snapshot = CatalogSnapshot(catalog, index_path)
+        self._thread = None
+        if interval > 0:
+            self._thread = threading.Thread(target=self._run, name="moodfit-catalog-watch", daemon=True)
+            self._thread.start()
+
+    def current(self) -> CatalogSnapshot:
+        """지금 버전의 스냅샷 (참조 읽기 한 번 — 잠금/재빌드 없음)"""
+        return self._snapshot
+
+    def _stat(self):
+        return tuple(os.stat(p).st_mtime_ns if os.path.exists(p) else None for p in self.sources)
+
+    def check(self) -> bool:
+        """소스가 바뀌었으면 다시 빌드해서 교체. 교체했으면 True."""
+        with self._check_lock:
+            mtimes = self._stat()
+            if mtimes == self._mtimes:
+                return False
+            self._mtimes = mtimes
+            digest = source_digest(*self.sources)
+            if digest == self._snapshot.version:
+                return False  # 저장만 다시 했거나 touch — 내용은 그대로
+
+            t0 = time.perf_counter()
+            try:
+                report = compile_catalog(self.path, *self.sources)
+                snapshot = CatalogSnapshot(load_catalog(self.path), self.index_path)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("catalog rebuild failed, keeping %s (%s)", self._snapshot.version, self.last_error)
+                return False
+
+            self._snapshot = snapshot
+            self.swaps += 1
+            self.last_error = None
+            logger.info("catalog %s swapped in (%d workouts, %.2fs)%s", snapshot.version, len(snapshot.workouts),
+                        time.perf_counter() - t0, f"\n{report.format()}" if report.issues else "")
+            return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("catalog watch error")
+
+    def stop(self):
+        self._stop.set()
+
+
+@st.cache_resource
+def get_catalog_watcher():
+    """프로세스 공용 카탈로그 감시자 (페이지는 get_catalog_watcher().current() 로 스냅샷을 잡음)"""
+    return CatalogWatcher()
+
+
+if __name__ == "__main__":
+    # 임시 폴더의 CSV 를 고쳐 가며 교체 시간 / 읽는 쪽 지연 확인 (검증은 tests/test_catalog_watch.py)
+    #   python catalog_watch.py
+    import shutil
+    import tempfile
+
+    tmp = tempfile.mkdtemp()
+    sources = [shutil.copy(p, tmp) for p in (SOURCE_PRIMARY, SOURCE_PURPOSE)]
+    watcher = CatalogWatcher(os.path.join(tmp, ARTIFACT), sources, interval=0.05,
+                             index_path=os.path.join(tmp, "search.npz"))
+    first = watcher.current()
+
+    lat = []
+    seen = set()
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            snap = watcher.current()
+            _ = snap.workouts["운동명"].iloc[0], snap.intensity_map
+            lat.append(time.perf_counter() - t0)
+            seen.add(snap.version)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for r in readers:
+        r.start()
+
+    # 첫 운동의 강도를 바꿈 → 백그라운드 재빌드 후 교체
+    time.sleep(0.2)
+    with open(sources[0], encoding="utf-8-sig") as f:
+        text = f.read()
+    name = first.workouts["운동명"].iloc[0]
+    old = first.intensity_map[name]
+    new = "고강도" if old != "고강도" else "저강도"
+    lines = text.splitlines(True)
+    lines[1] = lines[1].replace(old, new, 1)
+    t0 = time.perf_counter()
+    with open(sources[0], "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    while watcher.swaps == 0 and time.perf_counter() - t0 < 10:
+        time.sleep(0.01)
+    t1 = time.perf_counter()
+    done.set()
+    for r in readers:
+        r.join()
+
+    print(f"변경 감지 → 교체: {(t1 - t0) * 1000:.0f}ms (폴링 간격 {watcher.interval * 1000:.0f}ms 포함)")
+    lat = sorted(lat)
+    print(f"'{name}' 강도 {old} → {new}, 읽는 쪽이 본 버전 {len(seen)}개")
+    print(f"읽기 {len(lat):,}회: 중앙값 {lat[len(lat) // 2] * 1e6:.1f}µs, p99 {lat[int(len(lat) * 0.99)] * 1e6:.1f}µs"
+          f" (재빌드 중 GIL 대기 포함, 재빌드 자체는 읽는 쪽에서 실행되지 않음)")
+    shutil.rmtree(tmp)
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Russell Circumplex 기반 2차원(쾌-불쾌 valence × 각성 arousal) 감정 모델.
+
+- EMOTION_VA         : 감정 → (valence -2~+2, arousal 1~5). arousal 값은 기존 EMOTION_AROUSAL 과 동일
+- TAG_VA / RELIEF    : 카탈로그 '감정매핑' 태그의 좌표 / 그 태그가 직접 달래주는 감정
+- EmotionWorkoutIndex: 감정×운동 친화도 행렬(E×W)을 카탈로그 로딩 시 한 번만 계산
+
+후보군 필터링은 선택한 감정 벡터(1×E) @ 친화도 행렬(E×W) 한 번으로 끝납니다.
+평균 각성점수 하나로는 구분되지 않던 "분노"(불쾌·고각성)와 "신남"(쾌·고각성)이
+서로 다른 운동 집합으로 이어집니다.
+"""
+import numpy as np
+import pandas as pd
+
+# =========================
+# 😄 감정 좌표표
+# - valence: -2(매우 불쾌) ~ +2(매우 쾌)
+# - arousal: 1(매우 낮음) ~ 5(매우 높음)
+# =========================
+EMOTION_VA = {
+    # 🟢 쾌 + 낮은 각성 (calm / pleasant)
+    "편안함": (1.5, 2),
+    "차분함": (1.0, 2),
+    "평온": (1.5, 2),
+    "안정감": (1.5, 2),
+    "만족": (1.5, 2),
+    "안도": (1.0, 2),
+
+    # 🟡 쾌 + 높은 각성 (excited / pleasant)
+    "기쁨": (2.0, 4),
+    "행복": (2.0, 3),
+    "즐거움": (2.0, 4),
+    "신남": (2.0, 5),
+    "열정적임": (1.5, 5),
+    "활기참": (1.5, 5),
+    "환희": (2.0, 5),
+
+    # 🔴 불쾌 + 높은 각성 (tense / unpleasant)
+    "긴장": (-1.0, 4),
+    "불안": (-1.5, 4),
+    "초조": (-1.5, 4),
+    "짜증": (-1.5, 4),
+    "스트레스": (-1.5, 4),
+    "공포": (-2.0, 5),
+    "분노": (-2.0, 5),
+
+    # 🔵 불쾌 + 낮은 각성 (sad / unpleasant)
+    "슬픔": (-2.0, 1),
+    "우울": (-2.0, 1),
+    "피곤": (-1.0, 1),
+    "지침": (-1.0, 1),
+    "무기력": (-1.5, 1),
+    "침울함": (-1.5, 1),
+    "외로움": (-1.5, 2),
+}
+
+# 기존 코드/시트 호환: 감정 → 각성도(1~5)
+EMOTION_AROUSAL = {e: a for e, (_, a) in EMOTION_VA.items()}
+
+# 카탈로그 '감정매핑' 태그 → 운동 후 기대되는 감정 상태 좌표
+TAG_VA = {
+    "활력": (1.5, 4.0),
+    "활력 충전": (1.5, 4.0),
+    "설렘": (1.5, 4.0),
+    "기쁨": (2.0, 4.0),
+    "자신감": (1.5, 3.5),
+    "집중": (0.5, 3.0),
+    "만족": (1.5, 2.0),
+    "차분함": (1.0, 2.0),
+    "피로 해소": (1.0, 2.5),
+    "분노 해소": (0.5, 2.5),
+    "외로움 해소": (1.0, 3.0),
+    "분노": (0.5, 2.5),
+    "불안": (0.5, 2.0),
+    "외로움": (1.0, 3.0),
+}
+
+# 태그가 직접 달래주는 감정 (태그가 감정 이름 그대로인 경우 포함)
+RELIEF = {
+    "분노 해소": ("분노", "짜증", "스트레스"),
+    "분노": ("분노", "짜증", "스트레스"),
+    "불안": ("불안", "초조", "긴장", "공포"),
+    "외로움": ("외로움", "슬픔", "침울함"),
+    "외로움 해소": ("외로움", "슬픔", "침울함"),
+    "피로 해소": ("피곤", "지침", "무기력"),
+}
+
+# 운동강도 → 운동이 요구하는 각성 수준
+INTENSITY_AROUSAL = {"저강도": 2.0, "중강도": 3.0, "고강도": 4.5}
+
+# 평균 각성점수 → 목표 운동강도 컷 (낮음 < 2.5 ≤ 중간 < 3.5 ≤ 높음). replay.py --cuts 로 비교
+AROUSAL_CUTS = (2.5, 3.5)
+
+# 좌표 거리 커널 폭 (valence 폭 4, arousal 폭 4 기준)
+SIGMA_VA = 1.25
+SIGMA_INTENSITY = 1.25
+RELIEF_BONUS = 0.5
+
+EMOTIONS = list(EMOTION_VA)
+VA = np.array([EMOTION_VA[e] for e in EMOTIONS], dtype=float)          # (E, 2)
+_EMOTION_POS = {e: i for i, e in enumerate(EMOTIONS)}
+
+
+def target_state(va):
+    """
+    감정 좌표 → 운동으로 가고 싶은 목표 좌표 (E, 2).
+    - 불쾌한 감정은 쾌(+1 이상) 쪽으로
+    - 불쾌 + 고각성(분노/불안)은 각성을 1.5 낮추고(진정), 불쾌 + 저각성(우울/무기력)은 1 높임(활성화)
+    """
+    va = np.atleast_2d(va).astype(float)
+    v, a = va[:, 0], va[:, 1]
+    neg = v < 0
+    shift = np.where(neg & (a >= 4), -1.5, np.where(neg & (a <= 2), 1.0, 0.0))
+    return np.column_stack([np.where(neg, 1.0, v), np.clip(a + shift, 1, 5)])
+
+
+def _split(x):
+    if isinstance(x, (list, tuple, set)):
+        return [str(s).strip() for s in x if str(s).strip()]
+    if x is None or (isinstance(x, float) and np.isnan(x)):
+        return []
+    return [s.strip() for s in str(x).split(",") if s.strip()]
+
+
+# ========================= 감정 선택 → 벡터 =========================
+def selection_matrix(rows) -> np.ndarray:
+    """
+    감정 선택 목록(또는 '기쁨, 신남' 문자열)의 목록 → (N, E) 선택 행렬.
+    각 행은 선택한 감정 수로 나눠 합이 1 (알 수 없는 감정만 있으면 0 행).
+    """
+    rows = list(rows)
+    m = np.zeros((len(rows), len(EMOTIONS)))
+    for i, x in enumerate(rows):
+        for e in _split(x):
+            j = _EMOTION_POS.get(e)
+            if j is not None:
+                m[i, j] = 1.0
+    s = m.sum(axis=1, keepdims=True)
+    return np.divide(m, s, out=np.zeros_like(m), where=s > 0)
+
+
+def selection_matrix_from_series(series: pd.Series) -> np.ndarray:
+    """daily 시트 '감정' 열 전체 → (N, E) 선택 행렬 (행 단위 루프 없이 get_dummies)"""
+    dummies = series.fillna("").astype(str).str.replace(" ", "", regex=False).str.get_dummies(sep=",")
+    m = dummies.reindex(columns=EMOTIONS, fill_value=0).to_numpy(dtype=float)
+    s = m.sum(axis=1, keepdims=True)
+    return np.divide(m, s, out=np.zeros_like(m), where=s > 0)
+
+
+def aggregate_va(selection: np.ndarray) -> np.ndarray:
+    """(N, E) 선택 행렬 → (N, 2) 평균 (valence, arousal). 감정이 없는 행은 NaN."""
+    out = selection @ VA
+    out[selection.sum(axis=1) == 0] = np.nan
+    return out
+
+
+def compute_avg_arousal(emotion_list):
+    """page 2 저장용: 평균 각성도 (기존과 같은 값, 감정이 없으면 "")"""
+    va = aggregate_va(selection_matrix([emotion_list]))[0]
+    if np.isnan(va[1]):
+        return ""
+    return round(float(va[1]), 2)
+
+
+# ========================= 감정 × 운동 친화도 =========================
+class EmotionWorkoutIndex:
+    """카탈로그 한 번에 대해 감정×운동 친화도 행렬(E×W)을 미리 계산해 둠"""
+
+    def __init__(self, names, tag_lists, intensities):
+        self.names = np.asarray(names, dtype=object)
+        tags = sorted({t for ts in tag_lists for t in ts if t in TAG_VA})
+        tag_pos = {t: i for i, t in enumerate(tags)}
+
+        # 운동 × 태그 incidence (W, T)
+        x = np.zeros((len(self.names), len(tags)))
+        for w, ts in enumerate(tag_lists):
+            for t in ts:
+                if t in tag_pos:
+                    x[w, tag_pos[t]] = 1.0
+        x_norm = np.divide(x, x.sum(axis=1, keepdims=True), out=np.zeros_like(x),
+                           where=x.sum(axis=1, keepdims=True) > 0)
+
+        # 감정 × 태그 친화도 (E, T): 목표 좌표와 태그 좌표의 가우시안 커널 + 직접 완화 보너스
+        tag_va = np.array([TAG_VA[t] for t in tags], dtype=float).reshape(-1, 2)
+        target = target_state(VA)                                           # (E, 2)
+        d2 = ((target[:, None, :] - tag_va[None, :, :]) ** 2).sum(axis=2)
+        k = np.exp(-d2 / (2 * SIGMA_VA ** 2))
+        relief = np.array([[e in RELIEF.get(t, ()) for t in tags] for e in EMOTIONS], dtype=float)
+        k += RELIEF_BONUS * relief
+
+        # 운동강도 적합도 (E, W): 목표 각성과 강도별 요구 각성의 거리
+        w_arousal = np.array([INTENSITY_AROUSAL.get(str(i).strip(), 3.0) for i in intensities])
+        intensity_fit = np.exp(-((target[:, 1:2] - w_arousal[None, :]) ** 2) / (2 * SIGMA_INTENSITY ** 2))
+
+        self.tags = tags
+        self.affinity = (k @ x_norm.T) * intensity_fit                      # (E, W)
+
+    @classmethod
+    def from_catalog(cls, df: pd.DataFrame):
+        tag_lists = [_split(x) for x in df["감정매핑"]] if "감정매핑" in df.columns else [[]] * len(df)
+        intensities = df["운동강도"] if "운동강도" in df.columns else [""] * len(df)
+        return cls(df["운동명"].tolist(), tag_lists, list(intensities))
+
+    def scores(self, selection: np.ndarray) -> np.ndarray:
+        """(N, E) 또는 (E,) 선택 → (N, W) 또는 (W,) 운동별 점수 (행렬곱 한 번)"""
+        return selection @ self.affinity
+
+    def candidate_mask(self, emotions, keep=0.8, min_candidates=15, max_candidates=40):
+        """
+        선택한 감정으로 후보 운동 mask (W,) 반환.
+        최고 점수의 keep 배 이상인 운동 (너무 적으면 상위 min_candidates 개, 너무 많으면 상위 max_candidates 개).
+        알 수 있는 감정이 하나도 없으면 None (호출하는 쪽이 기존 강도 필터 사용).
+        """
+        sel = selection_matrix([emotions])[0]
+        if not sel.any():
+            return None
+        s = self.scores(sel)
+        mask = s >= keep * s.max()
+        n = int(mask.sum())
+        if n < min_candidates or n > max_candidates:
+            # 점수 내림차순 상위 N개 (동점은 카탈로그 순서) — 넓게 퍼진 감정도 후보 수가 일정하게
+            top = np.argsort(-s, kind="stable")[:max(min_candidates, min(n, max_candidates))]
+            mask = np.zeros(s.size, dtype=bool)
+            mask[top] = True
+        return mask
+
+
+# ========================= 각성점수 → 운동강도 (감정 목록이 없을 때) =========================
+def _float(x):
+    try:
+        if pd.isna(x):
+            return None
+        return float(str(x).strip())
+    except Exception:
+        return None
+
+
+def infer_target_intensity_from_arousal(arousal_score, cuts=AROUSAL_CUTS):
+    """
+    감정_평균각성점수(숫자)를 기반으로 1차 후보군(운동강도)을 정합니다.
+    - 스케일이 1~5, 0~5 등 다양한 경우를 대비해 '상대적' 기준으로 처리
+    - 값이 비정상이면 None 반환(강도 필터링 X)
+    """
+    a = _float(arousal_score)
+    if a is None:
+        return None
+
+    low, high = cuts
+    if a < low:
+        return "저강도"
+    elif a < high:
+        return "중강도"
+    else:
+        return "고강도"
+
+
+def candidate_positions(df, index: EmotionWorkoutIndex, emotions, arousal_score, cuts=AROUSAL_CUTS):
+    """
+    1차 후보군의 행 위치 (추천 페이지와 replay.py 가 같은 경로를 사용).
+    감정 목록이 있으면 친화도 행렬로, 알 수 있는 감정이 없으면 평균 각성점수 → 운동강도 필터,
+    결과가 비면 전체. (위치 배열, 목표 운동강도) 반환.
+    index 는 같은 df 로 만든 것 (mask 의 위치 = df 의 행 위치).
+    """
+    target_intensity = infer_target_intensity_from_arousal(arousal_score, cuts)
+    mask = index.candidate_mask(emotions)
+    if mask is not None:
+        # 운동명은 카탈로그 안에서 중복될 수 있으므로 이름이 아니라 위치로 (빠진 같은 이름 변형이 되살아나지 않게)
+        if mask.size != len(df):
+            raise ValueError(f"emotion index has {mask.size} workouts, catalog frame has {len(df)} rows")
+        hit = mask
+    elif target_intensity is not None and "운동강도" in df.columns:
+        hit = (df["운동강도"].astype(str).str.strip() == target_intensity).to_numpy()
+    else:
+        hit = np.ones(len(df), dtype=bool)
+    pos = np.flatnonzero(hit)
+    if pos.size == 0:
+        pos = np.arange(len(df))
+    return pos, target_intensity
+
+
+def select_candidates(df, index: EmotionWorkoutIndex, emotions, arousal_score, cuts=AROUSAL_CUTS):
+    """candidate_positions 결과를 DataFrame 으로: (후보 DataFrame 복사본, 목표 운동강도)"""
+    pos, target_intensity = candidate_positions(df, index, emotions, arousal_score, cuts)
+    return df.iloc[pos].copy(), target_intensity
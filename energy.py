@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+예상 칼로리 / 세션 운동량 계산.
+
+카탈로그의 '단위체중당에너지소비량'(kcal/kg/h, MET 와 같은 단위)과
+사용자 몸무게, 오늘 운동 가능 시간으로 사용자×운동 예상 소모 칼로리를 계산합니다.
+
+    kcal[u, w] = 에너지소비량[w] × 몸무게[u] × (운동 가능 시간[u] / 60)
+
+사용자 집단 전체 × 카탈로그 전체를 브로드캐스트 한 번으로 계산하고(U×W),
+users 시트의 자유 입력 키/몸무게("170", "170cm", "1.7m", "65kg", "65 키로", "143lb")는
+정규식 추출 + 단위 변환 + 범위 검증을 Series 단위로 처리합니다 (행 단위 파이썬 루프 없음).
+"""
+import numpy as np
+import pandas as pd
+
+# 허용 범위 (벗어나면 NaN — 오타/단위 착오로 보고 계산에서 제외)
+HEIGHT_RANGE_CM = (100.0, 230.0)
+WEIGHT_RANGE_KG = (25.0, 250.0)
+LB_TO_KG = 0.45359237
+
+_NUMBER = r"(\d+(?:[.,]\d+)?)"
+
+
+def _numeric_part(values):
+    """문자열 Series → (숫자 float Series, 소문자 원문 Series)"""
+    s = pd.Series(values, dtype="object").astype(str).str.strip().str.lower()
+    num = pd.to_numeric(s.str.extract(_NUMBER, expand=False).str.replace(",", ".", regex=False),
+                        errors="coerce")
+    return num.astype(float), s
+
+
+def parse_height_cm(values) -> np.ndarray:
+    """
+    키 입력값 목록 → cm (float 배열, 잘못된 값은 NaN)
+    - "170", "170cm", "170 센티" → 170
+    - "1.7m", "1.72" (3 미만이면 m 로 간주) → 170, 172
+    """
+    num, raw = _numeric_part(values)
+    meters = (num < 3) | (raw.str.contains(r"\d\s*m$", regex=True) & ~raw.str.contains("cm", regex=False))
+    cm = num.where(~meters, num * 100).to_numpy(dtype=float)
+    lo, hi = HEIGHT_RANGE_CM
+    return np.where((cm >= lo) & (cm <= hi), cm, np.nan)
+
+
+def parse_weight_kg(values) -> np.ndarray:
+    """
+    몸무게 입력값 목록 → kg (float 배열, 잘못된 값은 NaN)
+    - "65", "65kg", "65 키로", "65.5" → 65, 65, 65, 65.5
+    - "143lb", "143 파운드" → 64.9
+    """
+    num, raw = _numeric_part(values)
+    pounds = raw.str.contains(r"lb|lbs|파운드", regex=True)
+    kg = num.where(~pounds, num * LB_TO_KG).to_numpy(dtype=float)
+    lo, hi = WEIGHT_RANGE_KG
+    return np.where((kg >= lo) & (kg <= hi), kg, np.nan)
+
+
+def kcal_matrix(weights_kg, minutes, energy) -> np.ndarray:
+    """
+    (U,) 몸무게 × (U,) 운동 시간(분) × (W,) 에너지소비량 → (U, W) 예상 kcal.
+    몸무게/시간이 NaN 인 사용자의 행은 NaN.
+    """
+    w = np.asarray(weights_kg, dtype=np.float32)
+    m = np.asarray(minutes, dtype=np.float32)
+    e = np.asarray(energy, dtype=np.float32)
+    return (w * m / 60.0)[:, None] * e[None, :]
+
+
+def cohort_kcal(users: pd.DataFrame, catalog: pd.DataFrame, minutes) -> pd.DataFrame:
+    """
+    users 시트(이름/몸무게) × 카탈로그 → 사용자×운동 kcal 표.
+    minutes: 사용자별 운동 가능 시간(분) — 스칼라 또는 users 와 같은 길이
+    """
+    weights = parse_weight_kg(users["몸무게"])
+    minutes = np.broadcast_to(np.asarray(pd.to_numeric(minutes, errors="coerce"), dtype=float), weights.shape)
+    mat = kcal_matrix(weights, minutes, catalog["단위체중당에너지소비량"].to_numpy(dtype=float))
+    return pd.DataFrame(mat, index=users["이름"].tolist(), columns=catalog["운동명"].tolist())
+
+
+def session_kcal(weight, minutes, energy) -> np.ndarray:
+    """한 사용자 × 운동 목록 → (W,) 예상 kcal (몸무게 파싱 실패 시 NaN)"""
+    w = parse_weight_kg([weight])
+    m = pd.to_numeric(pd.Series([minutes]), errors="coerce").to_numpy(dtype=float)
+    return kcal_matrix(w, m, energy)[0]
+
+
+def kcal_rank_score(kcal) -> np.ndarray:
+    """
+    kcal 열 → 0~1 순위 점수 (후보 안에서 최대값 기준 비율, NaN 은 0).
+    rule_engine 에서 '체중 감량' 목적일 때 목적 점수 다음 순위 기준으로 더함.
+    """
+    k = np.nan_to_num(np.asarray(kcal, dtype=float), nan=0.0)
+    top = k.max() if k.size else 0.0
+    return k / top if top > 0 else np.zeros_like(k)
+
+
+if __name__ == "__main__":
+    # 루프 방식과의 시간 비교 (검증은 tests/test_energy.py)
+    #   python energy.py
+    import time
+    from catalog import load_catalog
+
+    samples = ["170", "170cm", "1.72m", "1.65", "175 센티", "", "abc", "17", "999"]
+    print(dict(zip(samples, parse_height_cm(samples).round(1).tolist())))
+    samples = ["65", "65kg", "65.5 키로", "143lb", "70,5", "", "6", "1000"]
+    print(dict(zip(samples, parse_weight_kg(samples).round(1).tolist())))
+
+    catalog = load_catalog().to_frame()
+    rng = np.random.default_rng(0)
+    n_users = 2000
+    users = pd.DataFrame({
+        "이름": [f"user{i}" for i in range(n_users)],
+        "몸무게": [f"{w:.1f}kg" for w in rng.uniform(45, 100, n_users)],
+    })
+    minutes = rng.integers(10, 120, n_users)
+
+    t0 = time.perf_counter()
+    table = cohort_kcal(users, catalog, minutes)
+    t1 = time.perf_counter()
+
+    energy = catalog["단위체중당에너지소비량"].tolist()
+    loop = [[e * float(w.replace("kg", "")) * m / 60 for e in energy]
+            for w, m in zip(users["몸무게"], minutes)]
+    t2 = time.perf_counter()
+    print(f"{n_users}명 × {len(catalog)}개 운동: 벡터 {(t1 - t0) * 1000:.1f}ms / 파이썬 루프 {(t2 - t1) * 1000:.1f}ms")
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+evaluation 시트 증분 집계 엔진 (논문용 분석).
+
+evaluation 시트 한 행 (열 위치는 스키마 레지스트리의 헤더 매핑으로):
+  날짜, 이름, 추천운동1~3, 운동1~3_평가, Q_fit, Q_explain_understand,
+  Q_explain_convince, Q_satis, Q_reuse, 개선점, 좋았던점
+
+시트 전체를 다시 읽지 않도록 "충분 통계량"만 유지합니다.
+- 운동별: 개수 / 합 / 제곱합 → 평균, 분산
+- 문항별: 1~5점 히스토그램
+- 설문 5문항: 개수 / 합 벡터 / 교차곱 행렬(5×5) → 공분산 → Cronbach's alpha
+- 운동강도별: 개수 / 합 / 제곱합 + 1~5점 히스토그램
+새 행은 배치 단위로 NumPy/pandas 벡터 연산으로 더해지고, 결과 조회는 O(운동 수)입니다.
+"""
+import os
+import json
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+
+from sheet_schema import SCHEMAS, RECOMMEND_COLUMNS, SheetLayout
+
+ANALYTICS_DIR = os.getenv("MOODFIT_ANALYTICS_DIR", os.path.join(".moodfit", "analytics"))
+
+RATING_COLUMNS = ("운동1_평가", "운동2_평가", "운동3_평가")
+QUESTIONS = [
+    "Q_fit(개인화적합)",
+    "Q_explain_understand(이해)",
+    "Q_explain_convince(설득)",
+    "Q_satis(만족)",
+    "Q_reuse(재사용의향)",
+]
+SCALE = 5
+INTENSITIES = ["저강도", "중강도", "고강도", "기타"]
+
+
+class EvalColumns:
+    """evaluation 헤더 매핑 → 집계에 쓰는 열 위치 (0-based) + 읽을 범위 폭"""
+
+    def __init__(self, layout: SheetLayout = None):
+        layout = layout or SheetLayout("evaluation", SCHEMAS["evaluation"])
+        self.workouts = [layout.index(c) for c in RECOMMEND_COLUMNS]
+        self.ratings = [layout.index(c) for c in RATING_COLUMNS]
+        self.questions = [layout.index(c) for c in QUESTIONS]
+        self.width = max(self.workouts + self.ratings + self.questions) + 1
+
+    def range(self, start_row):
+        """A{start_row}:{마지막 열} (집계에 쓰는 열까지만)"""
+        letters, col = "", self.width
+        while col:
+            col, rem = divmod(col - 1, 26)
+            letters = chr(65 + rem) + letters
+        return f"A{start_row}:{letters}"
+
+    def matrix(self, rows):
+        """시트 행 목록 → (n, width) 문자열 배열 (짧은 행은 빈 문자열로 채움)"""
+        w = self.width
+        rows = [list(r[:w]) + [""] * (w - len(r[:w])) for r in rows]
+        return np.array(rows, dtype=object).reshape(-1, w)
+
+
+def _numeric(block):
+    """문자열 블록 → float 배열 (숫자가 아니면 NaN)"""
+    return pd.DataFrame(block).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+
+class EvalAnalytics:
+    def __init__(self, intensity_map=None, path=None, layout=None, catalog_version=None):
+        self.intensity_map = dict(intensity_map or {})
+        self.catalog_version = catalog_version     # 마지막으로 맞춰 본(재계산을 시도한) 카탈로그 버전
+        self.columns = EvalColumns(layout)
+        self.path = path or os.path.join(ANALYTICS_DIR, "evaluation_state.json")
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.refreshed_at = 0.0
+        self._reset()
+
+    # ---------- 상태 ----------
+    def reset(self):
+        """집계를 비움 (진행 중인 refresh 가 끝난 뒤에, 조회와도 겹치지 않게)"""
+        with self._refresh_lock, self._lock:
+            self._reset()
+
+    def _reset(self):
+        self.cursor = 0                         # 지금까지 반영한 데이터 행 수 (헤더 제외)
+        self.workout_index = {}                 # 운동명 → 배열 위치
+        self.w_count = np.zeros(0)
+        self.w_sum = np.zeros(0)
+        self.w_sumsq = np.zeros(0)
+
+        k = len(QUESTIONS)
+        self.q_hist = np.zeros((k, SCALE), dtype=np.int64)
+        self.q_n = 0
+        self.q_sum = np.zeros(k)
+        self.q_cross = np.zeros((k, k))
+
+        m = len(INTENSITIES)
+        self.i_count = np.zeros(m)
+        self.i_sum = np.zeros(m)
+        self.i_sumsq = np.zeros(m)
+        self.i_hist = np.zeros((m, SCALE), dtype=np.int64)
+
+    def _grow(self, names):
+        new = [n for n in names if n not in self.workout_index]
+        for n in new:
+            self.workout_index[n] = len(self.workout_index)
+        if new:
+            pad = np.zeros(len(new))
+            self.w_count = np.concatenate([self.w_count, pad])
+            self.w_sum = np.concatenate([self.w_sum, pad])
+            self.w_sumsq = np.concatenate([self.w_sumsq, pad])
+
+    def _intensity_pos(self, name):
+        label = self.intensity_map.get(name, "기타")
+        return INTENSITIES.index(label) if label in INTENSITIES else len(INTENSITIES) - 1
+
+    # ---------- 증분 반영 ----------
+    def ingest(self, rows):
+        """새 evaluation 행 배치를 반영 (rows: 시트 값 리스트의 리스트)"""
+        if not rows:
+            return 0
+        with self._lock:
+            return self._ingest(rows)
+
+    def _ingest(self, rows):
+        """ingest 본체 (_lock 을 잡은 상태에서 호출)"""
+        cols = self.columns
+        mat = cols.matrix(rows)
+        # 운동별 평점: (n, 3) → long form
+        names = np.char.strip(mat[:, cols.workouts].astype(str)).ravel()
+        ratings = _numeric(mat[:, cols.ratings]).ravel()
+        ok = (names != "") & ~np.isnan(ratings)
+        names, ratings = names[ok], ratings[ok]
+
+        if names.size:
+            # 고유 운동명 단위로만 dict 조회하고, 행 단위 인덱스는 역매핑으로 펼침
+            uniq, inv = np.unique(names, return_inverse=True)
+            self._grow(uniq)
+            idx = np.array([self.workout_index[n] for n in uniq], dtype=np.int64)[inv]
+            n_w = len(self.workout_index)
+            self.w_count += np.bincount(idx, minlength=n_w)
+            self.w_sum += np.bincount(idx, weights=ratings, minlength=n_w)
+            self.w_sumsq += np.bincount(idx, weights=ratings ** 2, minlength=n_w)
+
+            # 운동강도별 (카탈로그에 없는 운동은 "기타")
+            i_idx = np.array([self._intensity_pos(n) for n in uniq], dtype=np.int64)[inv]
+            m = len(INTENSITIES)
+            self.i_count += np.bincount(i_idx, minlength=m)
+            self.i_sum += np.bincount(i_idx, weights=ratings, minlength=m)
+            self.i_sumsq += np.bincount(i_idx, weights=ratings ** 2, minlength=m)
+            r_bin = np.clip(np.rint(ratings).astype(np.int64), 1, SCALE) - 1
+            self.i_hist += np.bincount(i_idx * SCALE + r_bin, minlength=m * SCALE).reshape(m, SCALE)
+
+        # 설문 문항: 5문항 모두 응답한 행만 (alpha 계산과 같은 표본)
+        q = _numeric(mat[:, cols.questions])
+        q = q[~np.isnan(q).any(axis=1)]
+        if q.size:
+            k = len(QUESTIONS)
+            q_bin = np.clip(np.rint(q).astype(np.int64), 1, SCALE) - 1
+            flat = q_bin + SCALE * np.arange(k)
+            self.q_hist += np.bincount(flat.ravel(), minlength=k * SCALE).reshape(k, SCALE)
+            self.q_n += q.shape[0]
+            self.q_sum += q.sum(axis=0)
+            self.q_cross += q.T @ q
+        return len(rows)
+
+    def catalog_outdated(self, version, intensity_map) -> bool:
+        """
+        카탈로그 버전이 바뀌었고 운동강도 매핑도 달라져 재계산이 필요한지.
+        강도가 그대로인 변경은 버전만 기록하고 False (재계산할 필요 없음).
+        """
+        with self._lock:
+            if version == self.catalog_version:
+                return False
+            if dict(intensity_map) == self.intensity_map:
+                self.catalog_version = version
+                return False
+            return True
+
+    def rebuild(self, ws, intensity_map=None, layout=None, catalog_version=None):
+        """
+        전체 재계산: 시트를 처음부터 다시 읽고, 비우기 + 반영을 한 번에 바꿈.
+        읽기가 실패하면 기존 집계를 그대로 둠 (예외는 그대로 올라감).
+        intensity_map / catalog_version: 카탈로그가 바뀌었을 때 새 운동강도 매핑과 그 버전.
+          버전은 읽기 전에 기록 → 실패해도 같은 버전으로 매 rerun 마다 다시 시도하지 않음
+        layout: 헤더가 바뀌었을 때 새 evaluation 매핑
+        """
+        with self._refresh_lock:
+            if catalog_version is not None:
+                with self._lock:
+                    self.catalog_version = catalog_version
+            columns = EvalColumns(layout) if layout is not None else self.columns
+            raw = ws.get(columns.range(2))
+            with self._lock:
+                if intensity_map is not None:
+                    self.intensity_map = dict(intensity_map)
+                self.columns = columns
+                self._reset()
+                rows = [r for r in raw if any(str(c).strip() for c in r)]
+                added = self._ingest(rows) if rows else 0
+                self.cursor = len(raw)
+            self.refreshed_at = time.time()
+            self.save()
+            return added
+
+    def refresh(self, ws):
+        """
+        시트에서 cursor 이후의 새 행만 범위 조회해서 반영.
+        (get_all_values 대신 A{n}:{마지막 열} 범위 한 번)
+        """
+        with self._refresh_lock:
+            start = self.cursor + 2  # 헤더 1행 + 1-based
+            raw = ws.get(self.columns.range(start))
+            added = self.ingest([r for r in raw if any(str(c).strip() for c in r)])
+            self.cursor += len(raw)
+            self.refreshed_at = time.time()
+            if raw:
+                self.save()
+            return added
+
+    # ---------- 결과 ----------
+    def workout_summary(self) -> pd.DataFrame:
+        with self._lock:
+            names = list(self.workout_index)
+            n, s, ss = self.w_count.copy(), self.w_sum.copy(), self.w_sumsq.copy()
+        mean = np.divide(s, n, out=np.full_like(s, np.nan), where=n > 0)
+        var = np.divide(ss - s * mean, n - 1, out=np.full_like(s, np.nan), where=n > 1)
+        df = pd.DataFrame({
+            "운동명": names,
+            "운동강도": [self.intensity_map.get(x, "기타") for x in names],
+            "평가수": n.astype(int),
+            "평균": mean.round(3),
+            "분산": var.round(3),
+        })
+        return df.sort_values(["평가수", "평균"], ascending=False, ignore_index=True)
+
+    def question_distribution(self) -> pd.DataFrame:
+        with self._lock:
+            hist = self.q_hist.copy()
+            n, s = self.q_n, self.q_sum.copy()
+        df = pd.DataFrame(hist, columns=[f"{i}점" for i in range(1, SCALE + 1)])
+        df.insert(0, "문항", QUESTIONS)
+        df["응답수"] = n
+        df["평균"] = np.round(s / n, 3) if n else np.nan
+        return df
+
+    def cronbach_alpha(self):
+        """설문 5문항의 Cronbach's alpha (응답 2건 미만이거나 분산 0이면 None)"""
+        with self._lock:
+            n, s, cross = self.q_n, self.q_sum.copy(), self.q_cross.copy()
+        k = len(QUESTIONS)
+        if n < 2:
+            return None
+        cov = (cross - np.outer(s, s) / n) / (n - 1)
+        total_var = cov.sum()
+        if total_var <= 0:
+            return None
+        return float(k / (k - 1) * (1 - np.trace(cov) / total_var))
+
+    def intensity_breakdown(self) -> pd.DataFrame:
+        with self._lock:
+            n, s, ss, hist = self.i_count.copy(), self.i_sum.copy(), self.i_sumsq.copy(), self.i_hist.copy()
+        mean = np.divide(s, n, out=np.full_like(s, np.nan), where=n > 0)
+        var = np.divide(ss - s * mean, n - 1, out=np.full_like(s, np.nan), where=n > 1)
+        df = pd.DataFrame(hist, columns=[f"{i}점" for i in range(1, SCALE + 1)])
+        df.insert(0, "운동강도", INTENSITIES)
+        df["평가수"] = n.astype(int)
+        df["평균"] = mean.round(3)
+        df["분산"] = var.round(3)
+        return df[df["평가수"] > 0].reset_index(drop=True)
+
+    # ---------- 저장/복원 ----------
+    def save(self):
+        with self._lock:
+            state = {
+                "cursor": self.cursor,
+                "intensity_map": self.intensity_map,   # 강도별 집계가 어떤 매핑으로 만들어졌는지
+                "catalog_version": self.catalog_version,
+                "workouts": list(self.workout_index),
+                "w_count": self.w_count.tolist(),
+                "w_sum": self.w_sum.tolist(),
+                "w_sumsq": self.w_sumsq.tolist(),
+                "q_hist": self.q_hist.tolist(),
+                "q_n": self.q_n,
+                "q_sum": self.q_sum.tolist(),
+                "q_cross": self.q_cross.tolist(),
+                "i_count": self.i_count.tolist(),
+                "i_sum": self.i_sum.tolist(),
+                "i_sumsq": self.i_sumsq.tolist(),
+                "i_hist": self.i_hist.tolist(),
+            }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        with self._lock:
+            self.cursor = state["cursor"]
+            if "intensity_map" in state:
+                self.intensity_map = dict(state["intensity_map"])
+            self.catalog_version = state.get("catalog_version")
+            self.workout_index = {n: i for i, n in enumerate(state["workouts"])}
+            self.w_count = np.array(state["w_count"], dtype=float)
+            self.w_sum = np.array(state["w_sum"], dtype=float)
+            self.w_sumsq = np.array(state["w_sumsq"], dtype=float)
+            self.q_hist = np.array(state["q_hist"], dtype=np.int64)
+            self.q_n = state["q_n"]
+            self.q_sum = np.array(state["q_sum"], dtype=float)
+            self.q_cross = np.array(state["q_cross"], dtype=float)
+            self.i_count = np.array(state["i_count"], dtype=float)
+            self.i_sum = np.array(state["i_sum"], dtype=float)
+            self.i_sumsq = np.array(state["i_sumsq"], dtype=float)
+            self.i_hist = np.array(state["i_hist"], dtype=np.int64)
+        return True
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+사용자별 최근 이력 피처 저장소.
+
+daily 시트를 다시 내려받지 않고도 추천 엔진/프롬프트 빌더가
+최근 컨디션 흐름을 볼 수 있도록, 저장할 때마다 요약값을 O(1)로 갱신합니다.
+
+- 수면 시간 7일 평균          : 최근 7일 창의 합/개수
+- 감정_평균각성점수 변동성    : 같은 창의 합/제곱합 → 표준편차
+- 스트레스 추세               : 빠른/느린 EWMA 차이 (양수면 최근 스트레스 상승)
+- 최근 추천 운동              : 최근 N개 (반복 추천 피하기용)
+- 같은 날짜를 다시 저장하면 그 날의 기록을 바꿔 씀 (창/추세에 두 번 들어가지 않게)
+- 시트 이력은 사용자마다 한 번 합침 (backfilled 표시), 그 전에 page 2 가 만든 기록도 유지
+
+사용자마다 작은 JSON 파일 하나(.moodfit/features/)에 저장합니다.
+"""
+import os
+import json
+import math
+import hashlib
+import threading
+from collections import deque
+from datetime import date, datetime, timedelta
+
+import streamlit as st
+
+FEATURE_DIR = os.getenv("MOODFIT_FEATURE_DIR", os.path.join(".moodfit", "features"))
+
+WINDOW_DAYS = 7
+RECENT_WORKOUTS = 9           # 최근 3일치 Top3
+STRESS_SCORE = {"낮음": 1.0, "보통": 2.0, "높음": 3.0}
+EWMA_FAST = 0.5
+EWMA_SLOW = 0.2
+
+
+def _to_float(x):
+    """숫자 → float, 빈 칸 / 숫자 아님 / NaN·inf(타입 있는 daily 프레임의 빈 칸) → None"""
+    try:
+        s = str(x).strip()
+        v = float(s) if s else None
+    except (TypeError, ValueError):
+        return None
+    return v if v is not None and math.isfinite(v) else None
+
+
+def _to_date(x):
+    if isinstance(x, date):
+        if x != x:
+            return None  # pandas NaT 도 date 로 취급되지만 자기 자신과 같지 않음
+        return x.date() if isinstance(x, datetime) else x
+    try:
+        return date.fromisoformat(str(x).strip()[:10])
+    except ValueError:
+        return None
+
+
+class UserFeatures:
+    """한 사용자의 창(window) 상태. 모든 갱신은 상수 시간(창 길이는 최대 7일)."""
+
+    def __init__(self):
+        self.window = deque()       # (날짜, 수면, 각성, 스트레스) — 날짜 오름차순, 날짜당 하나
+        self.sleep_sum = 0.0
+        self.sleep_n = 0
+        self.arousal_sum = 0.0
+        self.arousal_sumsq = 0.0
+        self.arousal_n = 0
+        self.stress_fast = None
+        self.stress_slow = None
+        self.stress_date = None     # 마지막으로 추세에 반영한 날짜와 그 직전 (fast, slow) — 같은 날 재저장 시 되돌림
+        self.stress_prev = (None, None)
+        self.recent = deque(maxlen=RECENT_WORKOUTS)
+        self.last_date = None
+        self.backfilled = False     # daily 시트 이력을 합쳤는지
+
+    # ---------- 창 관리 ----------
+    def _count(self, sleep, arousal, sign):
+        if sleep is not None:
+            self.sleep_sum += sign * sleep
+            self.sleep_n += sign
+        if arousal is not None:
+            self.arousal_sum += sign * arousal
+            self.arousal_sumsq += sign * arousal * arousal
+            self.arousal_n += sign
+
+    def _add(self, d, sleep, arousal, stress=None):
+        """창에 넣음 (같은 날짜가 있으면 바꿔 씀). 바뀐 기존 항목 또는 None 반환."""
+        # 보통은 날짜순으로 들어오므로 끝에서부터 자리를 찾음 (창 길이는 최대 7)
+        pos = len(self.window)
+        while pos > 0 and self.window[pos - 1][0] > d:
+            pos -= 1
+        old = None
+        if pos > 0 and self.window[pos - 1][0] == d:
+            pos -= 1
+            old = self.window[pos]
+            del self.window[pos]
+            self._count(old[1], old[2], -1)
+        self.window.insert(pos, (d, sleep, arousal, stress))
+        self._count(sleep, arousal, +1)
+        return old
+
+    def _evict(self, newest):
+        cutoff = newest - timedelta(days=WINDOW_DAYS - 1)
+        while self.window and self.window[0][0] < cutoff:
+            _, sleep, arousal, _ = self.window.popleft()
+            self._count(sleep, arousal, -1)
+
+    def update(self, d, sleep, stress, arousal):
+        if self.last_date is not None and d < self.last_date - timedelta(days=WINDOW_DAYS - 1):
+            return  # 창 밖의 오래된 기록은 무시
+        old = self._add(d, sleep, arousal, stress)
+        self.last_date = max(d, self.last_date) if self.last_date else d
+        self._evict(self.last_date)
+
+        if d == self.stress_date:
+            # 마지막 날을 다시 저장: 그 날의 반영을 되돌리고 새 값으로 다시
+            self.stress_fast, self.stress_slow = self.stress_prev
+            self.stress_date = None
+        elif old is not None:
+            return  # 지난 날짜 수정: 추세는 순서에 따라 누적되므로 이미 반영된 값을 유지
+
+        if stress is not None:
+            if self.stress_date is None or d >= self.stress_date:
+                self.stress_prev = (self.stress_fast, self.stress_slow)
+                self.stress_date = d
+            if self.stress_fast is None:
+                self.stress_fast = self.stress_slow = stress
+            else:
+                self.stress_fast += EWMA_FAST * (stress - self.stress_fast)
+                self.stress_slow += EWMA_SLOW * (stress - self.stress_slow)
+
+    def add_recommendations(self, names):
+        for n in names:
+            if n:
+                self.recent.append(n)
+
+    # ---------- 조회 ----------
+    def summary(self):
+        arousal_std = None
+        if self.arousal_n >= 2:
+            mean = self.arousal_sum / self.arousal_n
+            var = max(0.0, (self.arousal_sumsq - self.arousal_n * mean * mean) / (self.arousal_n - 1))
+            arousal_std = round(var ** 0.5, 2)
+        return {
+            "기록일수_7일": len(self.window),
+            "수면_7일평균": round(self.sleep_sum / self.sleep_n, 1) if self.sleep_n else None,
+            "각성_7일평균": round(self.arousal_sum / self.arousal_n, 2) if self.arousal_n else None,
+            "각성_7일표준편차": arousal_std,
+            "스트레스_추세": (
+                round(self.stress_fast - self.stress_slow, 2) if self.stress_fast is not None else None
+            ),
+            "최근추천": list(self.recent),
+        }
+
+    # ---------- 직렬화 ----------
+    def to_json(self):
+        return {
+            "window": [[d.isoformat(), s, a, t] for d, s, a, t in self.window],
+            "stress_fast": self.stress_fast,
+            "stress_slow": self.stress_slow,
+            "stress_date": self.stress_date.isoformat() if self.stress_date else None,
+            "stress_prev": list(self.stress_prev),
+            "recent": list(self.recent),
+            "last_date": self.last_date.isoformat() if self.last_date else None,
+            "backfilled": self.backfilled,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        uf = cls()
+        for d, s, a, *t in data.get("window", []):
+            # 이전 버전이 NaN 을 저장했을 수 있으므로 읽을 때도 걸러냄 (합계가 영구히 nan 이 되지 않게)
+            # 이전 버전은 스트레스 없이 [날짜, 수면, 각성]
+            uf._add(date.fromisoformat(d), _to_float(s), _to_float(a), _to_float(t[0]) if t else None)
+        uf.stress_fast = data.get("stress_fast")
+        uf.stress_slow = data.get("stress_slow")
+        uf.stress_date = _to_date(data["stress_date"]) if data.get("stress_date") else None
+        uf.stress_prev = tuple(data.get("stress_prev") or (None, None))
+        uf.recent.extend(data.get("recent", []))
+        uf.last_date = _to_date(data["last_date"]) if data.get("last_date") else None
+        uf.backfilled = bool(data.get("backfilled", False))
+        return uf
+
+
+class FeatureStore:
+    def __init__(self, directory=FEATURE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def _path(self, user):
+        key = hashlib.sha1(user.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load(self, user):
+        """메모리에 없으면 파일에서 (없으면 None)"""
+        uf = self._users.get(user)
+        if uf is None:
+            path = self._path(user)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    uf = UserFeatures.from_json(json.load(f))
+                self._users[user] = uf
+        return uf
+
+    def _save(self, user, uf):
+        path = self._path(user)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"user": user, **uf.to_json()}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    # ---------- 갱신 ----------
+    def record_daily(self, user, day, sleep_hours, stress_level, arousal):
+        """daily 저장 시 호출 (page 2)"""
+        user = str(user).strip()
+        d = _to_date(day)
+        if not user or d is None:
+            return
+        with self._lock:
+            uf = self._load(user) or UserFeatures()
+            uf.update(d, _to_float(sleep_hours), STRESS_SCORE.get(str(stress_level).strip()), _to_float(arousal))
+            self._users[user] = uf
+            self._save(user, uf)
+
+    def record_recommendations(self, user, names):
+        """Top3가 확정됐을 때 호출 (page 3)"""
+        user = str(user).strip()
+        with self._lock:
+            uf = self._load(user) or UserFeatures()
+            uf.add_recommendations(names)
+            self._users[user] = uf
+            self._save(user, uf)
+
+    def backfill(self, user, rows):
+        """
+        시트 이력을 아직 합치지 않은 사용자를 이미 읽어 둔 daily 행(dict 목록)으로 채움.
+        (추천 페이지가 어차피 읽는 daily 데이터를 재사용 — 추가 시트 조회 없음)
+        page 2 가 먼저 만든 기록은 시트 행 뒤에 다시 반영하므로, 같은 날짜는 저장소 쪽 값이 남음.
+        """
+        user = str(user).strip()
+        with self._lock:
+            existing = self._load(user)
+            if existing is not None and existing.backfilled:
+                return False
+            uf = UserFeatures()
+            dated = [(d, r) for r in rows if (d := _to_date(r.get("날짜", ""))) is not None]
+            dated.sort(key=lambda x: x[0])
+            for d, r in dated:
+                uf.update(
+                    d,
+                    _to_float(r.get("수면 시간")),
+                    STRESS_SCORE.get(str(r.get("스트레스", "")).strip()),
+                    _to_float(r.get("감정_평균각성점수")),
+                )
+                uf.add_recommendations([r.get(f"추천운동{i}", "") for i in (1, 2, 3)])
+            if existing is not None:
+                for d, sleep, arousal, stress in existing.window:
+                    uf.update(d, sleep, stress, arousal)
+                # 저장소의 추천은 시트에도 쓰이므로 시트에 아직 없는 것만 뒤에
+                uf.add_recommendations([n for n in existing.recent if n not in uf.recent])
+            uf.backfilled = True
+            self._users[user] = uf
+            self._save(user, uf)
+            return True
+
+    # ---------- 조회 ----------
+    def get(self, user):
+        """사용자 요약 피처 (기록이 없으면 빈 dict)"""
+        with self._lock:
+            uf = self._load(str(user).strip())
+            return uf.summary() if uf is not None else {}
+
+
+@st.cache_resource
+def get_feature_store():
+    return FeatureStore()
+
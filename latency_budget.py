@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+추천 흐름용 요청 단위 지연 예산(deadline).
+
+- 요청 전체에 SLO(초)를 두고, 단계(weather / llm / spotify / sheets)마다 예산을 나눠 줍니다.
+- 단계 예산은 "단계 예산"과 "요청 전체 남은 시간" 중 작은 값입니다.
+- 예산을 넘겨 대체 경로로 빠질 때는 degrade()로 남겨서 로그와 화면에 함께 보여줍니다.
+
+설정: 환경변수/시크릿 MOODFIT_SLO_SEC, MOODFIT_BUDGET_<STAGE>_SEC (예: MOODFIT_BUDGET_LLM_SEC)
+"""
+import time
+import logging
+
+logger = logging.getLogger("moodfit.latency")
+
+DEFAULT_SLO_SEC = 12.0
+DEFAULT_BUDGETS = {
+    "weather": 2.0,
+    "llm": 8.0,
+    "spotify": 3.0,
+    "sheets": 3.0,
+}
+
+
+class StageBudget:
+    """단계 하나의 남은 시간. timeout 인자로 그대로 넘길 수 있게 초 단위 float."""
+
+    def __init__(self, name, seconds, clock=time.monotonic):
+        self.name = name
+        self.seconds = max(0.0, seconds)
+        self._clock = clock
+        self._ends = clock() + self.seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self._ends - self._clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, floor=0.1) -> float:
+        """HTTP 클라이언트용 timeout (0 을 넘기면 무제한이 되는 라이브러리가 있어 최소값 보장)"""
+        return max(floor, self.remaining())
+
+
+class Deadline:
+    def __init__(self, slo=DEFAULT_SLO_SEC, budgets=None, clock=time.monotonic):
+        self.slo = slo
+        self.budgets = dict(DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.degradations = []
+
+        self._clock = clock
+        self._start = clock()
+
+    @classmethod
+    def from_config(cls, get_value):
+        """get_value(key, default) 형태의 설정 조회 함수(예: get_secret)로 생성"""
+        def _num(key, default):
+            try:
+                return float(get_value(key, default))
+            except (TypeError, ValueError):
+                return default
+
+        slo = _num("MOODFIT_SLO_SEC", DEFAULT_SLO_SEC)
+        budgets = {
+            stage: _num(f"MOODFIT_BUDGET_{stage.upper()}_SEC", sec)
+            for stage, sec in DEFAULT_BUDGETS.items()
+        }
+        return cls(slo=slo, budgets=budgets)
+
+    def elapsed(self) -> float:
+        return self._clock() - self._start
+
+    def remaining(self) -> float:
+        return max(0.0, self.slo - self.elapsed())
+
+    def stage(self, name) -> StageBudget:
+        seconds = min(self.budgets.get(name, self.remaining()), self.remaining())
+        return StageBudget(name, seconds, clock=self._clock)
+
+    def degrade(self, stage, reason):
+        """대체 경로로 빠진 기록 (로그 + 화면 표시용 목록)"""
+        msg = f"[{stage}] {reason} (경과 {self.elapsed():.1f}s / SLO {self.slo:.0f}s)"
+        self.degradations.append(msg)
+        logger.warning("degraded: %s", msg)
+        return msg
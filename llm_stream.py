@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+스트리밍 LLM 응답용 증분 JSON 파서.
+
+{"top3": [{"rank": 1, "운동명": "...", "이유": "..."}, ...]} 형태의 응답을
+토큰이 들어오는 대로 읽어서,
+- "운동명" 값이 끝나는 순간 → ("name", index, 운동명)
+- top3 항목 하나가 닫히는 순간 → ("entry", index, 항목 dict)
+이벤트를 바로 돌려줍니다. 전체 응답을 기다릴 필요가 없습니다.
+"""
+import json
+from collections import namedtuple
+
+StreamEvent = namedtuple("StreamEvent", ["kind", "index", "value"])
+
+
+class Top3StreamParser:
+    """
+    문자 단위 상태 기계.
+    - 버퍼는 누적하되, 이미 본 문자는 다시 스캔하지 않음 (청크 합계 기준 O(n))
+    - 문자열/이스케이프를 추적하므로 이유 문장 안의 {, ], " 등에 흔들리지 않음
+    """
+
+    def __init__(self, list_key="top3", name_key="운동명"):
+        self.list_key = list_key
+        self.name_key = name_key
+
+        self.buf = ""
+        self._pos = 0
+        self._stack = []        # "{" / "["
+        self._keys = []         # 각 컨테이너에서 마지막으로 본 키
+        self._expect_key = []   # 객체 안에서 다음 문자열이 키인지
+        self._in_str = False
+        self._esc = False
+        self._str_start = 0
+        self._obj_start = 0
+
+        self.entries = []
+        self.names = {}         # 항목 index → 운동명 (항목이 아직 안 닫혔어도 기록)
+
+    def _in_list(self):
+        """지금 스택이 root{ → top3[ → 항목{ 안쪽인지"""
+        return (
+            len(self._stack) >= 2
+            and self._stack[0] == "{" and self._keys[0] == self.list_key
+            and self._stack[1] == "["
+        )
+
+    def feed(self, chunk: str):
+        """청크를 넣고, 이번 청크로 새로 확정된 이벤트 목록을 반환"""
+        if not chunk:
+            return []
+        self.buf += chunk
+        events = []
+
+        buf = self.buf
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    self._on_string(json.loads(buf[self._str_start:i + 1]), events)
+                continue
+
+            if c == '"':
+                self._in_str = True
+                self._str_start = i
+            elif c in "{[":
+                self._stack.append(c)
+                self._keys.append(None)
+                self._expect_key.append(c == "{")
+                if c == "{" and len(self._stack) == 3 and self._in_list():
+                    self._obj_start = i
+            elif c in "}]":
+                if not self._stack:
+                    continue
+                if c == "}" and len(self._stack) == 3 and self._in_list():
+                    entry = json.loads(buf[self._obj_start:i + 1])
+                    events.append(StreamEvent("entry", len(self.entries), entry))
+                    self.entries.append(entry)
+                self._stack.pop()
+                self._keys.pop()
+                self._expect_key.pop()
+            elif c == ":" and self._expect_key:
+                self._expect_key[-1] = False
+            elif c == "," and self._stack and self._stack[-1] == "{":
+                self._expect_key[-1] = True
+
+        self._pos = len(buf)
+        return events
+
+    def _on_string(self, s, events):
+        if not self._stack or self._stack[-1] != "{":
+            return
+        if self._expect_key[-1]:
+            self._keys[-1] = s
+        elif len(self._stack) == 3 and self._in_list() and self._keys[-1] == self.name_key:
+            self.names[len(self.entries)] = s
+            events.append(StreamEvent("name", len(self.entries), s))
+
+    @property
+    def done(self):
+        """루트 객체가 닫혔는지"""
+        return self._pos > 0 and not self._stack and "{" in self.buf
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+회원 이름 인덱스 (모든 페이지 공용).
+
+- 정렬된 이름 배열 + bisect 로 접두어 검색 O(log n + k), 부분 문자열 검색은 그 다음 순위로
+- 결과는 페이지 단위로 잘라서 selectbox 에는 한 페이지(기본 50명)만 넣음
+- 중복 이름 확인은 set 조회 O(1)
+- "_2", "_3" 추천 이름은 기본 이름별 최대 접미 번호 카운터로 O(1)
+  (기존처럼 빈 번호를 하나씩 세어 올라가지 않음 — 항상 최대 번호 + 1)
+
+시트에서 읽은 이름 목록이 바뀌었을 때만 다시 정렬합니다.
+"""
+import re
+import bisect
+import threading
+
+import streamlit as st
+
+PAGE_SIZE = 50
+_SUFFIX = re.compile(r"^(.*)_(\d+)$")
+
+
+class NameIndex:
+    def __init__(self, names=()):
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._reset(names)
+
+    def _reset(self, names):
+        self.names = sorted({str(n).strip() for n in names if str(n).strip()})
+        self._set = set(self.names)
+        self._max_suffix = {}
+        for n in self.names:
+            self._count(n)
+
+    def _count(self, name):
+        """기본 이름별 사용 중인 최대 접미 번호 (이름 자체만 있으면 1)"""
+        m = _SUFFIX.match(name)
+        base, k = (m.group(1), int(m.group(2))) if m else (name, 1)
+        if k > self._max_suffix.get(base, 0):
+            self._max_suffix[base] = k
+
+    # ---------- 갱신 ----------
+    def sync(self, names):
+        """시트 이름 목록과 맞춤 (내용이 같으면 아무것도 안 함)"""
+        names = list(names)
+        fp = (len(names), hash(tuple(names)))
+        with self._lock:
+            if fp != self._fingerprint:
+                self._reset(names)
+                self._fingerprint = fp
+        return self
+
+    def add(self, name):
+        """방금 등록한 이름 반영 (다음 sync 전까지)"""
+        name = str(name).strip()
+        with self._lock:
+            if name and name not in self._set:
+                bisect.insort(self.names, name)
+                self._set.add(name)
+                self._count(name)
+
+    # ---------- 조회 ----------
+    def __contains__(self, name):
+        return str(name).strip() in self._set
+
+    def __len__(self):
+        return len(self.names)
+
+    def suggest(self, name):
+        """중복이면 쓸 수 있는 이름 하나 (예: 홍길동 → 홍길동_3), 중복이 아니면 그대로"""
+        name = str(name).strip()
+        if name not in self._set:
+            return name
+        return f"{name}_{self._max_suffix.get(name, 1) + 1}"
+
+    def search(self, query="", page=0, page_size=PAGE_SIZE):
+        """
+        (이번 페이지 이름 목록, 전체 결과 수).
+        접두어 일치가 먼저(가나다순), 그 다음 부분 문자열 일치.
+        """
+        q = str(query).strip()
+        names = self.names
+        if not q:
+            hits = names
+        else:
+            lo = bisect.bisect_left(names, q)
+            hi = bisect.bisect_left(names, q + "\U0010ffff")
+            prefix = names[lo:hi]
+            contains = [n for n in names[:lo] if q in n] + [n for n in names[hi:] if q in n]
+            hits = prefix + contains
+        start = page * page_size
+        return hits[start:start + page_size], len(hits)
+
+
+@st.cache_resource
+def get_name_index(source="users"):
+    """이름 인덱스 (source 별로 하나: users 시트 회원 / daily 기록이 있는 회원 등)"""
+    return NameIndex()
+
+
+def user_picker(label, index: NameIndex, key, page_size=PAGE_SIZE, placeholder=None):
+    """
+    검색창 + (필요하면) 페이지 번호 + 현재 페이지 selectbox.
+    placeholder 를 주면 처음에는 아무도 선택되지 않은 상태(None 반환).
+    """
+    query = st.text_input(f"🔎 {label} 검색 (이름 일부)", key=f"{key}_query")
+    _, total = index.search(query, 0, page_size)
+    pages = max(1, -(-total // page_size))
+    page = 0
+    if pages > 1:
+        page = st.number_input(
+            f"페이지 (총 {total}명, {pages}페이지)", min_value=1, max_value=pages, value=1,
+            key=f"{key}_page",
+        ) - 1
+    options, _ = index.search(query, page, page_size)
+    if not options:
+        st.caption("검색 결과가 없습니다.")
+        return None
+    if placeholder is not None:
+        return st.selectbox(label, options, index=None, placeholder=placeholder, key=f"{key}_select")
+    return st.selectbox(label, options, key=f"{key}_select")
+
+
+if __name__ == "__main__":
+    # 대규모 회원 기준 검색/중복 추천 시간 확인 (검증은 tests/test_name_index.py)
+    #   python name_index.py
+    import time
+    import random
+
+    random.seed(0)
+    family = "김이박최정강조윤장임"
+    given = ["민준", "서연", "도윤", "하은", "지호", "서준", "지우", "예린"]
+    names = [f"{random.choice(family)}{random.choice(given)}{random.randint(1, 99999)}" for _ in range(50_000)]
+    names += ["김민준"] + [f"김민준_{i}" for i in range(2, 3000)]
+
+    t0 = time.perf_counter()
+    idx = NameIndex(names)
+    t1 = time.perf_counter()
+    page, total = idx.search("김민")
+    t2 = time.perf_counter()
+    s = idx.suggest("김민준")
+    t3 = time.perf_counter()
+
+    # 기존 방식: 빈 번호를 1씩 올려 가며 리스트에서 찾기
+    existing = list(names)
+    i = 2
+    while f"김민준_{i}" in existing:
+        i += 1
+    t4 = time.perf_counter()
+
+    print(f"{len(idx)}개 이름: 인덱스 {(t1 - t0) * 1000:.0f}ms, '김민' 검색 {total}건 {(t2 - t1) * 1000:.2f}ms")
+    print(f"중복 추천 {s}: 카운터 {(t3 - t2) * 1e6:.1f}µs / 기존 루프 {(t4 - t3) * 1000:.0f}ms")
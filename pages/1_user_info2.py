@@ -2,6 +2,9 @@
 import streamlit as st
 import pandas as pd
 from sheets_auth import connect_gsheet
+from sheet_wal import append_row, get_wal
+from name_index import get_name_index
+from profiling import profile_page
 
 # =========================
 # 페이지 기본 설정 (가장 먼저!)
@@ -12,6 +15,8 @@ st.set_page_config(
     page_icon="🧍"
 )
 
+profile_page(__file__)
+
 st.markdown("""
     <h1 style='text-align:center; font-weight:700;'>
         🧍 회원 등록
@@ -44,9 +49,9 @@ def load_existing_names():
     # 공백 제거 + 빈 값 제거
     return [n.strip() for n in names[1:] if n and n.strip()]
 
-# 스프레드시트/워크시트 객체 (네트워크 호출 아님, 캐시된 객체 재사용)
-sh = get_spreadsheet()
-ws = sh.worksheet("users")   # 명시적으로 users 시트를 사용
+def get_existing_names():
+    """시트 이름 목록 + 아직 시트로 넘어가지 않은(WAL 대기 중) 이름 → 공용 이름 인덱스"""
+    return get_name_index("users").sync(load_existing_names() + get_wal().pending_column("users", 0))
 
 # =========================
 # 📝 기본 정보
@@ -77,22 +82,16 @@ with col6:
 name = name.strip()
 is_duplicate = False
 suggested_name = None
-existing_names = []
+existing_names = None
 
 if name:
     # 이름이 실제로 입력된 경우에만 시트에서 이름 목록을 로드
-    existing_names = load_existing_names()
+    existing_names = get_existing_names()
 
     if name in existing_names:
         is_duplicate = True
-        # 같은 이름이 이미 있으면, 추천 이름 하나 만들어서 안내
-        base = name
-        i = 2
-        candidate = f"{base}_{i}"
-        while candidate in existing_names:
-            i += 1
-            candidate = f"{base}_{i}"
-        suggested_name = candidate
+        # 같은 이름이 이미 있으면, 추천 이름 하나 만들어서 안내 (기본 이름별 번호 카운터로 O(1))
+        suggested_name = existing_names.suggest(name)
 
         st.error(
             f"⚠ 이미 등록된 이름입니다. 나중에 운동 추천에서 헷갈리지 않도록, "
@@ -131,19 +130,13 @@ if st.button("💾 회원 등록 완료", use_container_width=True):
         st.stop()
 
     # (안전장치) 버튼 클릭 시에도 혹시 모를 중복 체크를 위해 한 번 더 확인
-    if not existing_names:
-        existing_names = load_existing_names()
+    if existing_names is None:
+        existing_names = get_existing_names()
 
     if name in existing_names:
         is_duplicate = True
         if not suggested_name:
-            base = name
-            i = 2
-            candidate = f"{base}_{i}"
-            while candidate in existing_names:
-                i += 1
-                candidate = f"{base}_{i}"
-            suggested_name = candidate
+            suggested_name = existing_names.suggest(name)
 
     # 이름 중복이면 저장 막고 안내
     if is_duplicate:
@@ -165,10 +158,12 @@ if st.button("💾 회원 등록 완료", use_container_width=True):
         injury_status, injury_detail
     ]
 
-    ws.append_row(new_row)
+    # 로컬 WAL에 먼저 기록 → 시트 반영은 백그라운드에서
+    append_row("users", new_row)
 
-    # 새 회원이 추가되었으므로 이름 캐시를 갱신
+    # 새 회원이 추가되었으므로 이름 캐시를 갱신 (공용 인덱스에는 바로 반영)
     load_existing_names.clear()
+    get_name_index("users").add(name)
 
     st.success("🎉 회원 등록이 완료되었습니다!")
     st.balloons()
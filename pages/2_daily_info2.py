@@ -3,60 +3,17 @@ import streamlit as st
 import pandas as pd
 from datetime import date
 from sheets_auth import connect_gsheet
-
-# =========================
-# 😄 Russell Circumplex 기반 감정 + 각성도(1~5) 매핑
-# - 1: 매우 낮음(무기력/졸림)
-# - 2: 낮음(차분/편안)
-# - 3: 보통(중립/안정)
-# - 4: 높음(긴장/흥분)
-# - 5: 매우 높음(격앙/분노/환희)
-# =========================
-EMOTION_AROUSAL = {
-    # 🟢 쾌 + 낮은 각성 (calm / pleasant)
-    "편안함": 2,
-    "차분함": 2,
-    "평온": 2,
-    "안정감": 2,
-    "만족": 2,
-    "안도": 2,
-
-    # 🟡 쾌 + 높은 각성 (excited / pleasant)
-    "기쁨": 4,
-    "행복": 3,
-    "즐거움": 4,
-    "신남": 5,
-    "열정적임": 5,
-    "활기참": 5,
-    "환희": 5,
-
-    # 🔴 불쾌 + 높은 각성 (tense / unpleasant)
-    "긴장": 4,
-    "불안": 4,
-    "초조": 4,
-    "짜증": 4,
-    "스트레스": 4,
-    "공포": 5,
-    "분노": 5,
-
-    # 🔵 불쾌 + 낮은 각성 (sad / unpleasant)
-    "슬픔": 1,
-    "우울": 1,
-    "피곤": 1,
-    "지침": 1,
-    "무기력": 1,
-    "침울함": 1,
-    "외로움": 2,
-}
-
-def compute_avg_arousal(emotion_list):
-    scores = [EMOTION_AROUSAL[e] for e in emotion_list if e in EMOTION_AROUSAL]
-    if not scores:
-        return ""
-    return round(sum(scores) / len(scores), 2)
+from sheet_wal import append_row, get_wal
+from name_index import get_name_index, user_picker
+from feature_store import get_feature_store
+# 감정 좌표(쾌-불쾌 × 각성) 표와 평균 각성도 계산은 emotion_model 에서 공유
+from emotion_model import EMOTIONS, compute_avg_arousal
+from profiling import profile_page
 
 st.set_page_config(page_title="오늘의 컨디션 입력", layout="centered", page_icon="💪")
 
+profile_page(__file__)
+
 st.markdown("""
     <h1 style='text-align:center; font-weight:700;'>💡 오늘의 컨디션 기록하기</h1>
     <p style='text-align:center; color:gray; margin-top:-10px;'>운동 추천의 정확도를 높여요!</p>
@@ -72,7 +29,7 @@ def get_spreadsheet():
 
 def load_users():
     """
-    회원 이름 목록을 항상 '최신 상태'로 가져오기.
+    회원 이름 인덱스를 항상 '최신 상태'로 가져오기.
 
     - 우선 'users' 시트 사용
     - 없으면 sheet1 사용
@@ -105,11 +62,11 @@ def load_users():
     if cleaned and cleaned[0] in ("이름", "name", "Name", "NAME"):
         cleaned = cleaned[1:]
 
-    return sorted(set(cleaned))
+    # 방금 등록해서 아직 WAL에 대기 중인 회원도 포함
+    cleaned += get_wal().pending_column("users", 0)
 
-# 스프레드시트 & daily 시트 (객체 재사용)
-sh = get_spreadsheet()
-ws = sh.worksheet("daily")  # daily 시트로 저장
+    # 목록이 바뀌었을 때만 다시 정렬되는 공용 이름 인덱스
+    return get_name_index("users").sync(cleaned)
 
 # =========================
 # 📅 날짜 & 사용자 선택
@@ -121,7 +78,9 @@ if not users:
     st.error("❌ 등록된 회원이 없습니다. 먼저 '회원 등록' 페이지에서 사용자를 추가해주세요.")
     st.stop()
 
-user_name = st.selectbox("기록할 사용자 선택", users)
+user_name = user_picker("기록할 사용자 선택", users, key="daily_user")
+if user_name is None:
+    st.stop()
 
 # =========================
 # 😄 감정 상태 입력
@@ -129,7 +88,7 @@ user_name = st.selectbox("기록할 사용자 선택", users)
 st.markdown("### 😄 오늘의 감정 상태")
 
 # 보기 좋게 정렬 (가나다순)
-all_emotions = sorted(list(EMOTION_AROUSAL.keys()))
+all_emotions = sorted(EMOTIONS)
 
 emotions = st.multiselect(
     "오늘 느낀 감정을 모두 선택하세요",
@@ -163,7 +122,7 @@ avg_score = compute_avg_arousal(emotions)
 if st.button("💾 저장하고 추천 받기", use_container_width=True):
     equip_str = ", ".join(equip) if equip else "없음"
 
-    ws.append_row([
+    append_row("daily", [
         str(selected_date),      # 날짜
         user_name,               # 이름
         ", ".join(emotions),     # 감정 리스트
@@ -177,6 +136,9 @@ if st.button("💾 저장하고 추천 받기", use_container_width=True):
         "", "", "", "", ""       # 추천1~3 + 이유 자리
     ])
 
+    # 최근 이력 피처 갱신 (시트 재조회 없이 O(1))
+    get_feature_store().record_daily(user_name, selected_date, sleep_hours, stress_level, avg_score)
+
     st.success("✔ 저장 완료! 추천 페이지로 이동합니다")
     st.balloons()
     st.switch_page("pages/3_recommendation.py")
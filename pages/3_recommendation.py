@@ -1,20 +1,31 @@
 # -*- coding: utf-8 -*-
-import os, re, json, requests
-import pandas as pd
-import numpy as np
+import os, json, math, time, logging
+import pandas as pd     # 카탈로그/시트를 매 실행마다 DataFrame 으로 다룸 → 지연 import 대상 아님 (openai/spotipy 만 지연)
 import streamlit as st
-from openai import OpenAI
 from datetime import datetime, date
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from sheets_auth import connect_gsheet
-
-# ========================= Spotify import =========================
-try:
-    import spotipy
-    from spotipy.oauth2 import SpotifyClientCredentials
-except ImportError:
-    spotipy = None
-    SpotifyClientCredentials = None
-
+from sheet_wal import flush_pending, get_wal
+from sheet_schema import get_schema_registry, SchemaError, RECOMMEND_COLUMNS, REASON_COLUMNS
+from prompt_builder import build_messages, build_plan_messages, count_message_tokens
+from llm_stream import Top3StreamParser
+from structured_output import TOP3_FORMAT, QUERY_FORMAT, REPAIR_MIN_SEC, load_json, Top3Validator
+from latency_budget import Deadline
+from rule_engine import rank_candidates, fallback_reason
+from plan_mode import PlanDay, parse_plan, finalize_plan, sheet_updates
+import resilience
+from resilience import CircuitOpenError, breaker_snapshot
+from call_ledger import get_ledger
+from async_pipeline import get_bridge, TaskGraph, blocking, get_async_openai, http_get_json
+from feature_store import get_feature_store
+from emotion_model import select_candidates
+from catalog_watch import get_catalog_watcher
+from energy import session_kcal
+from typed_tables import typed_daily, typed_users, code_mask
+from name_index import get_name_index, user_picker
+from profiling import profile_page
+
+logger = logging.getLogger("moodfit.recommendation")
 
 # ========================= 공통: 시크릿/환경변수 헬퍼 =========================
 def get_secret(key: str, default: str = ""):
@@ -29,6 +40,8 @@ def get_secret(key: str, default: str = ""):
 # ========================= 기본 UI =========================
 st.set_page_config(page_title="운동 추천", page_icon="🏋️", layout="centered")
 
+profile_page(__file__)
+
 st.markdown("""
 <h1 style='text-align:center; font-weight:700;'>🏋️ 맞춤 운동 추천</h1>
 <p style="text-align:center; color:gray; margin-top:-10px;">
@@ -37,88 +50,39 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# ========================= CSV 불러오기 =========================
-WORKOUT_CSV = "workout.csv"
-
-
-def read_csv(path):
-    for enc in ["utf-8-sig", "utf-8", "cp949"]:
-        try:
-            return pd.read_csv(path, encoding=enc)
-        except Exception:
-            pass
-    st.error("❌ workout.csv 읽기 실패")
+# ========================= 카탈로그 (핫 리로드 스냅샷) =========================
+# 이번 rerun 동안에는 이 스냅샷 하나만 사용 (CSV 를 고치면 백그라운드에서 새 버전으로 교체됨)
+# DataFrame / 인덱스는 모든 세션이 공유하므로 읽기 전용
+try:
+    catalog = get_catalog_watcher().current()
+except Exception as e:
+    st.error(f"❌ 운동 카탈로그 읽기 실패: {e}")
     st.stop()
 
-
-def split_tags(x):
-    if pd.isna(x):
-        return []
-    return [s.strip() for s in str(x).split(",") if s.strip()]
-
-
-def load_workouts():
-    df = read_csv(WORKOUT_CSV)
-
-    # 운동목적 리스트화
-    if "운동목적" not in df.columns:
-        st.error("❌ workout.csv 에 '운동목적' 컬럼이 없습니다.")
-        st.stop()
-    df["운동목적_list"] = df["운동목적"].apply(split_tags)
-
-    # (있으면) 운동강도 정규화
-    if "운동강도" in df.columns:
-        df["운동강도"] = df["운동강도"].astype(str).str.strip()
-
-    return df
-
-
-workouts_df = load_workouts()
+workouts_df = catalog.workouts
 
 
 # ========================= 날씨 조회 =========================
-def get_weather(city):
-    key = get_secret("WEATHER_API_KEY")
+async def fetch_weather(city, key, deadline):
+    """(날씨, 기온) — 키가 없거나 실패하면 ("unknown", 0.0) (이벤트 루프에서 실행)"""
     if not key:
         return "unknown", 0.0
-    try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={key}&lang=kr&units=metric"
-        res = requests.get(url).json()
-        return res["weather"][0]["main"].lower(), res["main"]["temp"]
-    except Exception:
-        return "unknown", 0.0
-
 
-# ========================= JSON 파서 (강화 버전) =========================
-def parse_json(text: str):
-    """
-    LLM 응답 문자열에서 JSON 객체만 안전하게 파싱.
-    실패 시, 원본 텍스트를 화면에 보여주고 예외를 다시 올립니다.
-    """
-    if not text or not text.strip():
-        raise ValueError("LLM 응답이 비어 있습니다.")
-
-    text = text.strip()
-
-    # ```json, ``` 제거
-    text = re.sub(r"^```json", "", text, flags=re.IGNORECASE).strip()
-    text = re.sub(r"^```", "", text, flags=re.IGNORECASE).strip()
-    text = re.sub(r"```$", "", text).strip()
-
-    # 중괄호 블록만 추출
-    m = re.search(r"\{[\s\S]*\}", text)
-    if m:
-        text = m.group(0)
+    stage = deadline.stage("weather")
+    url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={key}&lang=kr&units=metric"
 
     try:
-        return json.loads(text)
-    except json.JSONDecodeError as e:
-        try:
-            st.error("⚠️ LLM JSON 파싱에 실패했습니다. 아래 원본 응답을 확인하세요.")
-            st.code(text)
-        except Exception:
-            print("JSON parse error, raw text:", text)
-        raise e
+        with get_ledger().track("weather", op="current"):
+            res = await resilience.acall("weather", http_get_json, url, stage.timeout(), budget=stage)
+        return res["weather"][0]["main"].lower(), res["main"]["temp"]
+    except CircuitOpenError:
+        deadline.degrade("weather", "서킷 open → 날씨 unknown")
+    except Exception as e:
+        if resilience.is_timeout(e):
+            deadline.degrade("weather", f"{stage.seconds:.1f}s 예산 초과 → 날씨 unknown")
+        else:
+            deadline.degrade("weather", f"조회 실패({type(e).__name__}) → 날씨 unknown")
+    return "unknown", 0.0
 
 
 # ========================= Google Sheets (연결 캐시) =========================
@@ -128,18 +92,10 @@ def get_spreadsheet():
     return connect_gsheet("MoodFit")
 
 
-def load_daily_raw():
-    """daily 시트 전체 데이터를 항상 새로 읽어옴."""
-    sh = get_spreadsheet()
-    ws_daily = sh.worksheet("daily")
-    return ws_daily.get_all_values()
-
-
-def load_users_df():
-    """users 시트 전체를 DataFrame으로 가져오기(항상 최신)."""
-    sh = get_spreadsheet()
-    ws_users = sh.worksheet("users")
-    return pd.DataFrame(ws_users.get_all_records())
+async def read_sheet(sh, name):
+    """(워크시트, 전체 값) — 항상 새로 읽음 (gspread 는 동기 클라이언트라 루프의 스레드 풀에서)"""
+    ws = await blocking(sh.worksheet, name)
+    return ws, await blocking(ws.get_all_values)
 
 
 # ========================= 감정 추출 함수 =========================
@@ -150,20 +106,7 @@ def get_emotion_from_daily(row):
     return ""
 
 
-# ========================= 사용자 프로필 JSON 빌더 =========================
-def build_user_profile(user_row, daily_row, weather, temp):
-    profile = {
-        "정적프로필": user_row.to_dict(),
-        "오늘컨디션": daily_row.to_dict(),
-        "환경정보": {
-            "날씨": weather,
-            "기온_C": temp,
-        },
-    }
-    return profile
-
-
-# ========================= (핵심 변경) 각성점수 -> 목표 운동강도 =========================
+# ========================= 숫자 변환 =========================
 def safe_float(x):
     try:
         if pd.isna(x):
@@ -173,44 +116,13 @@ def safe_float(x):
         return None
 
 
-def infer_target_intensity_from_arousal(arousal_score):
-    """
-    감정_평균각성점수(숫자)를 기반으로 1차 후보군(운동강도)을 정합니다.
-    - 스케일이 1~5, 0~5 등 다양한 경우를 대비해 '상대적' 기준으로 처리
-    - 값이 비정상이면 None 반환(강도 필터링 X)
-    """
-    a = safe_float(arousal_score)
-    if a is None:
-        return None
-
-    # 흔한 스케일: 1~5 또는 0~5를 가정한 기본 컷
-    # 낮음: 2.5 이하 / 중간: 2.5~3.5 / 높음: 3.5이상
-    if a < 2.5:
-        return "저강도"
-    elif a < 3.5:
-        return "중강도"
-    else:
-        return "고강도"
-
-
-def filter_candidates_by_intensity(df, target_intensity):
-    """
-    workout.csv에 '운동강도'가 있을 때만 필터 적용.
-    target_intensity가 None이면 필터링하지 않음.
-    """
-    if target_intensity is None:
-        return df.copy()
-
-    if "운동강도" not in df.columns:
-        return df.copy()
-
-    filtered = df[df["운동강도"].astype(str).str.strip() == target_intensity].copy()
-    return filtered
-
-
 # ========================= Spotify 클라이언트 =========================
-def get_spotify_client():
-    if spotipy is None:
+def get_spotify_client(timeout=None):
+    # spotipy 는 플레이리스트를 찾을 때만 import (워밍업 스레드가 미리 불러 두면 즉시 반환)
+    try:
+        import spotipy
+        from spotipy.oauth2 import SpotifyClientCredentials
+    except ImportError:
         st.warning("⚠️ spotipy 가 import 되지 않았습니다. requirements.txt에 'spotipy'를 추가해주세요.")
         return None
 
@@ -234,20 +146,26 @@ def get_spotify_client():
         return None
 
     try:
-        auth = SpotifyClientCredentials(client_id=cid, client_secret=csec)
-        sp = spotipy.Spotify(auth_manager=auth)
+        # timeout 이 주어지면 재시도 없이 그 시간 안에서만 응답을 기다림
+        if timeout:
+            auth = SpotifyClientCredentials(client_id=cid, client_secret=csec, requests_timeout=timeout)
+            sp = spotipy.Spotify(auth_manager=auth, requests_timeout=timeout, retries=0, status_retries=0)
+        else:
+            auth = SpotifyClientCredentials(client_id=cid, client_secret=csec)
+            sp = spotipy.Spotify(auth_manager=auth)
         return sp
     except Exception as e:
         st.error(f"❌ Spotify 클라이언트 생성 중 오류: {e}")
         return None
 
 
-def search_spotify_playlists(sp, query, market="KR", limit=3):
+def search_spotify_playlists(sp, query, market="KR", limit=3, user=None):
     if sp is None:
         return []
 
     try:
-        res = sp.search(q=query, type="playlist", limit=limit, market=market)
+        with get_ledger().track("spotify", op="search", user=user):
+            res = resilience.call("spotify", sp.search, q=query, type="playlist", limit=limit, market=market)
 
         playlists_block = res.get("playlists") or {}
         items = playlists_block.get("items") or []
@@ -277,44 +195,49 @@ def search_spotify_playlists(sp, query, market="KR", limit=3):
 
         return cleaned
 
+    except CircuitOpenError:
+        # Spotify 장애 중: 조용히 건너뜀 (페이지에서 캐시/생략으로 처리)
+        return []
     except Exception as e:
-        st.error(f"❌ Spotify 검색 중 오류: {e}")
+        # 이벤트 루프의 작업 스레드에서 실행되므로 화면 대신 로그로 (페이지에서는 '못 찾음'으로 표시)
+        logger.warning("Spotify search failed (%s: %s)", type(e).__name__, e)
         return []
 
 
 # ========================= LLM 기반 Spotify 검색 키워드 =========================
-def get_playlists_for_top3_with_llm(
-    sp, top3, daily_row, purpose, market="KR"
+def get_playlist_cache():
+    """
+    운동명 → 마지막으로 성공한 플레이리스트 (Spotify 지연 시 대체용).
+    검색 키워드가 카탈로그의 운동강도에 따라 달라지므로 카탈로그 버전별로 둠 (새 버전이면 빈 캐시)
+    """
+    return catalog.cache("playlists")
+
+
+async def get_playlists_for_workout_with_llm(
+    sp, client, wname, w_intensity, emotion, purpose, market="KR", timeout=None, user=None
 ):
+    """운동 하나에 대해 LLM으로 검색 키워드를 만들고 Spotify 검색 (스트리밍 중 이벤트 루프에서 병렬 실행)"""
     if sp is None:
-        return [{"운동명": t["운동명"], "playlists": []} for t in top3]
+        return {"운동명": wname, "playlists": []}
 
-    client = None
-    openai_key = get_secret("OPENAI_API_KEY")
-    if openai_key:
-        client = OpenAI(api_key=openai_key)
+    query = ""
 
-    emotion = get_emotion_from_daily(daily_row)
-    result = []
-
-    for item in top3:
-        wname = item["운동명"]
-        w_intensity = item.get("운동강도", "")
-
-        query = ""
-
-        if client:
-            prompt = {
-                "workout": wname,
-                "emotion": emotion,
-                "purpose": purpose,
-                "intensity": w_intensity,
-                "instruction": "검색용 키워드 한 개만 JSON으로 출력. {\"query\": \"...\"}"
-            }
-            try:
-                resp = client.chat.completions.create(
+    if client:
+        prompt = {
+            "workout": wname,
+            "emotion": emotion,
+            "purpose": purpose,
+            "intensity": w_intensity,
+            "instruction": "검색용 키워드 한 개만 JSON으로 출력. {\"query\": \"...\"}"
+        }
+        try:
+            kw_client = client.with_options(timeout=timeout) if timeout else client
+            with get_ledger().track("openai", op="keyword", model="gpt-4o-mini", user=user) as call:
+                resp = await resilience.acall(
+                    "openai", kw_client.chat.completions.create,
+                    retries=1,
                     model="gpt-4o-mini",
-                    response_format={"type": "json_object"},
+                    response_format=QUERY_FORMAT,
                     messages=[
                         {
                             "role": "system",
@@ -326,295 +249,544 @@ def get_playlists_for_top3_with_llm(
                         }
                     ]
                 )
-                raw = resp.choices[0].message.content
-                data = parse_json(raw)
-                query = data.get("query", "")
-            except Exception:
-                query = ""
+                call.set_usage(getattr(resp, "usage", None))
+            raw = resp.choices[0].message.content
+            data = load_json(raw)
+            query = data.get("query", "")
+        except Exception:
+            query = ""
+
+    if not query:
+        query = f"{wname} workout playlist"
+
+    # spotipy 는 동기 클라이언트 → 루프의 스레드 풀에서
+    playlists = await blocking(search_spotify_playlists, sp, query, market=market, user=user)
+    if playlists:
+        get_playlist_cache()[wname] = playlists
+    return {"운동명": wname, "playlists": playlists}
+
+
+# ========================= 스트리밍 보조: LLM 스트림 =========================
+async def stream_top3(client, messages, stage):
+    """
+    Top3 스트림 청크를 차례로 내보내는 async generator (get_bridge().iterate 로 스크립트 스레드에서 소비).
+    연결/첫 응답까지만 재시도하고, 소비하는 쪽이 멈추면(break) 스트림 연결을 닫음.
+    """
+    stream = await resilience.acall(
+        "openai", client.chat.completions.create,
+        retries=1, budget=stage,
+        model="gpt-4o-mini",
+        response_format=TOP3_FORMAT,
+        messages=messages,
+        temperature=0.6,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.close()
 
-        if not query:
-            query = f"{wname} workout playlist"
 
-        playlists = search_spotify_playlists(sp, query, market=market)
-        result.append({"운동명": wname, "playlists": playlists})
+def render_playlist(pair):
+    wname = pair["운동명"]
+    pls = pair["playlists"]
 
-    return result
+    st.markdown(f"### 🏷️ {wname}")
+
+    if not pls:
+        st.info("이 운동에 어울리는 플레이리스트를 찾지 못했어요 😢")
+    else:
+        p = pls[0]
+        st.markdown(f"""
+        <div style="
+            background:#ffffff;
+            border-radius:16px;
+            padding:14px;
+            margin-bottom:8px;
+            border:1px solid #e5e7eb;">
+            <h4 style="margin:0;">🎵 {p['title']}</h4>
+            <p style="margin:4px 0 0 0; color:#6b7280;">
+                by {p['owner']}
+            </p>
+            <a href="{p['url']}" target="_blank">🔗 Spotify에서 열기</a>
+        </div>
+        """, unsafe_allow_html=True)
 
 
 # ========================= 페이지 메인 로직 =========================
 
 # ========== 날씨 입력 ==========
 city = st.text_input("🌍 도시명", "Seoul")
-weather, temp = get_weather(city)
-st.info(f"현재날씨: {weather}, {temp:.1f}°C")
 
-# 스프레드시트 & 시트 핸들
+# 스프레드시트 핸들
 sh = get_spreadsheet()
-ws_daily = sh.worksheet("daily")
+bridge = get_bridge()
+
+# WAL에 남아 있는 기록(방금 저장한 daily 행 등)을 먼저 시트에 반영
+if not flush_pending():
+    st.warning("⚠️ 아직 시트에 반영되지 않은 기록이 있습니다. 잠시 후 다시 시도해주세요.")
+
+# 날씨 / 최신 daily / users 는 서로 기다릴 필요가 없으므로 한 번에 (가장 느린 하나만큼만 걸림)
+weather_deadline = Deadline.from_config(get_secret)
+load = TaskGraph()
+load.add("weather", lambda: fetch_weather(city, get_secret("WEATHER_API_KEY"), weather_deadline),
+         fallback=("unknown", 0.0))
+load.add("daily", lambda: read_sheet(sh, "daily"))
+load.add("users", lambda: read_sheet(sh, "users"))
+loaded = bridge.run(load.run())
+for name in ("daily", "users"):
+    if name in load.errors:
+        st.error(f"❌ {name} 시트 읽기 실패: {load.errors[name]}")
+        st.stop()
+
+weather, temp = loaded["weather"]
+st.info(f"현재날씨: {weather}, {temp:.1f}°C")
+if weather_deadline.degradations:
+    st.caption("⏱️ 지연 대응: " + " / ".join(weather_deadline.degradations))
 
-# 최신 daily/users 데이터 로드
-daily_raw = load_daily_raw()
+ws_daily, daily_raw = loaded["daily"]
+_, users_raw = loaded["users"]
 if len(daily_raw) < 2:
     st.error("❌ daily 시트에 데이터가 없습니다.")
     st.stop()
 
-daily_df = pd.DataFrame(daily_raw[1:], columns=daily_raw[0])
-users_df = load_users_df()
+# 이름/스트레스/목적 등은 category, 숫자는 float32, 날짜는 datetime64 (이름 공백도 여기서 정리)
+# 공유 캐시이므로 읽기 전용으로 사용
+daily_df = typed_daily(daily_raw)
 
-# 👉 이름 공백 정규화 (매칭 문제 방지)
-if "이름" in daily_df.columns:
-    daily_df["이름"] = daily_df["이름"].astype(str).str.strip()
-if "이름" in users_df.columns:
-    users_df["이름"] = users_df["이름"].astype(str).str.strip()
+# 추천 결과를 쓸 열 번호 (이미 읽은 헤더로 스키마 검증 — 헤더가 그대로면 캐시 매핑 재사용)
+try:
+    daily_layout = get_schema_registry().observe("daily", daily_raw[0], ws_daily)
+    name_cols = daily_layout.cols(RECOMMEND_COLUMNS)
+    reason_cols = daily_layout.cols(REASON_COLUMNS)
+except SchemaError as e:
+    st.error(f"❌ {e}")
+    st.stop()
 
-daily_df["날짜"] = pd.to_datetime(daily_df["날짜"], errors="coerce").dt.date
+# users 도 같은 방식으로 타입 변환 (변환은 바뀐 행만)
+users_df = typed_users(users_raw)
 
 # ========================= 사용자 선택 =========================
 st.markdown("### 👤 사용자 선택")
-user_name = st.selectbox("오늘 추천 받을 사용자", users_df["이름"].unique().tolist())
+# 공용 "users" 인덱스는 1·2번 페이지와 같은 목록(시트 A열 + WAL 대기 중인 이름)으로 맞춤
+# (목록이 같아야 페이지를 옮겨도 다시 정렬하지 않고, 방금 add() 한 이름도 유지됨)
+sheet_names = [str(r[0]).strip() for r in users_raw[1:] if r and str(r[0]).strip()]
+user_index = get_name_index("users").sync(sheet_names + get_wal().pending_column("users", 0))
+user_name = user_picker("오늘 추천 받을 사용자", user_index, key="reco_user")
+if user_name is None:
+    st.stop()
 
-user_daily = daily_df[daily_df["이름"] == user_name]
+user_daily = daily_df[code_mask(daily_df["이름"], user_name)]
 if user_daily.empty:
     st.error("❌ 사용자의 daily 데이터가 없습니다.")
     st.stop()
 
-pick_date = st.selectbox("추천 기준 날짜", sorted(user_daily["날짜"].unique(), reverse=True))
+pick_date = st.selectbox(
+    "추천 기준 날짜",
+    sorted(user_daily["날짜"].dropna().unique(), reverse=True),
+    format_func=lambda d: d.strftime("%Y-%m-%d"),
+)
 daily_row = user_daily[user_daily["날짜"] == pick_date].iloc[0]
 
-mask = (daily_df["이름"] == user_name) & (daily_df["날짜"] == pick_date)
-row_idx = daily_df[mask].index[0]
+row_idx = daily_row.name  # daily_df 는 시트 행 순서 그대로의 RangeIndex
 sheet_row = row_idx + 2  # 헤더 1줄 + 1-based index
 
+# 최근 이력 피처 (처음 보는 사용자는 이미 읽은 daily 행으로 한 번만 채움)
+feature_store = get_feature_store()
+feature_store.backfill(user_name, user_daily.to_dict("records"))
+history = feature_store.get(user_name)
+
 # 사용자 정적 정보 (users 시트)
-user_row = users_df[users_df["이름"] == user_name].iloc[0]
+user_row = users_df[code_mask(users_df["이름"], user_name)].iloc[0]
 
 # daily 시트에서 운동장소/보유장비
 place_pref = daily_row.get("운동장소", "상관없음")
 equip_raw = daily_row.get("보유장비", "")
 equip_list = [s.strip() for s in str(equip_raw).split(",") if s.strip()]
 
-# ========================= (핵심 변경) 1차 후보군: 각성점수 -> 운동강도 필터 =========================
-arousal_score = daily_row.get("감정_평균각성점수", None)
-target_intensity = infer_target_intensity_from_arousal(arousal_score)
-
-candidates = filter_candidates_by_intensity(workouts_df, target_intensity)
-
-# 강도 필터 결과가 너무 비거나, 강도 컬럼이 없거나, 어떤 이유로든 후보가 0이면 전체로 백업
-if candidates.empty:
-    candidates = workouts_df.copy()
+# ========================= 1차 후보군: 감정(쾌-불쾌 × 각성) → 감정×운동 친화도 =========================
+# 감정 목록이 있으면 친화도 행렬 한 번으로 후보를 고르고,
+# 알 수 있는 감정이 없으면 평균 각성점수 → 운동강도 필터 (결과가 비면 전체로 백업)
+candidates, target_intensity = select_candidates(
+    workouts_df, catalog.emotion_index, daily_row.get("감정", ""), daily_row.get("감정_평균각성점수", None)
+)
+
+# (선택) 자유 입력 → 로컬 검색 인덱스 Top-N 을 후보군 앞쪽에 추가
+mood_text = st.text_input("💬 오늘 기분이나 하고 싶은 운동 (선택)", placeholder="예: 답답해서 땀 좀 빼고 싶어요")
+if mood_text.strip():
+    hits = catalog.search_index.search(mood_text, top_n=10)
+    hit_names = [n for n, _ in hits]
+    if hit_names:
+        order = {n: i for i, n in enumerate(hit_names)}
+        found = workouts_df[workouts_df["운동명"].isin(order)].sort_values("운동명", key=lambda c: c.map(order))
+        candidates = pd.concat([found, candidates[~candidates["운동명"].isin(order)]], ignore_index=True)
+        st.caption("🔎 입력과 가까운 운동: " + ", ".join(hit_names[:5]))
 
 # 사용자 운동목적 (이제 "후보군 필터"가 아니라 "프롬프트 우선순위"에 강하게 반영)
 purpose = str(daily_row.get("운동목적", "")).strip()
 
+# 예상 소모 칼로리 = 단위체중당에너지소비량 × 몸무게 × 운동 가능 시간 ('체중 감량' 규칙 순위에 사용)
+def row_value(row, name):
+    """'몸무게' / '몸무게(kg)' 처럼 단위 표기만 다른 헤더도 찾음"""
+    key = name.replace(" ", "")
+    return next((row[k] for k in row.index if str(k).replace(" ", "").startswith(key)), None)
+
+
+exercise_minutes = safe_float(row_value(daily_row, "운동 가능 시간"))
+user_weight = row_value(user_row, "몸무게")
+candidates["예상kcal"] = session_kcal(
+    user_weight, exercise_minutes, candidates["단위체중당에너지소비량"].to_numpy()
+)
+kcal_by_name = dict(zip(
+    workouts_df["운동명"],
+    session_kcal(user_weight, exercise_minutes, workouts_df["단위체중당에너지소비량"].to_numpy()),
+))
+
 
 st.markdown("---")
 
 # ========================= Top3 추천 생성 =========================
 if st.button("🤖 Top3 추천 받기", use_container_width=True):
 
+    # 요청 전체 SLO + 단계별 예산 (버튼 클릭 시점부터)
+    deadline = Deadline.from_config(get_secret)
+
     openai_key = get_secret("OPENAI_API_KEY")
     if not openai_key:
         st.error("❌ OPENAI_API_KEY가 설정되어 있지 않습니다.")
         st.stop()
 
-    client = OpenAI(api_key=openai_key)
+    # openai 는 추천 버튼을 눌렀을 때만 import (워밍업 스레드가 미리 불러 두면 즉시 반환)
+    # 클라이언트는 이벤트 루프에 묶인 AsyncOpenAI 하나를 재사용 (연결 유지)
+    llm_stage = deadline.stage("llm")
+    client = get_async_openai(openai_key).with_options(timeout=llm_stage.timeout())
 
-    user_profile = build_user_profile(
+    # 고정 시스템 프롬프트 + 압축된 프로필/후보군(1차 강도 필터 결과만)
+    messages = build_messages(
         user_row=user_row,
         daily_row=daily_row,
         weather=weather,
         temp=temp,
+        candidates_df=candidates,
+        history=history,
     )
 
-    # 1차(각성점수 기반 운동강도)로 필터링된 후보군만 LLM에 전달
-    rule_candidates = [
-        {
-            "운동명": r["운동명"],
-            "운동목적": r.get("운동목적", ""),
-            "운동강도": r.get("운동강도", ""),
-        }
-        for _, r in candidates.iterrows()
-    ]
-
-    # ===================== (핵심 변경) 시스템 프롬프트: 운동목적 우선순위 강화 =====================
-    system_prompt = f"""
-당신은 개인 맞춤 운동 추천 엔진입니다.
-
-입력으로 다음 정보가 주어집니다.
-
-1) user_profile["정적프로필"]
-- Google Sheets의 users 시트 한 행 전체가 그대로 들어 있습니다.
-- 포함되는 컬럼:
-  - 이름, 나이(만나이), 성별, 키(cm), 몸무게(kg), 평소 활동량,
-    부상 여부(예/아니오), 부상 부위(허리/무릎/어깨 등 또는 해당 없음)
-
-2) user_profile["오늘컨디션"]
-- Google Sheets의 daily 시트에서 사용자가 오늘 입력한 컨디션 정보입니다.
-- 포함되는 컬럼:
-  - 날짜, 이름, 감정, 감정_평균각성점수, 수면 시간, 운동 가능 시간(분),
-    스트레스, 운동목적, 운동장소, 보유장비
-
-3) user_profile["환경정보"]
-- 오늘 날씨/기온:
-  - 날씨(clear, clouds, rain 등)
-  - 기온_C(섭씨)
-
-4) rule_candidates
-- **이미 감정_평균각성점수를 기반으로 "운동강도"가 맞게 1차 필터링된** 운동 목록입니다.
-- 각 항목:
-  - 운동명, 운동목적, 운동강도(저강도/중강도/고강도)
-
-당신의 역할:
-- 오늘 이 사용자에게 가장 적합한 운동 3가지를 **rule_candidates 안에서만** 선택하세요.
-
-[우선순위 규칙: 운동목적 > 그 외 요소]
-- 사용자가 오늘 선택한 운동목적(user_profile["오늘컨디션"]["운동목적"])을 **가장 우선으로** 충족해야 합니다.
-- 즉, **Top3는 가능하면 모두 운동목적에 부합하는 운동으로 구성**하세요.
-- 단, 아래 안전/현실 제약(부상/시간/장소/장비/수면/스트레스)이 크게 충돌하면
-  목적 부합도를 일부 낮추더라도 더 안전하고 실행 가능한 운동을 우선할 수 있습니다.
-
-[감정/각성점수 활용]
-- rule_candidates는 이미 각성점수 기반 강도 필터가 적용되어 있습니다.
-- 따라서 여기서는:
-  - 감정(정서적 상태) + 각성점수를 근거로 "왜 이 강도가 적절한지"를 이유에 구체적으로 설명하고,
-  - 동일 목적 내에서 '기분전환/긴장완화/에너지회복' 등 감정에 맞는 운동을 상위에 두세요.
-
-[정적 정보 활용]
-- 나이/성별/키/몸무게/활동량/부상 여부·부상 부위 반영:
-  - 부상 부위를 악화시키는 동작은 제외하거나 순위 낮춤
-  - 활동량이 낮은 경우 과도한 자극은 피함
-
-[오늘 컨디션(동적 정보)]
-- 수면 부족 + 스트레스 높음 → 강도/볼륨(부담) 자동 하향(가능 범위 내)
-- 운동 가능 시간 짧음 → 짧게 끝낼 수 있는 운동 우선
-- 운동장소/보유장비가 가능한 운동을 우선(집+장비없음→맨몸/매트 등)
-
-[환경정보]
-- 비/폭염/한파 등 → 실내운동 우선
-- 맑고 온화 → 가벼운 야외 유산소 고려 가능
-
-출력 형식:
-- 반드시 아래 JSON 하나의 객체만 출력
-- 설명 문장/마크다운/코드블록 없이 JSON만 출력
-
-{{
-  "top3": [
-    {{
-      "rank": 1,
-      "운동명": "운동 이름",
-      "이유": "운동목적을 1순위로 충족하는 근거 + 감정/각성점수 + 수면/스트레스 + 시간/장소/장비 + 부상 + 날씨를 종합해 2~4문장"
-    }},
-    ...
-  ]
-}}
-
-규칙:
-- 반드시 3개만 추천
-- 운동명은 rule_candidates 안에 존재하는 것만 사용
-- 요가 계열(요가/스트레칭/필라테스 등)은 중복되지 않도록 하며, 전체 2개 이하
-- 이유는 실제 입력값(감정, 각성점수, 수면시간, 스트레스, 시간, 장소/장비 등)을 반영해 구체적으로 작성
-"""
-    # ===============================================================
-
-    payload = {
-        "user_profile": user_profile,
-        "rule_candidates": rule_candidates,
-    }
-
-    with st.spinner("추천 생성 중..."):
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": json.dumps(payload, ensure_ascii=False, default=str)},
-            ],
-            temperature=0.6,
+    # 카탈로그에서 운동명 → 운동강도 매핑 (Spotify LLM에서 쓰기 위함)
+    intensity_map = catalog.intensity_map
+
+    sp = get_spotify_client(timeout=deadline.budgets["spotify"])
+    emotion = get_emotion_from_daily(daily_row)
+    playlist_cache = get_playlist_cache()
+
+    # ===================== 스트리밍 응답 =====================
+    # - 운동명이 나오는 즉시: 후보 검사 후 시트에 운동명 기록 + Spotify 조회를 이벤트 루프에서 시작
+    # - top3 항목 하나가 완성되는 즉시: 화면에 표시 + 이유 셀 기록
+    # - 검사에서 빠진 자리만 짧게 다시 요청, LLM 예산을 넘기면 남은 자리는 규칙 기반 랭킹으로 채움
+    st.markdown("## 🏅 추천 Top3")
+    status = st.empty()
+    status.info("추천 생성 중...")
+    slots = [st.empty() for _ in range(3)]
+
+    sheet_jobs = []
+    playlist_jobs = {}
+    top3 = {}           # 자리(0~2) → 화면에 표시한 항목
+    usage = None
+    timing = {"start": time.perf_counter(), "first": None}
+
+    # 응답 속 운동명은 1차 후보(rule_candidates) 안에 있는 것만 자리 배정 (표기만 다른 이름은 바로 고침)
+    validator = Top3Validator(candidates["운동명"])
+
+    def start_name_jobs(index, wname):
+        sheet_jobs.append(bridge.submit(blocking(
+            ws_daily.update_cell, sheet_row, name_cols[index], wname
+        )))
+        playlist_jobs[index] = bridge.submit(get_playlists_for_workout_with_llm(
+            sp, client, wname, intensity_map.get(wname, ""), emotion, purpose,
+            timeout=deadline.budgets["spotify"], user=user_name,
+        ))
+
+    def show_entry(index, item):
+        item["운동강도"] = intensity_map.get(item.get("운동명", ""), "")
+        top3[index] = item
+        sheet_jobs.append(bridge.submit(blocking(
+            ws_daily.update_cell, sheet_row, reason_cols[index], item.get("이유", "")
+        )))
+
+        if timing["first"] is None:
+            timing["first"] = time.perf_counter() - timing["start"]
+            status.empty()
+        with slots[index].container():
+            st.write(f"### #{item.get('rank', index + 1)} {item.get('운동명', '')}")
+            st.write(item.get("이유", ""))
+            kcal = kcal_by_name.get(item.get("운동명", ""))
+            if kcal is not None and math.isfinite(kcal):
+                st.caption(f"🔥 {exercise_minutes:g}분 기준 예상 소모 ≈ {kcal:.0f} kcal")
+
+    def show_accepted(accepted):
+        for slot, item, new in accepted:
+            if new:
+                start_name_jobs(slot, item["운동명"])
+            show_entry(slot, item)
+
+    parser = Top3StreamParser()
+    stream_ok = False
+    try:
+        # 연결/첫 응답까지만 재시도 (스트림 도중 실패는 재시도하지 않고 규칙 기반으로 채움)
+        # 스트림은 이벤트 루프에서 받고, 청크 처리/화면 갱신은 여기(스크립트 스레드)에서
+        with get_ledger().track("openai", op="top3", model="gpt-4o-mini", user=user_name) as llm_call:
+            llm_call.estimate(sum(count_message_tokens(messages)))
+            for chunk in bridge.iterate(stream_top3(client, messages, llm_stage)):
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                    llm_call.set_usage(usage)
+                if llm_stage.expired():
+                    # break 하면 iterate 가 스트림 연결을 닫음
+                    llm_call.set(outcome="timeout")
+                    deadline.degrade("llm", f"{llm_stage.seconds:.1f}s 예산 초과 → 규칙 기반 랭킹으로 대체")
+                    break
+                if not chunk.choices:
+                    continue
+                llm_call.first_token()
+
+                for ev in parser.feed(chunk.choices[0].delta.content or ""):
+                    if ev.kind == "name":
+                        accepted = validator.accept_name(ev.index, ev.value)
+                        if accepted:
+                            start_name_jobs(*accepted)
+                    elif ev.kind == "entry":
+                        show_accepted([r for r in [validator.accept_entry(ev.index, ev.value)] if r])
+            else:
+                stream_ok = True
+    except CircuitOpenError as e:
+        deadline.degrade("llm", f"서킷 open({e.retry_in:.0f}s 후 재시도) → 규칙 기반 랭킹으로 대체")
+    except Exception as e:
+        if parser.buf:
+            # 스트림 도중 끊긴 경우도 브레이커에 반영 (재시도와 같은 기준: 일시적 오류만 실패로 셈)
+            resilience.get_breaker("openai").record_error(e)
+        deadline.degrade("llm", f"호출 실패({type(e).__name__}) → 규칙 기반 랭킹으로 대체")
+
+    # 응답은 정상인데 후보 밖 이름/중복/빈 이유로 빈 자리가 생기면: 그 자리만 다시 요청 (전체 재시도 X)
+    # 남은 LLM 예산이 짧으면 건너뛰고 아래 규칙 기반으로 채움
+    if stream_ok and validator.missing() and llm_stage.remaining() > REPAIR_MIN_SEC:
+        repair_messages = validator.repair_messages(messages, parser.buf)
+        try:
+            with get_ledger().track("openai", op="top3_repair", model="gpt-4o-mini", user=user_name) as repair_call:
+                repair_call.estimate(sum(count_message_tokens(repair_messages)))
+                resp = bridge.run(resilience.acall(
+                    "openai", client.with_options(timeout=llm_stage.timeout()).chat.completions.create,
+                    retries=0, budget=llm_stage,
+                    model="gpt-4o-mini",
+                    response_format=TOP3_FORMAT,
+                    messages=repair_messages,
+                    temperature=0.3,
+                ))
+                repair_call.set_usage(getattr(resp, "usage", None))
+            show_accepted(validator.apply_repair(load_json(resp.choices[0].message.content)))
+        except Exception as e:
+            deadline.degrade("llm", f"부분 재요청 실패({type(e).__name__}) → 규칙 기반 랭킹으로 채움")
+
+    t_total = time.perf_counter() - timing["start"]
+
+    # LLM이 다 채우지 못한 자리는 규칙 기반 Top-K로 채움
+    if len(top3) < 3:
+        if not deadline.degradations:
+            problems = ", ".join(f"'{p.name}' {p.reason}" for p in validator.problems) or "항목 부족"
+            deadline.degrade("llm", f"응답 검증 실패({problems}) → 규칙 기반 랭킹으로 채움")
+
+        # 운동명만 나오고 이유가 끊긴 항목은 이름(이미 시작된 작업)은 살리고 이유만 규칙으로
+        partial = {i: n for i, n in validator.chosen.items() if i not in top3}
+        chosen = list(validator.chosen.values())
+        fill = rank_candidates(
+            candidates, purpose, k=3 - len(chosen), exclude=chosen,
+            avoid=history.get("최근추천", ()),
         )
 
-        raw = resp.choices[0].message.content
-        parsed = parse_json(raw)
+        for index in validator.missing():
+            if index in partial:
+                wname = partial[index]
+                match = workouts_df[workouts_df["운동명"] == wname]
+                row = match.iloc[0].to_dict() if not match.empty else {"운동명": wname}
+            elif fill:
+                row = fill.pop(0)
+                wname = row["운동명"]
+                start_name_jobs(index, wname)
+            else:
+                break
+            show_entry(index, {
+                "rank": index + 1,
+                "운동명": wname,
+                "이유": fallback_reason(row, purpose, target_intensity),
+            })
 
-        if "top3" not in parsed:
-            st.error("❌ LLM 응답에 'top3' 키가 없습니다. 프롬프트를 확인하세요.")
-            st.code(raw)
-            st.stop()
+    if len(top3) < 3:
+        status.empty()
+        st.error("❌ 추천 후보가 부족해 Top3를 만들지 못했습니다.")
+        st.code(parser.buf)
+        st.stop()
 
-        top3 = parsed["top3"]
+    top3 = [top3[i] for i in range(3)]
 
-    # workout.csv에서 운동명 → 운동강도 매핑해서 top3에 붙여줌 (Spotify LLM에서 쓰기 위함)
-    if "운동강도" in workouts_df.columns:
-        intensity_map = workouts_df.set_index("운동명")["운동강도"].to_dict()
-        for item in top3:
-            wname = item.get("운동명", "")
-            item["운동강도"] = intensity_map.get(wname, "")
-    else:
-        for item in top3:
-            item["운동강도"] = ""
-
-    headers = daily_raw[0]
-
-    def col_idx(name):
-        if name not in headers:
-            st.error(f"❌ daily 시트에 '{name}' 컬럼 없음")
-            st.stop()
-        return headers.index(name) + 1
-
-    c_w1 = col_idx("추천운동1")
-    c_w2 = col_idx("추천운동2")
-    c_w3 = col_idx("추천운동3")
-    c_r1 = col_idx("추천이유1")
-    c_r2 = col_idx("추천이유2")
-    c_r3 = col_idx("추천이유3")
-
-    # Google Sheets 업데이트
-    ws_daily.update_cell(sheet_row, c_w1, top3[0]["운동명"])
-    ws_daily.update_cell(sheet_row, c_w2, top3[1]["운동명"])
-    ws_daily.update_cell(sheet_row, c_w3, top3[2]["운동명"])
-    ws_daily.update_cell(sheet_row, c_r1, top3[0]["이유"])
-    ws_daily.update_cell(sheet_row, c_r2, top3[1]["이유"])
-    ws_daily.update_cell(sheet_row, c_r3, top3[2]["이유"])
-
-    # 화면 표시
-    st.markdown("## 🏅 추천 Top3")
-    for item in top3:
-        st.write(f"### #{item['rank']} {item['운동명']}")
-        st.write(item["이유"])
+    feature_store.record_recommendations(user_name, [t["운동명"] for t in top3])
 
-    # ========================= Spotify 연동 =========================
-    sp = get_spotify_client()
-    workout_playlist_pairs = get_playlists_for_top3_with_llm(
-        sp, top3, daily_row,
-        purpose=purpose,
-        market="KR"
+    # 요청별 토큰 수 (API usage 우선, 없으면 로컬 추정치)
+    static_tokens, dynamic_tokens = count_message_tokens(messages)
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or static_tokens + dynamic_tokens
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", 0) or 0
+    st.caption(
+        f"🧮 prompt {prompt_tokens} tokens (고정 prefix ≈{static_tokens}, 가변 ≈{dynamic_tokens}, "
+        f"캐시 적중 {cached_tokens}) · completion {getattr(usage, 'completion_tokens', '-')} tokens"
+        f" · 첫 추천 {timing['first']:.1f}s / 전체 {t_total:.1f}s"
     )
 
+    # ========================= Spotify 연동 =========================
+    # 남은 Spotify 예산 안에 끝나지 않으면 캐시된 결과를 쓰거나 건너뜀
     st.markdown("## 🎧 추천 운동별 Spotify 플레이리스트")
 
-    for pair in workout_playlist_pairs:
-        wname = pair["운동명"]
-        pls = pair["playlists"]
+    spotify_stage = deadline.stage("spotify")
+    for i in range(3):
+        wname = top3[i]["운동명"]
+        job = playlist_jobs.get(i)
+        pair = {"운동명": wname, "playlists": []}
+        if job is not None:
+            try:
+                pair = job.result(timeout=spotify_stage.remaining())
+            except FutureTimeoutError:
+                cached = playlist_cache.get(wname)
+                if cached:
+                    pair = {"운동명": wname, "playlists": cached}
+                    get_ledger().record("spotify", op="playlist", user=user_name, cache="hit", outcome="timeout")
+                    deadline.degrade("spotify", f"'{wname}' 예산 초과 → 캐시된 플레이리스트 사용")
+                else:
+                    deadline.degrade("spotify", f"'{wname}' 예산 초과 → 플레이리스트 생략")
+        render_playlist(pair)
+
+    # 시트 기록이 모두 끝났는지 확인 (남은 예산 안에서만 기다림, 나머지는 백그라운드 진행)
+    sheets_stage = deadline.stage("sheets")
+    for job in sheet_jobs:
+        try:
+            job.result(timeout=sheets_stage.remaining())
+        except FutureTimeoutError:
+            deadline.degrade("sheets", "시트 기록 지연 → 백그라운드에서 계속 저장")
+            break
+        except Exception as e:
+            st.error(f"❌ daily 시트 업데이트 중 오류: {e}")
+            break
+
+    if deadline.degradations:
+        st.caption("⏱️ 지연 대응: " + " / ".join(deadline.degradations))
+
+    # 의존성별 서킷 브레이커 상태
+    with st.expander("🔌 외부 연동 상태"):
+        st.dataframe(pd.DataFrame(breaker_snapshot()), hide_index=True, use_container_width=True)
+
+# ========================= 여러 날 한 번에 추천 (플랜 모드) =========================
+# 선택한 날짜들의 Top3 를 LLM 호출 한 번으로 받음
+# (시스템 프롬프트/후보 표를 날짜마다 다시 보내지 않고, 시트 기록도 batch_update 한 번)
+st.markdown("---")
+st.markdown("## 🗓️ 여러 날 한 번에 추천 (플랜 모드)")
+all_dates = sorted(user_daily["날짜"].dropna().unique(), reverse=True)
+plan_dates = st.multiselect(
+    "추천받을 날짜 (최대 7일 권장)",
+    all_dates,
+    default=all_dates[:7],
+    format_func=lambda d: d.strftime("%Y-%m-%d"),
+)
+
+if plan_dates and st.button("🗓️ 선택한 날짜 Top3 한 번에 받기", use_container_width=True):
+    openai_key = get_secret("OPENAI_API_KEY")
+    if not openai_key:
+        st.error("❌ OPENAI_API_KEY가 설정되어 있지 않습니다.")
+        st.stop()
 
-        st.markdown(f"### 🏷️ {wname}")
+    # 응답이 날짜 수만큼 길어지므로 하루 추천과 별도의 예산 (MOODFIT_BUDGET_PLAN_SEC, 기본 30초)
+    try:
+        plan_sec = float(get_secret("MOODFIT_BUDGET_PLAN_SEC", "30"))
+    except (TypeError, ValueError):
+        plan_sec = 30.0
+    plan_deadline = Deadline(slo=plan_sec, budgets={"llm": plan_sec})
+    plan_stage = plan_deadline.stage("llm")
+    client = get_async_openai(openai_key).with_options(timeout=plan_stage.timeout())
+
+    # 날짜 오름차순으로 (다양성 규칙은 '바로 전날' 기준)
+    days = []
+    for d in sorted(plan_dates):
+        row = user_daily[user_daily["날짜"] == d].iloc[0]
+        cands, target = select_candidates(
+            workouts_df, catalog.emotion_index, row.get("감정", ""), row.get("감정_평균각성점수", None)
+        )
+        cands["예상kcal"] = session_kcal(
+            user_weight, safe_float(row_value(row, "운동 가능 시간")), cands["단위체중당에너지소비량"].to_numpy()
+        )
+        days.append(PlanDay(
+            label=d.strftime("%Y-%m-%d"),
+            sheet_row=row.name + 2,
+            daily_row=row,
+            candidates=cands,
+            purpose=str(row.get("운동목적", "")).strip(),
+            target_intensity=target,
+        ))
+
+    plan_messages = build_plan_messages(
+        user_row, [(d.label, d.daily_row, d.candidates) for d in days], weather, temp, history=history,
+    )
 
-        if not pls:
-            st.info("이 운동에 어울리는 플레이리스트를 찾지 못했어요 😢")
-        else:
-            p = pls[0]
-            st.markdown(f"""
-            <div style="
-                background:#ffffff;
-                border-radius:16px;
-                padding:14px;
-                margin-bottom:8px;
-                border:1px solid #e5e7eb;">
-                <h4 style="margin:0;">🎵 {p['title']}</h4>
-                <p style="margin:4px 0 0 0; color:#6b7280;">
-                    by {p['owner']}
-                </p>
-                <a href="{p['url']}" target="_blank">🔗 Spotify에서 열기</a>
-            </div>
-            """, unsafe_allow_html=True)
+    t0 = time.perf_counter()
+    raw = ""
+    usage = None
+    with st.spinner(f"{len(days)}일 추천 생성 중..."):
+        try:
+            with get_ledger().track("openai", op="plan", model="gpt-4o-mini", user=user_name) as plan_call:
+                plan_call.estimate(sum(count_message_tokens(plan_messages)))
+                resp = bridge.run(resilience.acall(
+                    "openai", client.chat.completions.create,
+                    retries=1, budget=plan_stage,
+                    model="gpt-4o-mini",
+                    response_format={"type": "json_object"},
+                    messages=plan_messages,
+                    temperature=0.6,
+                ))
+                usage = getattr(resp, "usage", None)
+                plan_call.set_usage(usage)
+            raw = resp.choices[0].message.content or ""
+        except CircuitOpenError as e:
+            plan_deadline.degrade("llm", f"서킷 open({e.retry_in:.0f}s 후 재시도) → 규칙 기반 랭킹으로 대체")
+        except Exception as e:
+            plan_deadline.degrade("llm", f"호출 실패({type(e).__name__}) → 규칙 기반 랭킹으로 대체")
+
+    plan = finalize_plan(days, parse_plan(raw, days), avoid=history.get("최근추천", ()))
+    filled = sum(e["규칙보충"] for entries in plan for e in entries)
+    if filled and not plan_deadline.degradations:
+        plan_deadline.degrade("llm", f"응답에 없거나 규칙에 맞지 않는 {filled}개 → 규칙 기반 랭킹으로 채움")
+
+    # 시트 기록: 모든 날짜의 6칸을 한 번에
+    try:
+        bridge.run(blocking(ws_daily.batch_update, sheet_updates(days, plan, name_cols, reason_cols)))
+    except Exception as e:
+        st.error(f"❌ daily 시트 업데이트 중 오류: {e}")
+
+    feature_store.record_recommendations(user_name, [e["운동명"] for entries in plan for e in entries])
+
+    for day, entries in zip(days, plan):
+        st.markdown(f"### 📅 {day.label}")
+        for e in entries:
+            st.write(f"**#{e['rank']} {e['운동명']}** — {e['이유']}")
+
+    # 하루씩 받았을 때와 비교 (LLM 호출 수 / 프롬프트 토큰)
+    single_tokens = sum(
+        sum(count_message_tokens(build_messages(user_row, d.daily_row, weather, temp, d.candidates, history)))
+        for d in days
+    )
+    plan_tokens = getattr(usage, "prompt_tokens", None) or sum(count_message_tokens(plan_messages))
+    st.caption(
+        f"🧮 LLM 1회 (하루씩이면 {len(days)}회) · prompt {plan_tokens} tokens "
+        f"(하루씩이면 ≈{single_tokens}) · completion {getattr(usage, 'completion_tokens', '-')} tokens"
+        f" · {time.perf_counter() - t0:.1f}s"
+    )
+    if plan_deadline.degradations:
+        st.caption("⏱️ 지연 대응: " + " / ".join(plan_deadline.degradations))
 
 # ========================= 평가 페이지 이동 버튼 =========================
 st.markdown("---")
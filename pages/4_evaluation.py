@@ -1,11 +1,15 @@
 import streamlit as st
 from sheets_auth import connect_gsheet
-from datetime import datetime
+from sheet_wal import append_row, flush_pending
+from sheet_schema import get_schema_registry, SchemaError, RECOMMEND_COLUMNS, REASON_COLUMNS
+from name_index import get_name_index, user_picker
+from profiling import profile_page
 
-st.write("✅ evaluation.py loaded at:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-st.write("✅ version tag:", "EVAL-2025-12-30-v1")
-st.divider()
 st.set_page_config(page_title="추천운동 평가", page_icon="📊", layout="centered")
+
+# 로딩 시각 출력 대신: ?profile=1 이면 재실행 시간/메모리가 페이지 아래에 표시됨
+profile_page(__file__)
+
 st.title("📊 추천운동 평가 (논문용 설문)")
 
 # =====================================================
@@ -26,6 +30,10 @@ def load_daily_rows():
     return ws_daily.get_all_values()
 
 # ----------------- daily 시트 데이터 불러오기 -----------------
+# WAL에 남아 있는 기록을 먼저 시트에 반영
+if not flush_pending():
+    st.warning("⚠️ 아직 시트에 반영되지 않은 기록이 있습니다. 잠시 후 다시 시도해주세요.")
+
 rows = load_daily_rows()
 
 if not rows or len(rows) < 2:
@@ -35,31 +43,36 @@ if not rows or len(rows) < 2:
 header = rows[0]
 data = rows[1:]
 
+# 열 위치는 헤더 이름으로 (스키마 레지스트리 — 헤더가 그대로면 캐시된 매핑 재사용)
+try:
+    daily_layout = get_schema_registry().observe("daily", header)
+    DATE_IDX = daily_layout.index("날짜")
+    NAME_IDX = daily_layout.index("이름")
+except SchemaError as e:
+    st.error(f"❌ {e}")
+    st.stop()
+
 # =====================================================
 # 1. 사용자 / 날짜 선택
 # =====================================================
 
-# daily 기준 이름 목록 (2열: 이름, 공백 제거)
-user_list = sorted({
-    (row[1] or "").strip()
-    for row in data
-    if len(row) > 1 and (row[1] or "").strip()
-})
+# daily 기준 이름 인덱스 (이름 열, 공백 제거) — 목록이 바뀌었을 때만 다시 정렬
+user_index = get_name_index("daily").sync(row[NAME_IDX] for row in data if len(row) > NAME_IDX)
 
 def get_dates_for_user(user: str):
     """해당 사용자의 날짜 목록만 daily 시트에서 추출 (이름 공백 제거 후 비교)"""
     result = set()
     for row in data:
-        if len(row) > 1:
-            name_val = (row[1] or "").strip()
+        if len(row) > NAME_IDX:
+            name_val = (row[NAME_IDX] or "").strip()
             if name_val == user:
-                result.add(row[0])   # 날짜는 문자열 그대로 사용
+                result.add(row[DATE_IDX])   # 날짜는 문자열 그대로 사용
     return sorted(result)
 
 st.subheader("👤 사용자 선택")
-selected_user = st.selectbox("사용자를 선택하세요:", ["선택"] + user_list)
+selected_user = user_picker("사용자를 선택하세요:", user_index, key="eval_user", placeholder="선택")
 
-if selected_user == "선택":
+if selected_user is None:
     st.info("사용자를 먼저 선택해주세요.")
     st.stop()
 
@@ -81,28 +94,20 @@ if selected_date == "선택":
 # 2. daily 시트에서 해당 사용자+날짜의 추천운동 & 이유 찾기
 # =====================================================
 
-# daily 시트 구조 (1-based 기준 가정):
-# 11열: 추천운동1, 12열: 추천운동2, 13열: 추천운동3
-# 14열: 추천이유1, 15열: 추천이유2, 16열: 추천이유3
-# => 0-based index로는 10~12, 13~15
-
+# 추천운동1~3 / 추천이유1~3 열은 헤더 이름으로 찾음 (짧은 행은 빈 값)
 rec1 = rec2 = rec3 = ""
 reason1 = reason2 = reason3 = ""
 
 for row in data:
-    if len(row) < 16:
+    if len(row) <= NAME_IDX:
         continue
 
-    date_val = row[0]
-    name_val = (row[1] or "").strip()
+    date_val = row[DATE_IDX]
+    name_val = (row[NAME_IDX] or "").strip()
 
     if date_val == selected_date and name_val == selected_user:
-        rec1 = row[10]
-        rec2 = row[11]
-        rec3 = row[12]
-        reason1 = row[13]
-        reason2 = row[14]
-        reason3 = row[15]
+        rec1, rec2, rec3 = (daily_layout.get(row, c) for c in RECOMMEND_COLUMNS)
+        reason1, reason2, reason3 = (daily_layout.get(row, c) for c in REASON_COLUMNS)
         break
 
 if not rec1 and not rec2 and not rec3:
@@ -177,21 +182,7 @@ st.markdown("---")
 # =====================================================
 if st.button("💾 평가 제출하기", use_container_width=True):
 
-    sh = get_spreadsheet()
-    ws_eval = sh.worksheet("evaluation")
-
-    # evaluation 시트가 비어있다면, 논문용 헤더 생성
-    eval_rows = ws_eval.get_all_values()
-    if not eval_rows:
-        ws_eval.append_row([
-            "날짜", "이름",
-            "추천운동1", "추천운동2", "추천운동3",
-            "운동1_평가", "운동2_평가", "운동3_평가",
-            "Q_fit(개인화적합)", "Q_explain_understand(이해)", "Q_explain_convince(설득)",
-            "Q_satis(만족)", "Q_reuse(재사용의향)",
-            "개선점", "좋았던점"
-        ])
-
+    # evaluation 시트가 비어 있으면 헤더(+기록ID)는 스키마 레지스트리가 만들어 둠 (워밍업 bootstrap, 또는 리플레이어가 처음 매핑을 읽을 때)
     row_to_append = [
         selected_date,
         selected_user,
@@ -205,6 +196,6 @@ if st.button("💾 평가 제출하기", use_container_width=True):
         q_best
     ]
 
-    ws_eval.append_row(row_to_append)
+    append_row("evaluation", row_to_append)
     st.success("🎉 평가가 저장되었습니다! 감사합니다!")
     st.balloons()
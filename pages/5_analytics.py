@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import time
+import pandas as pd
+import streamlit as st
+from sheets_auth import connect_gsheet
+from eval_analytics import EvalAnalytics
+from sheet_schema import get_schema_registry, SchemaError
+from catalog_watch import get_catalog_watcher
+from call_ledger import get_ledger, summarize
+from profiling import profile_page, get_profile_store
+
+st.set_page_config(page_title="평가 분석", page_icon="📈", layout="centered")
+
+profile_page(__file__)
+
+st.markdown("""
+<h1 style='text-align:center; font-weight:700;'>📈 추천 평가 분석</h1>
+<p style="text-align:center; color:gray; margin-top:-10px;">
+evaluation 시트 집계 (운동별 평점 · 문항 분포 · 신뢰도 · 강도별 비교)
+</p>
+""", unsafe_allow_html=True)
+
+# 새 평가를 시트에서 가져오는 최소 간격(초). 그 사이에는 메모리 집계를 그대로 보여줌
+REFRESH_INTERVAL = 60
+
+
+# =========================
+# 🔌 Google Sheet / 집계 엔진 (캐시)
+# =========================
+@st.cache_resource
+def get_spreadsheet():
+    """MoodFit 스프레드시트 객체 캐시"""
+    return connect_gsheet("MoodFit")
+
+
+@st.cache_resource
+def get_engine():
+    """
+    프로세스 전체에서 하나의 집계 엔진을 공유.
+    로컬에 저장된 집계가 있으면 이어서 사용하고, 이후에는 새 행만 반영.
+    """
+    snapshot = get_catalog_watcher().current()
+    engine = EvalAnalytics(
+        intensity_map=snapshot.intensity_map,
+        layout=get_schema_registry().layout("evaluation"),
+        catalog_version=snapshot.version,
+    )
+    engine.load()
+    return engine
+
+
+# 열 위치는 evaluation 헤더 이름으로 (헤더가 스키마와 다르면 집계하지 않음)
+try:
+    engine = get_engine()
+except SchemaError as e:
+    st.error(f"❌ {e}")
+    st.stop()
+
+# 카탈로그가 바뀌어 운동강도 매핑이 달라졌으면 강도별 집계를 새 매핑으로 전체 재계산
+# (카탈로그 버전당 한 번만 시도 — 실패하면 마지막 집계를 보여 주고, 다시 하려면 '전체 재계산')
+catalog = get_catalog_watcher().current()
+catalog_changed = engine.catalog_outdated(catalog.version, catalog.intensity_map)
+
+col1, col2 = st.columns(2)
+refresh_now = col1.button("🔄 새 평가 반영", use_container_width=True)
+rebuild = col2.button("♻️ 전체 재계산", use_container_width=True)
+
+if refresh_now or rebuild or catalog_changed or time.time() - engine.refreshed_at > REFRESH_INTERVAL:
+    try:
+        ws_eval = get_spreadsheet().worksheet("evaluation")
+        # 전체 재계산은 엔진 안에서 비우기 + 다시 읽기를 잠금 하나로 (다른 세션의 refresh 와 겹치지 않게)
+        if rebuild or catalog_changed:
+            added = engine.rebuild(ws_eval, intensity_map=catalog.intensity_map, catalog_version=catalog.version)
+        else:
+            added = engine.refresh(ws_eval)
+        if added:
+            st.toast(f"새 평가 {added}건 반영")
+    except Exception as e:
+        st.warning(f"⚠️ evaluation 시트를 읽지 못해 마지막 집계를 보여줍니다: {e}")
+
+st.caption(f"반영된 evaluation 행: {engine.cursor}")
+
+# =========================
+# 🧮 설문 신뢰도
+# =========================
+st.markdown("### 🧮 설문 신뢰도 (Cronbach's α)")
+alpha = engine.cronbach_alpha()
+if alpha is None:
+    st.info("응답이 2건 이상 모이면 계산됩니다.")
+else:
+    st.metric("α (5문항)", f"{alpha:.3f}")
+
+# =========================
+# 📊 문항별 분포
+# =========================
+st.markdown("### 📊 문항별 응답 분포")
+st.dataframe(engine.question_distribution(), hide_index=True, use_container_width=True)
+
+# =========================
+# 🏋️ 운동별 평점
+# =========================
+st.markdown("### 🏋️ 운동별 적합도 평점")
+st.dataframe(engine.workout_summary(), hide_index=True, use_container_width=True)
+
+# =========================
+# 🔥 강도별 비교
+# =========================
+st.markdown("### 🔥 운동강도별 평점")
+st.dataframe(engine.intensity_breakdown(), hide_index=True, use_container_width=True)
+
+# =========================
+# 🧾 외부 호출 장부
+# =========================
+st.markdown("### 🧾 외부 호출 장부 (OpenAI · Spotify · 날씨)")
+c1, c2 = st.columns(2)
+period = c1.selectbox("기간", [1, 7, 30], index=1, format_func=lambda d: f"최근 {d}일")
+group = c2.selectbox(
+    "묶음 기준",
+    [("date", "dependency", "op"), ("user",), ("date", "user"), ("dependency", "op")],
+    format_func=lambda by: " × ".join({"date": "날짜", "user": "사용자", "dependency": "의존성", "op": "작업"}[b] for b in by),
+)
+calls = get_ledger().load(since=pd.Timestamp.now().normalize() - pd.Timedelta(days=period - 1))
+if calls.empty:
+    st.info("기록된 외부 호출이 없습니다.")
+else:
+    total_cost = calls["cost_usd"].sum()
+    m1, m2, m3 = st.columns(3)
+    m1.metric("호출", f"{len(calls):,}")
+    m2.metric("비용 (USD)", f"{total_cost:.4f}")
+    m3.metric("사용자당 비용", f"{total_cost / max(calls['user'].nunique(), 1):.4f}")
+    st.dataframe(summarize(calls, by=group), hide_index=True, use_container_width=True)
+
+# =========================
+# 🔬 재실행 프로파일
+# =========================
+st.markdown("### 🔬 재실행 프로파일")
+store = get_profile_store()
+profiles = store.load_index()
+if profiles.empty:
+    st.info("저장된 프로파일이 없습니다. 주소에 ?profile=1 을 붙이거나 MOODFIT_PROFILE=1 로 실행하면 재실행마다 기록됩니다.")
+else:
+    st.dataframe(store.page_summary(profiles), hide_index=True, use_container_width=True)
+    c1, c2 = st.columns(2)
+    page = c1.selectbox("페이지", ["전체"] + sorted(profiles["page"].unique()))
+    own_only = c2.toggle("앱 코드만", value=True)
+    if page != "전체":
+        profiles = profiles[profiles["page"] == page]
+    st.caption("함수별 누적 시간 (재실행 합산, 누적 큰 순)")
+    st.dataframe(store.summarize(profiles, own_only=own_only), hide_index=True, use_container_width=True)
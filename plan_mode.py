@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+플랜 모드: 여러 날짜의 Top3 를 LLM 호출 한 번으로 만들고 daily 시트에 한 번에 기록.
+
+하루씩 추천받으면 날짜마다 같은 시스템 프롬프트와 후보 표를 다시 보내야 합니다.
+플랜 모드는 prompt_builder.build_plan_messages 로
+- 시스템 프롬프트 1번 + 모든 날짜 후보의 합집합 표 1번 + 날짜별 컨디션/후보 번호 한 줄
+만 보내고, 응답 {"plan": [{"date", "top3": [...]}, ...]} 을 여기서 검증합니다.
+
+검증/보충 규칙 (LLM 이 어겨도 결과는 항상 지켜짐)
+- 그 날짜의 1차 후보에 없는 운동명, 같은 날 중복은 버림
+- 같은 운동이 바로 이어지는 두 날짜에 나오면 뒤 날짜에서 버림, 기간 전체 MAX_REPEAT 회 초과도 버림
+- 빈 자리는 rule_engine.rank_candidates 로 채움 (앞 날짜에 쓴 운동은 순위를 낮춤)
+시트 기록은 바뀐 셀 전부를 worksheet.batch_update 한 번으로 보냅니다.
+"""
+import json
+from dataclasses import dataclass
+
+import pandas as pd
+
+from rule_engine import rank_candidates, fallback_reason, is_yoga_family
+from structured_output import load_json
+
+MAX_REPEAT = 2      # 기간 전체에서 같은 운동 최대 횟수
+MAX_YOGA = 2        # 하루 요가 계열 최대 개수
+
+
+@dataclass
+class PlanDay:
+    label: str                  # 날짜 문자열 (프롬프트/응답에서 날짜 매칭용)
+    sheet_row: int              # daily 시트 행 번호 (1-based, 헤더 포함)
+    daily_row: object           # daily 행 (Series / dict)
+    candidates: pd.DataFrame    # 그 날의 1차 후보
+    purpose: str = ""
+    target_intensity: str = None
+
+
+def parse_plan(text, days):
+    """
+    LLM 응답 → 날짜 순서별 항목 목록 [[{"운동명", "이유"}, ...], ...] (검증 전, 후보 밖 이름만 제거).
+    날짜 문자열이 맞으면 그 날짜에, 아니면 응답 순서대로 배정.
+    """
+    out = [[] for _ in days]
+    try:
+        plan = load_json(text).get("plan", [])
+    except (ValueError, AttributeError):
+        return out
+    by_label = {d.label: i for i, d in enumerate(days)}
+    for order, item in enumerate(plan if isinstance(plan, list) else []):
+        if not isinstance(item, dict):
+            continue
+        i = by_label.get(str(item.get("date", "")).strip(), order)
+        if i >= len(days) or out[i]:
+            continue
+        allowed = set(days[i].candidates["운동명"])
+        entries = item.get("top3") or []
+        entries = sorted((e for e in entries if isinstance(e, dict)), key=lambda e: e["rank"] if isinstance(e.get("rank"), int) else 99)
+        out[i] = [
+            {"운동명": str(e.get("운동명", "")).strip(), "이유": str(e.get("이유", "")).strip()}
+            for e in entries if str(e.get("운동명", "")).strip() in allowed
+        ]
+    return out
+
+
+def finalize_plan(days, picks, avoid=()):
+    """
+    날짜 순서대로 다양성 규칙을 적용하고 빈 자리를 규칙 기반으로 채움.
+    반환: [[{"rank", "운동명", "이유", "규칙보충"}, ...] × 날짜 수]
+    avoid: 플랜 이전의 최근 추천 (처음 날짜들에서 순위를 낮춤)
+    """
+    counts = {}
+    previous = set()
+    plan = []
+    for day, entries in zip(days, picks):
+        chosen = []
+        yoga = 0
+        for e in entries:
+            name = e["운동명"]
+            if (name in previous or counts.get(name, 0) >= MAX_REPEAT
+                    or name in {c["운동명"] for c in chosen}):
+                continue
+            if is_yoga_family(name):
+                if yoga >= MAX_YOGA:
+                    continue
+                yoga += 1
+            chosen.append({"운동명": name, "이유": e["이유"], "규칙보충": False})
+            if len(chosen) == 3:
+                break
+
+        if len(chosen) < 3:
+            # 전날 운동 / 횟수 초과 운동은 빼고, 이미 쓴 운동과 최근 추천은 순위만 낮춤
+            blocked = previous | {n for n, c in counts.items() if c >= MAX_REPEAT}
+            taken = [c["운동명"] for c in chosen]
+            soft = list(avoid) + list(counts)
+            fill = rank_candidates(day.candidates, day.purpose, k=3 - len(chosen),
+                                   exclude=taken + sorted(blocked), max_yoga=MAX_YOGA, avoid=soft)
+            if len(fill) < 3 - len(chosen):
+                # 후보가 너무 적으면 다양성 제약을 풀고라도 3개를 채움
+                fill = rank_candidates(day.candidates, day.purpose, k=3 - len(chosen),
+                                       exclude=taken, max_yoga=MAX_YOGA, avoid=soft)
+            for row in fill:
+                chosen.append({
+                    "운동명": row["운동명"],
+                    "이유": fallback_reason(row, day.purpose, day.target_intensity),
+                    "규칙보충": True,
+                })
+
+        for rank, c in enumerate(chosen, start=1):
+            c["rank"] = rank
+            counts[c["운동명"]] = counts.get(c["운동명"], 0) + 1
+        previous = {c["운동명"] for c in chosen}
+        plan.append(chosen)
+    return plan
+
+
+def _a1(row, col):
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return f"{letters}{row}"
+
+
+def sheet_updates(days, plan, name_cols, reason_cols):
+    """
+    worksheet.batch_update 용 [{"range", "values"}] — 행마다 연속된 열은 한 범위로 묶음.
+    name_cols / reason_cols: 추천운동1~3 / 추천이유1~3 의 열 번호(1-based)
+    """
+    updates = []
+    for day, entries in zip(days, plan):
+        cells = {}
+        for i, e in enumerate(entries[:3]):
+            cells[name_cols[i]] = e["운동명"]
+            cells[reason_cols[i]] = e["이유"]
+        cols = sorted(cells)
+        start = 0
+        for k in range(1, len(cols) + 1):
+            if k == len(cols) or cols[k] != cols[k - 1] + 1:
+                run = cols[start:k]
+                rng = _a1(day.sheet_row, run[0])
+                if len(run) > 1:
+                    rng += ":" + _a1(day.sheet_row, run[-1])
+                updates.append({"range": rng, "values": [[cells[c] for c in run]]})
+                start = k
+    return updates
+
+
+if __name__ == "__main__":
+    # 7일 플랜: 하루씩 7번 vs 한 번에 — 호출 수 / 프롬프트 토큰 비교 (검증은 tests/test_plan_mode.py)
+    #   python plan_mode.py
+    from catalog import load_catalog
+    from emotion_model import EmotionWorkoutIndex, select_candidates
+    import prompt_builder
+    from prompt_builder import build_messages, build_plan_messages, count_message_tokens
+
+    workouts = load_catalog().to_frame()
+    workouts["운동목적_list"] = [[t.strip() for t in str(x).split(",") if t.strip()] for x in workouts["운동목적"]]
+    index = EmotionWorkoutIndex.from_catalog(workouts)
+    user = {"나이": 29, "성별": "여성", "키(cm)": 163, "몸무게(kg)": 55, "평소 활동량": "보통", "부상 여부": "없음"}
+    moods = ["기쁨, 신남", "피곤", "불안, 긴장", "차분함", "짜증", "우울", "활기참"]
+    purposes = ["체중 감량", "스트레스 해소", "체력 향상", "체형 교정"]
+
+    days = []
+    for i, mood in enumerate(moods):
+        row = {"감정": mood, "감정_평균각성점수": 3.0, "수면 시간": 7, "운동 가능 시간(분)": 30,
+               "스트레스": "보통", "운동목적": purposes[i % 4], "운동장소": "실내(집)", "보유장비": "요가매트"}
+        cands, target = select_candidates(workouts, index, mood, row["감정_평균각성점수"])
+        days.append(PlanDay(f"2025-03-{i + 1:02d}", i + 2, row, cands, row["운동목적"], target))
+
+    single = [count_message_tokens(build_messages(user, d.daily_row, "clear", 12.0, d.candidates)) for d in days]
+    single_total = sum(a + b for a, b in single)
+    plan_tokens = sum(count_message_tokens(build_plan_messages(
+        user, [(d.label, d.daily_row, d.candidates) for d in days], "clear", 12.0)))
+    n = len(days)
+    print(f"{n}일 플랜 프롬프트 ({'tiktoken' if prompt_builder._ENCODER else '근사치'})")
+    print(f"  하루씩: LLM {n}회, {single_total:,} tokens ({single_total / n:,.0f}/일)")
+    print(f"  한 번에: LLM 1회, {plan_tokens:,} tokens ({plan_tokens / n:,.0f}/일) → {single_total / plan_tokens:.1f}배 적음")
+
+    # LLM 이 규칙을 어긴 응답: 연속 반복 / 후보 밖 이름 / 빈 날짜
+    same = days[0].candidates["운동명"].iloc[0]
+    bad = {"plan": [
+        {"date": days[0].label, "top3": [{"rank": 1, "운동명": same, "이유": "a"}, {"rank": 2, "운동명": "없는운동", "이유": "b"}]},
+        {"date": days[1].label, "top3": [{"rank": 1, "운동명": same, "이유": "c"}]},
+    ]}
+    plan = finalize_plan(days, parse_plan(json.dumps(bad, ensure_ascii=False), days))
+    updates = sheet_updates(days, plan, [11, 12, 13], [14, 15, 16])
+    print(f"규칙 위반 응답 보정 (규칙 보충 {sum(e['규칙보충'] for day in plan for e in day)}개), "
+          f"시트 기록 batch_update 1회 / 범위 {len(updates)}개")
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+페이지 재실행 프로파일링 모드 (기본 꺼짐).
+
+켜는 방법
+- 주소 뒤에 ?profile=1  (세션에 기억되므로 다른 페이지로 옮겨도 유지, ?profile=0 으로 끔)
+- 환경변수 MOODFIT_PROFILE=1  (모든 세션)
+
+켜져 있으면 각 페이지 st.set_page_config 바로 뒤의 profile_page(__file__) 가 같은 페이지 파일을
+cProfile + tracemalloc 안에서 한 번 더 실행하고, 원래 실행은 거기서 끝냅니다(st.stop).
+재실행 한 번마다
+- .moodfit/profiles/<시각>-<페이지>.prof      : pstats 파일 (snakeviz / python -m pstats 로 열림)
+- .moodfit/profiles/index.jsonl               : ts, page, outcome, wall_ms, cpu_ms, peak_kb, alloc_top
+을 남기고, summarize() 가 여러 재실행/페이지의 함수별 누적 시간을 합쳐 보여줍니다 (5번 분석 페이지).
+
+- cProfile 은 스크립트 스레드만 봄: 이벤트 루프/스레드 풀에서 기다린 시간은 result()/iterate 안의 대기로 보임
+- tracemalloc 은 프로세스 전체라, 여러 세션이 동시에 프로파일링하면 peak 도 합쳐진 값
+- 파일은 KEEP_PROFILES 개까지만 보관 (오래된 것부터 삭제)
+
+    python profiling.py     # 추천 경로(카탈로그 → 후보 → 프롬프트)를 프로파일링해 요약 출력
+"""
+import os
+import glob
+import json
+import time
+import threading
+import tracemalloc
+from datetime import datetime
+
+import streamlit as st
+
+PROFILE_DIR = os.getenv("MOODFIT_PROFILE_DIR", os.path.join(".moodfit", "profiles"))
+KEEP_PROFILES = 300
+ALLOC_TOP = 5       # 재실행마다 남길 할당 상위 줄 수
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_local = threading.local()      # 지금 이 스레드가 프로파일 중인 페이지 (중첩 실행 방지)
+_trace_lock = threading.Lock()
+_trace_users = 0                # tracemalloc 을 쓰는 재실행 수 (마지막이 끝날 때만 stop)
+_trace_owned = False
+
+
+def enabled():
+    """?profile=1 / MOODFIT_PROFILE=1 (쿼리 파라미터는 세션에 기억)"""
+    if os.getenv("MOODFIT_PROFILE", "0").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        flag = st.query_params.get("profile")
+        if flag is not None:
+            st.session_state["_profile"] = flag.lower() in ("1", "true", "yes")
+        return bool(st.session_state.get("_profile", False))
+    except Exception:
+        return False    # streamlit 밖(python 직접 실행)
+
+
+def _page_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def outcome_of(exc):
+    """재실행이 끝난 방식: ok / stop(st.stop) / rerun(중간에 다시 실행) / error:이름"""
+    if exc is None:
+        return "ok"
+    name = type(exc).__name__
+    if name == "StopException":
+        return "stop"
+    if name == "RerunException":
+        return "rerun"
+    return f"error:{name}"
+
+
+# ========================= tracemalloc 공유 =========================
+def _trace_start():
+    global _trace_users, _trace_owned
+    with _trace_lock:
+        if _trace_users == 0:
+            # 밖에서 이미 켜 둔 경우(-X tracemalloc)는 끄지도 않음
+            _trace_owned = not tracemalloc.is_tracing()
+            if _trace_owned:
+                tracemalloc.start()
+        _trace_users += 1
+        tracemalloc.reset_peak()
+
+
+def _trace_stop():
+    global _trace_users
+    with _trace_lock:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_owned:
+            tracemalloc.stop()
+    return current, peak, snapshot
+
+
+def _alloc_top(snapshot, limit=ALLOC_TOP):
+    """재실행이 끝날 때 남아 있는 할당 상위 줄 (파일:줄 크기)"""
+    stats = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen *>"),
+    )).statistics("lineno")
+    out = []
+    for s in stats[:limit]:
+        frame = s.traceback[0]
+        out.append(f"{_short_path(frame.filename)}:{frame.lineno} {s.size / 1024:.0f}KB")
+    return out
+
+
+# ========================= 저장소 =========================
+class ProfileStore:
+    def __init__(self, directory=PROFILE_DIR, keep=KEEP_PROFILES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.keep = keep
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self._lock = threading.Lock()
+
+    def save(self, page, profiler, **meta):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(self.directory, f"{stamp}-{page}.prof")
+        profiler.dump_stats(path)
+        entry = {"ts": datetime.now().isoformat(timespec="milliseconds"), "page": page,
+                 "file": os.path.basename(path), **meta}
+        with self._lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            profiles = sorted(glob.glob(os.path.join(self.directory, "*.prof")))
+            for old in profiles[:-self.keep]:
+                os.remove(old)
+        return entry
+
+    def load_index(self, page=None):
+        """재실행 목록 DataFrame (.prof 파일이 남아 있는 것만)"""
+        # pandas 는 조회할 때만 (profile_page 는 모든 페이지 첫 줄에서 import 되므로 가볍게 유지)
+        import pandas as pd
+
+        rows = []
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return df
+        df = df[df["file"].map(lambda name: os.path.exists(os.path.join(self.directory, name)))]
+        if page is not None:
+            df = df[df["page"] == page]
+        return df.reset_index(drop=True)
+
+    def page_summary(self, index=None):
+        """페이지별 재실행 수 / 경과 p50·p95 / 메모리 peak 최대"""
+        import pandas as pd
+
+        df = self.load_index() if index is None else index
+        if df.empty:
+            return pd.DataFrame()
+        g = df.groupby("page", sort=True)
+        return pd.DataFrame({
+            "재실행": g.size(),
+            "p50_ms": g["wall_ms"].quantile(0.5).round(0),
+            "p95_ms": g["wall_ms"].quantile(0.95).round(0),
+            "peak_MB": (g["peak_kb"].max() / 1024).round(1),
+        }).reset_index()
+
+    def summarize(self, index=None, own_only=True, top=20):
+        """
+        함수별 누적 시간 (여러 재실행/페이지 합산, 누적 시간 큰 순).
+        own_only: 앱 코드(이 폴더의 .py, 가상환경 제외)의 함수만
+        """
+        import pstats
+        import pandas as pd
+
+        df = self.load_index() if index is None else index
+        if df.empty:
+            return pd.DataFrame()
+        agg = {}
+        for name, page in zip(df["file"], df["page"]):
+            try:
+                stats = pstats.Stats(os.path.join(self.directory, name)).stats
+            except (OSError, EOFError, TypeError, ValueError):
+                continue
+            for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.items():
+                if own_only and not _is_app_file(filename):
+                    continue
+                a = agg.setdefault((filename, line, func), {"pages": set(), "reruns": 0, "calls": 0,
+                                                            "tottime": 0.0, "cumtime": 0.0})
+                a["pages"].add(page)
+                a["reruns"] += 1
+                a["calls"] += ncalls
+                a["tottime"] += tottime
+                a["cumtime"] += cumtime
+        if not agg:
+            return pd.DataFrame()
+        out = pd.DataFrame([
+            {
+                "함수": func,
+                "위치": f"{_short_path(filename)}:{line}",
+                "페이지": ", ".join(sorted(a["pages"])),
+                "재실행": a["reruns"],
+                "호출": a["calls"],
+                "누적_s": round(a["cumtime"], 3),
+                "재실행당_ms": round(a["cumtime"] / a["reruns"] * 1000, 1),
+                "자체_s": round(a["tottime"], 3),
+            }
+            for (filename, line, func), a in agg.items()
+        ])
+        return out.sort_values("누적_s", ascending=False).head(top).reset_index(drop=True)
+
+
+def _is_app_file(filename):
+    if not filename.endswith(".py"):
+        return False    # 내장 함수 ("~")
+    path = os.path.abspath(filename)
+    return (path.startswith(APP_DIR + os.sep) and "site-packages" not in path
+            and os.sep + "." not in path[len(APP_DIR):])
+
+
+def _short_path(filename):
+    path = os.path.abspath(filename)
+    return os.path.relpath(path, APP_DIR) if path.startswith(APP_DIR + os.sep) else filename
+
+
+@st.cache_resource
+def get_profile_store():
+    """프로세스 공용 저장소 (여러 세션이 같이 씀)"""
+    return ProfileStore()
+
+
+# ========================= 재실행 프로파일 =========================
+class RerunProfile:
+    """
+    with RerunProfile("3_recommendation") as prof:
+        ...
+    블록 하나를 cProfile + tracemalloc 으로 감싸고 끝나면 저장 (예외는 그대로 올라감).
+    """
+
+    def __init__(self, page, store=None):
+        self.page = page
+        self.store = store
+        self.entry = None
+
+    def __enter__(self):
+        import cProfile
+
+        _trace_start()
+        self.profiler = cProfile.Profile()
+        self._t0, self._c0 = time.perf_counter(), time.process_time()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.disable()
+        wall = time.perf_counter() - self._t0
+        cpu = time.process_time() - self._c0
+        current, peak, snapshot = _trace_stop()
+        try:
+            store = self.store or get_profile_store()
+            self.entry = store.save(
+                self.page, self.profiler, outcome=outcome_of(exc),
+                wall_ms=round(wall * 1000, 1), cpu_ms=round(cpu * 1000, 1),
+                peak_kb=round(peak / 1024, 1), current_kb=round(current / 1024, 1),
+                alloc_top=_alloc_top(snapshot),
+            )
+        except OSError:
+            pass    # 저장 실패가 페이지를 막지 않게
+        return False
+
+
+def profile_page(path):
+    """
+    각 페이지 st.set_page_config 바로 뒤에서 profile_page(__file__) (페이지 설정이 첫 Streamlit 호출이 되도록).
+    다시 실행되는 페이지가 set_page_config 를 한 번 더 부르는 것은 Streamlit 이 허용.
+    꺼져 있거나 이미 프로파일 안에서 실행 중이면 아무것도 안 함.
+    켜져 있으면 페이지 파일을 프로파일러 안에서 다시 실행한 뒤 st.stop() 으로 원래 실행을 끝냄.
+    """
+    if getattr(_local, "page", None) is not None or not enabled():
+        return
+    page = _page_name(path)
+    with open(path, encoding="utf-8") as f:
+        code = compile(f.read(), path, "exec")
+    _local.page = page
+    prof = RerunProfile(page)
+    try:
+        with prof:
+            exec(code, {"__name__": "__main__", "__file__": path, "__builtins__": __builtins__})
+    finally:
+        _local.page = None
+    if prof.entry:
+        e = prof.entry
+        st.caption(f"🔬 프로파일 {page}: {e['wall_ms']:.0f}ms (CPU {e['cpu_ms']:.0f}ms), "
+                   f"메모리 peak {e['peak_kb'] / 1024:.1f}MB → {os.path.join(PROFILE_DIR, e['file'])}")
+    st.stop()
+
+
+if __name__ == "__main__":
+    # 추천 페이지의 순수 계산 경로를 재실행처럼 프로파일링해 저장/요약 확인 (검증은 tests/test_profiling.py)
+    #   python profiling.py
+    import shutil
+    import tempfile
+    from catalog import load_catalog
+    from emotion_model import EmotionWorkoutIndex, select_candidates
+    from prompt_builder import build_messages
+    from typed_tables import typed_daily
+
+    tmp = tempfile.mkdtemp()
+    store = ProfileStore(tmp, keep=4)
+    user = {"나이": 29, "성별": "여성", "키(cm)": 163, "몸무게(kg)": 55, "평소 활동량": "보통", "부상 여부": "없음"}
+    header = ["날짜", "이름", "감정", "감정_평균각성점수", "수면 시간", "운동 가능 시간(분)",
+              "스트레스", "운동목적", "운동장소", "보유장비"]
+    raw = [header] + [[f"2025-03-{i % 28 + 1:02d}", f"user{i % 50}", "피곤", "2.5", "6", "30",
+                       "보통", "체중 감량", "실내(집)", "요가매트"] for i in range(20000)]
+
+    def rerun():
+        workouts = load_catalog().to_frame()
+        workouts["운동목적_list"] = [[t.strip() for t in str(x).split(",") if t.strip()] for x in workouts["운동목적"]]
+        index = EmotionWorkoutIndex.from_catalog(workouts)
+        daily = typed_daily(raw)
+        row = daily.iloc[-1]
+        cands, _ = select_candidates(workouts, index, row["감정"], row["감정_평균각성점수"])
+        return build_messages(user, row, "clear", 12.0, cands)
+
+    rerun()     # 카탈로그 캐시 등 첫 실행 비용은 빼고 비교
+    t0 = time.perf_counter()
+    rerun()
+    plain = time.perf_counter() - t0
+    for _ in range(6):
+        with RerunProfile("3_recommendation", store) as prof:
+            rerun()
+
+    print(f"프로파일 없이 {plain * 1000:.0f}ms / 프로파일 중 {prof.entry['wall_ms']:.0f}ms, "
+          f"메모리 peak {prof.entry['peak_kb'] / 1024:.1f}MB")
+    print(store.page_summary().to_string(index=False))
+    print(store.summarize(top=8)[["함수", "위치", "호출", "재실행당_ms"]].to_string(index=False))
+    print("할당 상위:", prof.entry["alloc_top"][:3])
+    shutil.rmtree(tmp)
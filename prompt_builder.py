@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+Top3 추천 프롬프트 빌더.
+
+- SYSTEM_PROMPT 는 요청마다 바뀌지 않는 고정 문자열입니다.
+  (f-string 이 아니므로 바이트 단위로 항상 같고, 프롬프트 캐시에 걸릴 수 있음)
+- 요청마다 바뀌는 부분(프로필/컨디션/후보군)은 user 메시지에
+  "키=값" 한 줄 + "|" 구분 표 형태로 압축해서 넣습니다.
+- 규칙에 쓰이지 않는 컬럼(이름, 날짜, 이전 추천 결과 등)은 보내지 않습니다.
+
+실행 예: python prompt_builder.py  → 번들 카탈로그 기준 기존 JSON 대비 토큰 수 비교
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+
+# ========================= 고정 시스템 프롬프트 =========================
+SYSTEM_PROMPT = """당신은 개인 맞춤 운동 추천 엔진입니다.
+
+입력은 아래 형식의 텍스트 한 덩어리로 주어집니다.
+
+[정적프로필] 키=값;키=값;...
+- users 시트의 정보 중 추천에 필요한 항목만 들어 있습니다.
+  (나이, 성별, 키, 몸무게, 평소 활동량, 부상 여부, 부상 부위)
+
+[오늘컨디션] 키=값;키=값;...
+- daily 시트에서 사용자가 오늘 입력한 컨디션 정보입니다.
+  (감정, 감정_평균각성점수, 수면 시간, 운동 가능 시간(분), 스트레스, 운동목적, 운동장소, 보유장비)
+
+[환경정보] 날씨=...;기온_C=...
+- 날씨(clear, clouds, rain 등)와 섭씨 기온입니다.
+
+[최근이력] 키=값;... (기록이 있을 때만)
+- 최근 7일 수면 평균, 각성점수 평균/표준편차, 스트레스 추세(양수=상승), 최근추천(쉼표 구분)입니다.
+
+[rule_candidates] 운동명|운동목적|운동강도
+- 그 다음 줄부터 후보 운동이 한 줄에 하나씩 "|"로 구분되어 나옵니다.
+- 모든 후보의 강도가 같으면 "운동강도" 열 대신 헤더 줄 끝에 "(운동강도=중강도 공통)"처럼 표시됩니다.
+- **이미 오늘 감정(쾌-불쾌 × 각성)과 운동의 감정매핑/운동강도 친화도로 1차 필터링된** 운동 목록입니다.
+
+당신의 역할:
+- 오늘 이 사용자에게 가장 적합한 운동 3가지를 **rule_candidates 안에서만** 선택하세요.
+
+[우선순위 규칙: 운동목적 > 그 외 요소]
+- 사용자가 오늘 선택한 운동목적([오늘컨디션]의 운동목적)을 **가장 우선으로** 충족해야 합니다.
+- 즉, **Top3는 가능하면 모두 운동목적에 부합하는 운동으로 구성**하세요.
+- 단, 아래 안전/현실 제약(부상/시간/장소/장비/수면/스트레스)이 크게 충돌하면
+  목적 부합도를 일부 낮추더라도 더 안전하고 실행 가능한 운동을 우선할 수 있습니다.
+
+[감정/각성점수 활용]
+- rule_candidates는 이미 감정(쾌-불쾌 × 각성) 기반 필터가 적용되어 있습니다.
+  (예: 분노/불안처럼 불쾌·고각성이면 진정에 도움이 되는 중간 강도, 신남처럼 쾌·고각성이면 고강도)
+- 따라서 여기서는:
+  - 감정(정서적 상태) + 각성점수를 근거로 "왜 이 강도가 적절한지"를 이유에 구체적으로 설명하고,
+  - 동일 목적 내에서 '기분전환/긴장완화/에너지회복' 등 감정에 맞는 운동을 상위에 두세요.
+
+[정적 정보 활용]
+- 나이/성별/키/몸무게/활동량/부상 여부·부상 부위 반영:
+  - 부상 부위를 악화시키는 동작은 제외하거나 순위 낮춤
+  - 활동량이 낮은 경우 과도한 자극은 피함
+
+[오늘 컨디션(동적 정보)]
+- 수면 부족 + 스트레스 높음 → 강도/볼륨(부담) 자동 하향(가능 범위 내)
+- 운동 가능 시간 짧음 → 짧게 끝낼 수 있는 운동 우선
+- 운동장소/보유장비가 가능한 운동을 우선(집+장비없음→맨몸/매트 등)
+
+[최근이력]
+- 최근추천에 있는 운동은 가능하면 반복하지 말고 다른 운동을 우선
+- 7일 수면 평균이 낮거나 스트레스 추세가 상승 중이면 회복/부담 낮은 운동을 우선
+- 각성점수 표준편차가 크면(기분 변동이 큼) 감정 안정에 도움이 되는 운동을 고려
+
+[환경정보]
+- 비/폭염/한파 등 → 실내운동 우선
+- 맑고 온화 → 가벼운 야외 유산소 고려 가능
+
+출력 형식:
+- 반드시 아래 JSON 하나의 객체만 출력
+- 설명 문장/마크다운/코드블록 없이 JSON만 출력
+
+{
+  "top3": [
+    {
+      "rank": 1,
+      "운동명": "운동 이름",
+      "이유": "운동목적을 1순위로 충족하는 근거 + 감정/각성점수 + 수면/스트레스 + 시간/장소/장비 + 부상 + 날씨를 종합해 2~4문장"
+    },
+    ...
+  ]
+}
+
+규칙:
+- 반드시 3개만 추천
+- 운동명은 rule_candidates 안에 존재하는 것만 사용
+- 요가 계열(요가/스트레칭/필라테스 등)은 중복되지 않도록 하며, 전체 2개 이하
+- 이유는 실제 입력값(감정, 각성점수, 수면시간, 스트레스, 시간, 장소/장비 등)을 반영해 구체적으로 작성
+"""
+
+
+# ========================= 프로필 가지치기 =========================
+# 시스템 프롬프트 규칙에서 실제로 쓰는 항목만 (시트 헤더의 "(cm)" 같은 꼬리는 허용)
+USER_FIELDS = ("나이", "성별", "키", "몸무게", "평소 활동량", "부상 여부", "부상 부위")
+DAILY_FIELDS = (
+    "감정", "감정_평균각성점수", "수면 시간", "운동 가능 시간",
+    "스트레스", "운동목적", "운동장소", "보유장비",
+)
+
+
+def _norm_key(key):
+    return str(key).replace(" ", "").split("(")[0]
+
+
+def prune_fields(row, fields):
+    """row(dict / Series)에서 fields 에 해당하는 값만 선언 순서대로 남김 (빈 값 제외)"""
+    if hasattr(row, "to_dict"):
+        row = row.to_dict()
+
+    by_norm = {}
+    for k, v in row.items():
+        by_norm.setdefault(_norm_key(k), (k, v))
+
+    out = {}
+    for f in fields:
+        hit = by_norm.get(_norm_key(f))
+        if hit is None:
+            continue
+        k, v = hit
+        if v is None or (pd.api.types.is_scalar(v) and pd.isna(v)) or str(v).strip() == "":
+            continue
+        out[k] = v
+    return out
+
+
+# ========================= 압축 인코딩 =========================
+def _cell(x):
+    """표 구분자("|", ";", 줄바꿈)가 값 안에 섞이지 않도록 정리 (숫자는 7.0 → 7 처럼 짧게)"""
+    if isinstance(x, (float, np.floating)):
+        s = f"{float(x):g}"
+    else:
+        s = "" if x is None else str(x)
+    return " ".join(s.replace("|", "/").replace(";", ",").split())
+
+
+def encode_kv(tag, data: dict):
+    return f"[{tag}] " + ";".join(f"{_cell(k)}={_cell(v)}" for k, v in data.items())
+
+
+def encode_candidates(df: pd.DataFrame):
+    """
+    후보군 DataFrame → "운동명|운동목적|운동강도" 표.
+    강도가 모두 같으면(각성점수 필터 후 보통 그렇습니다) 강도 열을 헤더로 올립니다.
+    """
+    names = df["운동명"].map(_cell)
+    purposes = df["운동목적"].map(_cell) if "운동목적" in df.columns else pd.Series("", index=df.index)
+    purposes = purposes.str.replace(", ", ",", regex=False)
+
+    intensity = df["운동강도"].map(_cell) if "운동강도" in df.columns else None
+    if intensity is not None and intensity.nunique() == 1:
+        header = f"[rule_candidates] 운동명|운동목적 (운동강도={intensity.iloc[0]} 공통)"
+        lines = names + "|" + purposes
+    elif intensity is not None:
+        header = "[rule_candidates] 운동명|운동목적|운동강도"
+        lines = names + "|" + purposes + "|" + intensity
+    else:
+        header = "[rule_candidates] 운동명|운동목적"
+        lines = names + "|" + purposes
+
+    return "\n".join([header, *lines.tolist()])
+
+
+def encode_history(history):
+    """feature_store 요약 → [최근이력] 한 줄 (값이 없는 항목은 생략, 없으면 None)"""
+    data = {}
+    for k, v in (history or {}).items():
+        if isinstance(v, (list, tuple)):
+            v = ",".join(str(x) for x in v)
+        if v is None or v == "":
+            continue
+        data[k] = v
+    if not data or set(data) == {"기록일수_7일"}:
+        return None
+    return encode_kv("최근이력", data)
+
+
+def build_user_message(user_row, daily_row, weather, temp, candidates_df, history=None):
+    lines = [
+        encode_kv("정적프로필", prune_fields(user_row, USER_FIELDS)),
+        encode_kv("오늘컨디션", prune_fields(daily_row, DAILY_FIELDS)),
+        encode_kv("환경정보", {"날씨": weather, "기온_C": temp}),
+    ]
+    history_line = encode_history(history)
+    if history_line:
+        lines.append(history_line)
+    lines.append(encode_candidates(candidates_df))
+    return "\n".join(lines)
+
+
+def build_messages(user_row, daily_row, weather, temp, candidates_df, history=None, system_prompt=SYSTEM_PROMPT):
+    """chat.completions 용 messages (system 은 항상 같은 객체, replay.py 에서만 프롬프트 변형을 넘김)"""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": build_user_message(
+            user_row, daily_row, weather, temp, candidates_df, history=history
+        )},
+    ]
+
+
+# ========================= 플랜 모드 (여러 날짜 한 번에) =========================
+PLAN_SYSTEM_PROMPT = """당신은 개인 맞춤 운동 추천 엔진입니다. 여러 날짜의 Top3 를 한 번에 계획합니다.
+
+입력은 아래 형식의 텍스트 한 덩어리로 주어집니다.
+
+[정적프로필] 키=값;... (나이, 성별, 키, 몸무게, 평소 활동량, 부상 여부, 부상 부위)
+[환경정보] 날씨=...;기온_C=... (오늘 기준, 다른 날짜에는 참고만)
+[최근이력] 키=값;... (기록이 있을 때만: 최근 수면/각성/스트레스 추세, 최근추천)
+[rule_candidates] 번호|운동명|운동목적|운동강도
+- 모든 날짜의 후보를 합친 표입니다. 한 줄에 하나, 번호로 참조합니다.
+[day1] 날짜=...;감정=...;감정_평균각성점수=...;수면 시간=...;운동 가능 시간=...;스트레스=...;운동목적=...;운동장소=...;보유장비=...;후보=1-12,15,20
+- 그 날짜의 컨디션과, 그 날짜에 고를 수 있는 후보 번호입니다 ("1-12" 는 1~12번).
+- 후보는 이미 그 날의 감정(쾌-불쾌 × 각성)과 운동 친화도로 1차 필터링되어 있습니다.
+
+당신의 역할:
+- [dayN] 마다 그 날짜의 후보 번호 안에서만 Top3 를 고르세요.
+
+[하루 단위 규칙 (하루 추천과 동일)]
+- 그 날의 운동목적을 가장 우선으로 충족 (가능하면 Top3 모두 목적에 부합)
+- 부상/수면 부족/높은 스트레스/짧은 운동 시간/장소·장비 제약이 크게 충돌하면 더 안전하고 실행 가능한 운동 우선
+- 감정과 각성점수를 근거로 강도를 설명하고, 최근추천에 있는 운동은 가능하면 피함
+- 요가 계열(요가/스트레칭/필라테스 등)은 하루 2개 이하
+
+[여러 날 다양성 규칙]
+- 같은 운동을 바로 이어지는 두 날짜에 추천하지 않음
+- 기간 전체에서 한 운동은 최대 2번까지
+- 가능하면 날짜마다 주로 쓰는 부위/운동 종류가 겹치지 않게 고르게 배치
+
+출력 형식:
+- 반드시 아래 JSON 하나의 객체만 출력 (설명/마크다운/코드블록 없이)
+{
+  "plan": [
+    {"date": "[dayN]의 날짜 그대로", "top3": [
+      {"rank": 1, "운동명": "운동 이름", "이유": "그 날의 목적 + 감정/각성 + 컨디션을 반영한 1~2문장"},
+      ...
+    ]},
+    ...
+  ]
+}
+
+규칙:
+- [dayN] 하나마다 plan 항목 하나, 항목마다 정확히 3개
+- 운동명은 rule_candidates 의 운동명을 그대로 사용 (번호가 아니라 이름)
+"""
+
+
+def _ranges(numbers):
+    """[1,2,3,5,7,8] → '1-3,5,7-8' (후보 번호 목록을 짧게)"""
+    out = []
+    nums = sorted(numbers)
+    i = 0
+    while i < len(nums):
+        j = i
+        while j + 1 < len(nums) and nums[j + 1] == nums[j] + 1:
+            j += 1
+        out.append(str(nums[i]) if i == j else f"{nums[i]}-{nums[j]}")
+        i = j + 1
+    return ",".join(out)
+
+
+def build_plan_user_message(user_row, days, weather, temp, history=None):
+    """
+    days: [(날짜 문자열, daily 행, 후보 DataFrame), ...]
+    후보 표는 모든 날짜의 합집합을 한 번만 보내고, 날짜별로는 번호 목록만 보냄.
+    """
+    union = pd.concat([cands for _, _, cands in days]).drop_duplicates("운동명")
+    number = {name: i + 1 for i, name in enumerate(union["운동명"])}
+
+    names = union["운동명"].map(_cell)
+    purposes = union["운동목적"].map(_cell).str.replace(", ", ",", regex=False) \
+        if "운동목적" in union.columns else pd.Series("", index=union.index)
+    intensity = union["운동강도"].map(_cell) if "운동강도" in union.columns else pd.Series("", index=union.index)
+    numbers = pd.Series(range(1, len(union) + 1), index=union.index).astype(str)
+    table = "\n".join([
+        "[rule_candidates] 번호|운동명|운동목적|운동강도",
+        *(numbers + "|" + names + "|" + purposes + "|" + intensity).tolist(),
+    ])
+
+    lines = [
+        encode_kv("정적프로필", prune_fields(user_row, USER_FIELDS)),
+        encode_kv("환경정보", {"날씨": weather, "기온_C": temp}),
+    ]
+    history_line = encode_history(history)
+    if history_line:
+        lines.append(history_line)
+    lines.append(table)
+    for i, (label, daily_row, cands) in enumerate(days):
+        fields = {"날짜": label, **prune_fields(daily_row, DAILY_FIELDS)}
+        fields["후보"] = _ranges(number[n] for n in cands["운동명"])
+        lines.append(encode_kv(f"day{i + 1}", fields))
+    return "\n".join(lines)
+
+
+def build_plan_messages(user_row, days, weather, temp, history=None):
+    """플랜 모드 messages (system 은 항상 같은 PLAN_SYSTEM_PROMPT)"""
+    return [
+        {"role": "system", "content": PLAN_SYSTEM_PROMPT},
+        {"role": "user", "content": build_plan_user_message(user_row, days, weather, temp, history)},
+    ]
+
+
+# ========================= 토큰 수 =========================
+_ENCODER = None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """
+    tiktoken 이 있으면 정확한 토큰 수, 없으면 UTF-8 바이트/4 근사치.
+    (한글 1글자 = 3바이트 → 대략 0.75 토큰)
+    """
+    global _ENCODER
+    if _ENCODER is None:
+        # tiktoken 은 처음 셀 때만 import (페이지 첫 로딩에 포함되지 않게)
+        try:
+            import tiktoken
+            try:
+                _ENCODER = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _ENCODER = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            # tiktoken 이 없거나, 인코딩 파일을 내려받을 수 없는 환경(오프라인) → 근사치 사용
+            _ENCODER = False
+    if _ENCODER:
+        return len(_ENCODER.encode(text))
+    return max(1, round(len(text.encode("utf-8")) / 4))
+
+
+def count_message_tokens(messages, model: str = "gpt-4o-mini"):
+    """(고정 prefix 토큰, 가변 부분 토큰)"""
+    static = sum(count_tokens(m["content"], model) for m in messages if m["role"] == "system")
+    dynamic = sum(count_tokens(m["content"], model) for m in messages if m["role"] != "system")
+    return static, dynamic
+
+
+# ========================= 기존 방식과 비교 =========================
+def legacy_candidates_json(df: pd.DataFrame):
+    """이전 페이지가 보내던 형태 (운동마다 키를 반복하는 JSON 객체 리스트)"""
+    rows = [
+        {"운동명": r["운동명"], "운동목적": r.get("운동목적", ""), "운동강도": r.get("운동강도", "")}
+        for _, r in df.iterrows()
+    ]
+    return json.dumps(rows, ensure_ascii=False, default=str)
+
+
+if __name__ == "__main__":
+    # 감소율 표 (검증은 tests/test_prompt_builder.py)
+    from catalog import load_catalog
+
+    catalog = load_catalog().to_frame()
+    catalog["운동강도"] = catalog["운동강도"].astype(str).str.strip()
+
+    print(f"{'후보군':<8}{'행수':>6}{'기존 JSON':>12}{'압축 표':>10}{'감소율':>8}")
+    groups = [("전체", catalog)] + [(k, g) for k, g in catalog.groupby("운동강도")]
+    for label, df in groups:
+        before = count_tokens(legacy_candidates_json(df))
+        after = count_tokens(encode_candidates(df))
+        print(f"{label:<8}{len(df):>6}{before:>12}{after:>10}{1 - after / before:>8.0%}")
+
+    print(f"고정 시스템 프롬프트: {count_tokens(SYSTEM_PROMPT)} tokens"
+          f" ({'tiktoken' if _ENCODER else '근사치'})")
@@ -0,0 +1,503 @@
+# -*- coding: utf-8 -*-
+"""
+오프라인 리플레이: 저장해 둔 daily / evaluation 시트로 추천 엔진 비교.
+
+각성점수 → 운동강도 컷(emotion_model.AROUSAL_CUTS)이나 프롬프트를 바꿔 볼 때
+앱을 직접 눌러 보지 않고 과거 daily 행 전체에 엔진을 다시 돌려서 비교합니다.
+
+엔진
+- rule        : rule_engine.rank_candidates (LLM 실패 시 대체 경로와 같은 규칙)
+- retrieval   : workout_search 인덱스 (감정 + 운동목적을 질의로, 1차 후보 안에서 Top3)
+- llm:<변형>  : 프롬프트 변형(base = prompt_builder.SYSTEM_PROMPT)으로 만든 messages 를
+                녹화된 응답(responses.jsonl)에서 찾아 재생. 녹화에 없는 행은 "미적중"으로 집계
+                (--record 로 실제 API 를 한 번 호출해 녹화를 채울 수 있음)
+
+지표
+- 과거 Top3 와의 일치: Top1 일치율, 평균 겹침(|예측 ∩ 과거| / 3), 세트 일치율
+- evaluation 평점과의 상관: 평가된 운동이 엔진 Top3 에도 들어가는지(0/1)와 평점의 점이연 상관,
+  포함/제외 평균 평점
+
+1차 후보군은 추천 페이지와 같은 emotion_model.candidate_positions 를 쓰고,
+행들은 청크로 나눠 프로세스 풀에서 처리합니다 (워커마다 카탈로그/인덱스를 한 번만 로드,
+같은 입력 조합은 워커 안에서 메모이즈).
+
+    python replay.py --export                       # 시트 → .moodfit/replay/*.csv
+    python replay.py rule retrieval llm:base        # 엔진별 지표
+    python replay.py rule --cuts 2.2,3.8            # 강도 컷 바꿔 보기
+    python replay.py llm:short --prompt short=short.txt --record
+    python replay.py --bench 20000                  # 합성 데이터로 처리량 측정
+
+날씨는 daily 시트에 남지 않으므로 llm 엔진은 날씨 unknown 으로 messages 를 만듭니다.
+"""
+import os
+import csv
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from catalog import load_catalog
+from emotion_model import (
+    AROUSAL_CUTS, EmotionWorkoutIndex, candidate_positions, infer_target_intensity_from_arousal,
+    selection_matrix,
+)
+from energy import kcal_matrix, parse_weight_kg
+from eval_analytics import RATING_COLUMNS, QUESTIONS
+from sheet_schema import RECOMMEND_COLUMNS, SheetLayout
+from feature_store import RECENT_WORKOUTS
+from llm_stream import Top3StreamParser
+from prompt_builder import SYSTEM_PROMPT, build_messages
+from rule_engine import KCAL_PURPOSES, is_yoga_family, normalize_tag, purpose_mask, rank_positions
+from workout_search import load_or_build as load_search_index
+
+REPLAY_DIR = os.getenv("MOODFIT_REPLAY_DIR", os.path.join(".moodfit", "replay"))
+SHEETS = ("daily", "evaluation", "users")
+LOCAL_ENGINES = ("rule", "retrieval")
+CHUNK_SIZE = 500
+LLM_MODEL = "gpt-4o-mini"
+
+
+# ========================= 시트 export / 불러오기 =========================
+def export_sheets(out_dir=REPLAY_DIR, sheet_name="MoodFit"):
+    """daily / evaluation / users 시트를 get_all_values() 그대로 CSV 로 저장"""
+    from sheets_auth import connect_gsheet
+
+    sh = connect_gsheet(sheet_name)
+    os.makedirs(out_dir, exist_ok=True)
+    for sheet in SHEETS:
+        values = sh.worksheet(sheet).get_all_values()
+        with open(os.path.join(out_dir, f"{sheet}.csv"), "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows(values)
+        print(f"{sheet}: {max(len(values) - 1, 0)}행 → {out_dir}")
+
+
+def load_export(out_dir=REPLAY_DIR):
+    """{시트: get_all_values() 형태의 행 목록} (없는 시트는 빈 목록)"""
+    out = {}
+    for sheet in SHEETS:
+        path = os.path.join(out_dir, f"{sheet}.csv")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8", newline="") as f:
+                out[sheet] = list(csv.reader(f))
+        else:
+            out[sheet] = []
+    return out
+
+
+def _frame(values):
+    """get_all_values() → 문자열 DataFrame (짧은 행은 빈 문자열로 채움)"""
+    if not values:
+        return pd.DataFrame()
+    header, rows = values[0], values[1:]
+    width = len(header)
+    rows = [list(r[:width]) + [""] * (width - len(r[:width])) for r in rows]
+    return pd.DataFrame(rows, columns=header, dtype=object)
+
+
+def _find_col(columns, name):
+    """'운동 가능 시간' / '운동 가능 시간(분)' 처럼 단위 표기만 다른 헤더도 찾음"""
+    key = name.replace(" ", "")
+    return next((c for c in columns if str(c).replace(" ", "").startswith(key)), None)
+
+
+def build_cases(daily_values, users_values=()):
+    """
+    daily 행 → 엔진 입력(case dict) 목록.
+    최근추천은 같은 사용자의 이전 기록(날짜순) Top3 를 feature_store 와 같은 개수만큼.
+    """
+    daily = _frame(daily_values)
+    if daily.empty:
+        return []
+    users = _frame(users_values)
+    user_rows = {}
+    if not users.empty:
+        for rec in users.to_dict("records"):
+            user_rows.setdefault(str(rec.get("이름", "")).strip(), rec)
+    weight_col = _find_col(users.columns, "몸무게") if not users.empty else None
+    minutes_col = _find_col(daily.columns, "운동 가능 시간")
+
+    daily["_name"] = daily["이름"].astype(str).str.strip()
+    daily["_date"] = pd.to_datetime(daily["날짜"], errors="coerce")
+    rec_cols = [c for c in ("추천운동1", "추천운동2", "추천운동3") if c in daily.columns]
+
+    cases = []
+    recent = {}
+    for row in daily.sort_values(["_name", "_date"], kind="stable").to_dict("records"):
+        name = row["_name"]
+        past = [str(row[c]).strip() for c in rec_cols if str(row[c]).strip()]
+        user = user_rows.get(name, {})
+        cases.append({
+            "key": (str(row["날짜"]), name),
+            "emotions": str(row.get("감정", "")),
+            "arousal": row.get("감정_평균각성점수", ""),
+            "purpose": str(row.get("운동목적", "")).strip(),
+            "minutes": row.get(minutes_col, "") if minutes_col else "",
+            "weight": user.get(weight_col, "") if weight_col else "",
+            "past": past,
+            "avoid": tuple(recent.get(name, ())),
+            "daily": {k: v for k, v in row.items() if not str(k).startswith("_")},
+            "user": user,
+        })
+        recent[name] = (list(recent.get(name, ())) + past)[-RECENT_WORKOUTS:]
+    return cases
+
+
+# ========================= 녹화된 LLM 응답 =========================
+def messages_key(messages, model=LLM_MODEL):
+    """messages 내용 해시 (같은 프롬프트 + 같은 입력이면 같은 키)"""
+    raw = json.dumps([model, messages], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseStore:
+    """{"key", "response"} JSON 한 줄씩 쌓는 녹화 파일 (같은 키는 마지막 값 사용)"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(REPLAY_DIR, "responses.jsonl")
+        self._lock = threading.Lock()
+        self.responses = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # 기록 도중 끊긴 마지막 줄
+                    self.responses[rec["key"]] = rec["response"]
+
+    def get(self, messages):
+        return self.responses.get(messages_key(messages))
+
+    def record(self, messages, response):
+        key = messages_key(messages)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "response": response}, ensure_ascii=False) + "\n")
+            self.responses[key] = response
+
+
+# ========================= 엔진 (워커 프로세스 안에서 실행) =========================
+class ReplayState:
+    """워커마다 한 번만 만드는 카탈로그 / 인덱스 / 녹화 응답 + 입력 조합별 메모"""
+
+    def __init__(self, cuts=AROUSAL_CUTS, prompts=None, store_path=None):
+        self.cuts = tuple(cuts)
+        self.prompts = {"base": SYSTEM_PROMPT, **(prompts or {})}
+        df = load_catalog().to_frame()
+        df["운동목적_list"] = [[t.strip() for t in str(x).split(",") if t.strip()] for x in df["운동목적"]]
+        self.workouts = df
+        self.emotion_index = EmotionWorkoutIndex.from_catalog(df)
+        self.search_index = load_search_index(df)
+        self.store_path = store_path
+        self._store = None
+        self._emotion_keys = {}
+        self._names = df["운동명"].to_numpy()
+        self._tag_lists = df["운동목적_list"].tolist()
+        self._energy = df["단위체중당에너지소비량"].to_numpy(dtype=float)
+        self._candidates = {}
+        self._arrays = {}
+        self._parsed = {}
+        self._results = {}
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = ResponseStore(self.store_path)
+        return self._store
+
+    def emotion_key(self, case):
+        """감정 순서/표기 차이는 무시 (같은 선택 벡터면 같은 후보)"""
+        key = self._emotion_keys.get(case["emotions"])
+        if key is None:
+            key = self._emotion_keys[case["emotions"]] = selection_matrix([case["emotions"]])[0].tobytes()
+        return key
+
+    def candidates(self, case):
+        """
+        (1차 후보 위치 배열, 목표 강도, 후보 키) — 감정 선택 + 목표 강도가 같으면 재사용.
+        후보 키로 rule 엔진용 배열(운동명 / 목적 태그 / 에너지소비량 / 운동명 set)도 같이 캐시.
+        """
+        target = infer_target_intensity_from_arousal(case["arousal"], self.cuts)
+        key = (self.emotion_key(case), target)
+        hit = self._candidates.get(key)
+        if hit is None:
+            pos, target = candidate_positions(
+                self.workouts, self.emotion_index, case["emotions"], case["arousal"], self.cuts
+            )
+            hit = self._candidates[key] = (pos, target, key)
+            names = self._names[pos]
+            self._arrays[key] = (
+                names, [self._tag_lists[i] for i in pos], self._energy[pos], frozenset(names),
+            )
+        return hit
+
+    def frame(self, ckey):
+        """후보 키 → 후보 DataFrame (select_candidates 와 같은 값, llm 엔진에서만 필요)"""
+        return self._memo(("frame", ckey), lambda: self.workouts.iloc[self._candidates[ckey][0]].copy())
+
+    def _memo(self, key, fn):
+        hit = self._results.get(key)
+        if hit is None:
+            hit = self._results[key] = fn()
+        return hit
+
+    def _weight_minutes(self, case):
+        """session_kcal 과 같은 파싱 (사용자 몸무게/시간 문자열 조합별로 한 번만)"""
+        key = (case["weight"], case["minutes"])
+        hit = self._parsed.get(key)
+        if hit is None:
+            w = parse_weight_kg([case["weight"]])
+            m = pd.to_numeric(pd.Series([case["minutes"]]), errors="coerce").to_numpy(dtype=float)
+            hit = self._parsed[key] = (w, m, bool(np.isfinite(w * m).all()))
+        return hit
+
+    # ---------- 엔진 ----------
+    def rule(self, case):
+        """rank_candidates 와 같은 규칙(rank_positions)을 캐시한 배열로 적용"""
+        _, target, ckey = self.candidates(case)
+        names, tag_lists, energy, name_set = self._arrays[ckey]
+        avoid = tuple(n for n in case["avoid"] if n in name_set)
+        # 체중 감량이면 예상 kcal 비율로 순위를 매기는데, 비율은 몸무게×시간과 무관 (값이 있는지만 중요)
+        use_kcal = normalize_tag(case["purpose"]) in KCAL_PURPOSES
+        w, m, valid = self._weight_minutes(case) if use_kcal else (None, None, False)
+        key = ("rule", ckey, case["purpose"], avoid, use_kcal and valid)
+
+        def run():
+            hit = self._memo(("purpose", ckey, case["purpose"]), lambda: purpose_mask(tag_lists, case["purpose"]))
+            kcal = kcal_matrix(w, m, energy)[0] if use_kcal else None
+            return [names[i] for i in rank_positions(names, hit, k=3, avoid=avoid, kcal=kcal)]
+
+        return self._memo(key, run)
+
+    def retrieval(self, case):
+        pos, _, ckey = self.candidates(case)
+        query = f"{case['emotions']} {case['purpose']}"
+
+        def run():
+            s = self.search_index.scores(query)[pos]
+            picked, yoga = [], 0
+            for name in self._names[pos[np.argsort(-s, kind="stable")]]:
+                if is_yoga_family(name):
+                    if yoga >= 2:
+                        continue
+                    yoga += 1
+                picked.append(name)
+                if len(picked) == 3:
+                    break
+            return picked
+
+        return self._memo(("retrieval", ckey, query), run)
+
+    def llm_messages(self, case, variant):
+        _, _, ckey = self.candidates(case)
+        cands = self.frame(ckey)
+        return build_messages(
+            case["user"], case["daily"], "unknown", 0.0, cands,
+            history={"최근추천": list(case["avoid"])}, system_prompt=self.prompts[variant],
+        ), cands
+
+    def llm(self, case, variant):
+        """녹화된 응답 재생 (없으면 None). 후보에 없는 운동명은 버림"""
+        messages, cands = self.llm_messages(case, variant)
+        text = self.store.get(messages)
+        if text is None:
+            return None
+        parser = Top3StreamParser()
+        parser.feed(text)
+        allowed = set(cands["운동명"])
+        return [e.get("운동명", "") for e in parser.entries if e.get("운동명", "") in allowed][:3]
+
+    def run(self, engine, case):
+        if engine.startswith("llm:"):
+            return self.llm(case, engine.split(":", 1)[1])
+        return getattr(self, engine)(case)
+
+
+_STATE = None
+
+
+def _init_worker(options):
+    global _STATE
+    _STATE = ReplayState(**options)
+
+
+def _run_chunk(engine, cases):
+    return [_STATE.run(engine, c) for c in cases]
+
+
+def run_engines(cases, engines, options=None, workers=None):
+    """
+    {엔진: 예측 Top3 목록(case 순서, 녹화 미적중은 None)}.
+    workers=1 이면 현재 프로세스에서, 아니면 프로세스 풀에 청크 단위로 나눠서 실행.
+    """
+    options = options or {}
+    workers = workers or os.cpu_count() or 1
+    chunks = [cases[i:i + CHUNK_SIZE] for i in range(0, len(cases), CHUNK_SIZE)]
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker(options)
+        return {e: [p for ch in chunks for p in _run_chunk(e, ch)] for e in engines}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as pool:
+        futures = {e: [pool.submit(_run_chunk, e, ch) for ch in chunks] for e in engines}
+        return {e: [p for f in fs for p in f.result()] for e, fs in futures.items()}
+
+
+def record_responses(cases, variant, options=None, model=LLM_MODEL):
+    """녹화에 없는 messages 만 실제 API 로 호출해 채움 (순차 실행, OPENAI_API_KEY 필요)"""
+    from openai import OpenAI
+
+    state = ReplayState(**(options or {}))
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    added = 0
+    for case in cases:
+        messages, _ = state.llm_messages(case, variant)
+        if state.store.get(messages) is not None:
+            continue
+        res = client.chat.completions.create(
+            model=model, messages=messages, temperature=0.6,
+            response_format={"type": "json_object"},
+        )
+        state.store.record(messages, res.choices[0].message.content or "")
+        added += 1
+    return added
+
+
+# ========================= 지표 =========================
+def rating_table(eval_values):
+    """evaluation 시트 → (날짜, 이름, 운동명, 평점) 긴 표 + 행별 Q_fit"""
+    ev = _frame(eval_values)
+    if ev.empty:
+        return pd.DataFrame(columns=["날짜", "이름", "운동명", "평점", "Q_fit"])
+    # 열은 헤더 이름으로 (스키마 레지스트리와 같은 매핑)
+    layout = SheetLayout("evaluation", ev.columns)
+    col = lambda name: ev.iloc[:, layout.index(name)]
+    parts = []
+    for w, r in zip(RECOMMEND_COLUMNS, RATING_COLUMNS):
+        parts.append(pd.DataFrame({
+            "날짜": col("날짜").astype(str),
+            "이름": col("이름").astype(str).str.strip(),
+            "운동명": col(w).astype(str).str.strip(),
+            "평점": pd.to_numeric(col(r), errors="coerce"),
+            "Q_fit": pd.to_numeric(col(QUESTIONS[0]), errors="coerce"),
+        }))
+    out = pd.concat(parts, ignore_index=True)
+    return out[(out["운동명"] != "") & out["평점"].notna()]
+
+
+def score(cases, preds, ratings):
+    """한 엔진의 예측 → 지표 dict"""
+    covered = [(c, p) for c, p in zip(cases, preds) if p is not None]
+    with_past = [(c["past"], p) for c, p in covered if c["past"]]
+    out = {
+        "행": len(cases),
+        "재생": len(covered),
+        "Top1일치": np.mean([bool(p) and p[0] == past[0] for past, p in with_past]) if with_past else np.nan,
+        "평균겹침": np.mean([len(set(p) & set(past)) / 3 for past, p in with_past]) if with_past else np.nan,
+        "세트일치": np.mean([set(p) == set(past) for past, p in with_past]) if with_past else np.nan,
+    }
+
+    picks = {c["key"]: set(p) for c, p in covered}
+    rated = ratings[[k in picks for k in zip(ratings["날짜"], ratings["이름"])]]
+    included = np.array([w in picks[k] for k, w in zip(zip(rated["날짜"], rated["이름"]), rated["운동명"])], dtype=float)
+    rating = rated["평점"].to_numpy(dtype=float)
+    out["평가수"] = len(rated)
+    out["포함평균"] = rating[included == 1].mean() if (included == 1).any() else np.nan
+    out["제외평균"] = rating[included == 0].mean() if (included == 0).any() else np.nan
+    out["평점상관"] = (np.corrcoef(included, rating)[0, 1]
+                   if len(rated) > 2 and included.std() > 0 and rating.std() > 0 else np.nan)
+    return out
+
+
+def replay(export, engines, cuts=AROUSAL_CUTS, prompts=None, workers=None, store_path=None):
+    """export(load_export 결과)로 엔진들을 돌려 엔진별 지표 DataFrame 반환"""
+    cases = build_cases(export.get("daily", []), export.get("users", []))
+    ratings = rating_table(export.get("evaluation", []))
+    options = {"cuts": tuple(cuts), "prompts": prompts or {}, "store_path": store_path}
+    t0 = time.perf_counter()
+    preds = run_engines(cases, engines, options, workers)
+    elapsed = time.perf_counter() - t0
+    table = pd.DataFrame([{"엔진": e, **score(cases, preds[e], ratings)} for e in engines]).set_index("엔진")
+    table.attrs["rows_per_s"] = len(cases) * len(engines) / elapsed if elapsed > 0 else float("inf")
+    return table
+
+
+# ========================= 합성 데이터 (처리량 측정용) =========================
+def synthetic_export(n, n_users=300, seed=0):
+    """카탈로그/감정표로 만든 가짜 daily / evaluation / users (get_all_values 형태)"""
+    from emotion_model import EMOTIONS
+    from catalog import PURPOSES
+
+    rng = np.random.default_rng(seed)
+    names = load_catalog().names
+    daily = [["날짜", "이름", "감정", "감정_평균각성점수", "수면 시간", "운동 가능 시간(분)",
+              "스트레스", "운동목적", "운동장소", "보유장비", "추천운동1", "추천운동2", "추천운동3",
+              "추천이유1", "추천이유2", "추천이유3"]]
+    evaluation = [["날짜", "이름", "추천운동1", "추천운동2", "추천운동3", "운동1_평가", "운동2_평가", "운동3_평가",
+                   "Q_fit", "Q_u", "Q_c", "Q_s", "Q_r", "개선점", "좋았던점"]]
+    users = [["이름", "나이", "성별", "키(cm)", "몸무게(kg)", "평소 활동량", "부상 여부", "부상 부위"]]
+    users += [[f"user{u}", "30", "여", "165", f"{rng.uniform(45, 90):.0f}", "보통", "없음", ""] for u in range(n_users)]
+    for i in range(n):
+        emotions = ", ".join(rng.choice(EMOTIONS, size=rng.integers(1, 3), replace=False))
+        top3 = list(rng.choice(names, size=3, replace=False))
+        day = str(pd.Timestamp("2025-01-01") + pd.Timedelta(days=int(i // n_users)))[:10]
+        user = f"user{rng.integers(0, n_users)}"
+        daily.append([day, user, emotions, f"{rng.uniform(1, 5):.2f}", "7", str(rng.choice([20, 30, 60])),
+                      "보통", PURPOSES[rng.integers(0, len(PURPOSES))], "실내(집)", "", *top3, "", "", ""])
+        if rng.random() < 0.2:
+            evaluation.append([day, user, *top3, *[str(x) for x in rng.integers(1, 6, 3)],
+                               "4", "4", "4", "4", "4", "", ""])
+    return {"daily": daily, "evaluation": evaluation, "users": users}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="저장된 시트로 추천 엔진 오프라인 비교")
+    ap.add_argument("engines", nargs="*", default=list(LOCAL_ENGINES), help="rule / retrieval / llm:<변형>")
+    ap.add_argument("--dir", default=REPLAY_DIR, help="export 폴더 (daily.csv, evaluation.csv, users.csv)")
+    ap.add_argument("--export", action="store_true", help="구글 시트를 --dir 로 내려받고 종료")
+    ap.add_argument("--cuts", default=",".join(str(c) for c in AROUSAL_CUTS), help="각성점수 컷 '낮음,높음'")
+    ap.add_argument("--prompt", action="append", default=[], help="프롬프트 변형 이름=파일 (llm:이름 으로 사용)")
+    ap.add_argument("--record", action="store_true", help="llm 엔진의 녹화에 없는 응답을 실제 API 로 채움")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--bench", type=int, default=0, help="합성 daily N행으로 처리량 측정")
+    args = ap.parse_args()
+
+    if args.export:
+        export_sheets(args.dir)
+        raise SystemExit
+
+    cuts = tuple(float(x) for x in args.cuts.split(","))
+    prompts = {}
+    for spec in args.prompt:
+        name, path = spec.split("=", 1)
+        with open(path, encoding="utf-8") as f:
+            prompts[name] = f.read()
+
+    if args.bench:
+        export = synthetic_export(args.bench)
+        engines = [e for e in args.engines if e in LOCAL_ENGINES] or list(LOCAL_ENGINES)
+        for workers in sorted({1, args.workers or os.cpu_count() or 1}):
+            table = replay(export, engines, cuts, prompts, workers=workers)
+            print(f"workers={workers}: {table.attrs['rows_per_s']:,.0f} 행/s (엔진 {len(engines)}개 합계)")
+        print(table.round(3).to_string())
+        raise SystemExit
+
+    export = load_export(args.dir)
+    if not export["daily"]:
+        raise SystemExit(f"{args.dir}/daily.csv 가 없습니다. 먼저 python replay.py --export")
+    if args.record:
+        options = {"cuts": cuts, "prompts": prompts}
+        cases = build_cases(export["daily"], export["users"])
+        for e in args.engines:
+            if e.startswith("llm:"):
+                print(f"{e}: {record_responses(cases, e.split(':', 1)[1], options)}건 녹화")
+
+    table = replay(export, args.engines, cuts, prompts, workers=args.workers)
+    print(table.round(3).to_string())
+    print(f"{table.attrs['rows_per_s']:,.0f} 행/s")
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+외부 API(OpenAI / Spotify / 날씨) 공용 호출 래퍼.
+
+- 일시적 오류(타임아웃, 연결 오류, 429, 5xx)는 지수 백오프로 몇 번만 재시도
+- 의존성마다 서킷 브레이커(closed → open → half_open)를 하나씩 둠
+  - 일시적 오류로 연속 실패가 쌓이면 open (4xx 등 요청 자체의 오류는 세지 않음): 일정 시간 동안은 호출 자체를 하지 않고 바로 CircuitOpenError
+  - 시간이 지나면 half_open: 시험 호출 하나만 통과시켜 성공하면 closed 로 복귀
+- 브레이커는 프로세스 전체(모든 세션)가 공유하므로, 장애 중에는 모든 사용자가 즉시 대체 경로로 빠짐
+- 일시적 오류인지는 is_transient / is_timeout 한 곳에서만 판단 (재시도, 브레이커, 스트림 도중 실패, 장부가 같은 기준)
+- breaker_snapshot() 으로 현재 상태를 화면/로그에 노출
+"""
+import sys
+import time
+import random
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger("moodfit.resilience")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """브레이커가 열려 있어 호출하지 않고 바로 실패"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"circuit '{name}' is open (retry in {retry_in:.1f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+# ========================= 서킷 브레이커 =========================
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        # 관측용 누적 카운터
+        self.calls = 0
+        self.short_circuited = 0
+        self.last_error = ""
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """호출해도 되는지 확인. 안 되면 CircuitOpenError."""
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN or (state == HALF_OPEN and self._probe_in_flight):
+                self.short_circuited += 1
+                retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+                raise CircuitOpenError(self.name, retry_in)
+            if state == HALF_OPEN:
+                self._probe_in_flight = True
+            self.calls += 1
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("circuit %s closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_error(self, exc):
+        """
+        호출이 예외로 끝났을 때: 일시적 오류만 실패로 셈.
+        그 외(4xx, 잘못된 요청 등)는 성공도 실패도 아님 → half_open 시험 호출 자리만 돌려줌
+        """
+        if is_transient(exc):
+            self.record_failure(exc)
+            return
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, exc):
+        with self._lock:
+            self._failures += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"[:200]
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("circuit %s opened after %d failures (%s)",
+                                   self.name, self._failures, self.last_error)
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            state = self._current_state()
+            return {
+                "name": self.name,
+                "state": state,
+                "failures": self._failures,
+                "calls": self.calls,
+                "short_circuited": self.short_circuited,
+                "retry_in": (
+                    round(max(0.0, self.reset_timeout - (self._clock() - self._opened_at)), 1)
+                    if state == OPEN else 0.0
+                ),
+                "last_error": self.last_error,
+            }
+
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(name, **kwargs) -> CircuitBreaker:
+    """의존성 이름별 브레이커 (처음 요청될 때 생성, 이후 공유)"""
+    with _BREAKERS_LOCK:
+        if name not in _BREAKERS:
+            _BREAKERS[name] = CircuitBreaker(name, **kwargs)
+        return _BREAKERS[name]
+
+
+def breaker_snapshot():
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    return [b.snapshot() for b in breakers]
+
+
+# ========================= 재시도 판단 =========================
+def _status_code(exc):
+    for attr in ("status_code", "http_status"):
+        code = getattr(exc, attr, None)
+        if isinstance(code, int):
+            return code
+    resp = getattr(exc, "response", None)
+    code = getattr(resp, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def _client_errors(timeout_only):
+    """
+    이미 import 된 클라이언트 라이브러리의 타임아웃/연결 예외 타입들.
+    import 되지 않은 라이브러리의 예외는 생길 수 없으므로 여기서 import 하지 않음 (첫 화면 로딩에 포함되지 않게)
+    """
+    types = [TimeoutError]      # asyncio / concurrent.futures 의 TimeoutError 도 같은 타입
+    openai = sys.modules.get("openai")
+    httpx = sys.modules.get("httpx")
+    requests = sys.modules.get("requests")
+    if timeout_only:
+        if openai is not None:
+            types.append(openai.APITimeoutError)
+        if httpx is not None:
+            types.append(httpx.TimeoutException)
+        if requests is not None:
+            types.append(requests.Timeout)
+    else:
+        types.append(ConnectionError)
+        if openai is not None:
+            types.append(openai.APIConnectionError)     # APITimeoutError 포함
+        if httpx is not None:
+            types.append(httpx.TransportError)          # TimeoutException 포함
+        if requests is not None:
+            types.extend((requests.Timeout, requests.ConnectionError))
+    return tuple(types)
+
+
+def is_timeout(exc) -> bool:
+    """시간 초과로 끝난 호출인지 (예산 초과 / 클라이언트 타임아웃)"""
+    return isinstance(exc, _client_errors(timeout_only=True))
+
+
+def is_transient(exc) -> bool:
+    """다시 시도하면 성공할 수도 있는 오류인지 (타임아웃, 연결 오류, 429, 5xx)"""
+    if isinstance(exc, _client_errors(timeout_only=False)):
+        return True
+    code = _status_code(exc)
+    return code is not None and (code == 429 or code >= 500)
+
+
+# ========================= 공용 호출 =========================
+def _retry_delay(breaker, exc, attempt, retries, backoff, max_backoff, budget):
+    """
+    call()/acall() 이 실패한 뒤의 공통 판단: 브레이커 기록 + 다시 시도할 대기 시간.
+    None 이면 재시도하지 않고 오류를 그대로 올림.
+    - 일시적 오류만 브레이커 실패로 셈 (4xx, 잘못된 요청 등은 의존성 장애가 아니므로 세지도, 성공으로 치지도 않음)
+    """
+    breaker.record_error(exc)
+    if not is_transient(exc) or attempt > retries:
+        return None
+
+    delay = min(max_backoff, backoff * (2 ** (attempt - 1)))
+    delay *= random.uniform(0.5, 1.0)  # jitter
+    if budget is not None and budget.remaining() <= delay:
+        return None
+    logger.info("retry %s #%d after %.2fs (%s)", breaker.name, attempt, delay, type(exc).__name__)
+    return delay
+
+
+def call(dependency, fn, *args, retries=2, backoff=0.2, max_backoff=2.0, budget=None, **kwargs):
+    """
+    fn(*args, **kwargs) 를 브레이커 + 재시도로 감싸서 호출.
+    - budget(StageBudget)이 주어지면 남은 시간 안에서만 재시도/대기
+    - 브레이커가 열려 있으면 fn 을 부르지 않고 CircuitOpenError
+    - 마지막 오류는 그대로 다시 올라가므로, 호출하는 쪽이 대체 경로를 선택
+    """
+    breaker = get_breaker(dependency)
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            attempt += 1
+            delay = _retry_delay(breaker, e, attempt, retries, backoff, max_backoff, budget)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
+
+
+async def acall(dependency, fn, *args, retries=2, backoff=0.2, max_backoff=2.0, budget=None, **kwargs):
+    """call() 의 async 판 (await fn(*args, **kwargs), 대기는 asyncio.sleep). 브레이커는 call() 과 공유."""
+    breaker = get_breaker(dependency)
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            attempt += 1
+            delay = _retry_delay(breaker, e, attempt, retries, backoff, max_backoff, budget)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 없이 돌아가는 규칙 기반 Top-K 랭킹.
+
+LLM이 지연/실패했을 때 추천 페이지의 대체 경로로 쓰입니다.
+- 후보군은 이미 각성점수 → 운동강도로 1차 필터된 상태라고 가정
+- 운동목적 일치 여부를 가장 크게 반영 (시스템 프롬프트의 우선순위 규칙과 동일)
+- 요가 계열(요가/스트레칭/필라테스)은 최대 2개
+"""
+import numpy as np
+import pandas as pd
+
+from energy import kcal_rank_score
+
+YOGA_KEYWORDS = ("요가", "스트레칭", "필라테스")
+# 이 목적이면 같은 목적 점수 안에서 예상 소모 칼로리가 큰 운동을 앞에
+KCAL_PURPOSES = ("체중감량",)
+
+
+def normalize_tag(tag) -> str:
+    """'체중감량' / '체중 감량' 처럼 띄어쓰기만 다른 태그를 같은 값으로"""
+    return str(tag).replace(" ", "").strip()
+
+
+def _tags(x):
+    if isinstance(x, list):
+        return x
+    if pd.isna(x):
+        return []
+    return [s.strip() for s in str(x).split(",") if s.strip()]
+
+
+def is_yoga_family(name) -> bool:
+    return any(k in str(name) for k in YOGA_KEYWORDS)
+
+
+def purpose_mask(tag_lists, purpose) -> np.ndarray:
+    """운동별 태그 목록(또는 '체중 감량, 체력 향상' 문자열) → 목적 일치 여부 (W,) bool"""
+    target = normalize_tag(purpose)
+    if not target:
+        return np.zeros(len(tag_lists), dtype=bool)
+    return np.fromiter(
+        (any(normalize_tag(t) == target for t in _tags(tags)) for tags in tag_lists),
+        dtype=bool, count=len(tag_lists),
+    )
+
+
+def rank_positions(names, purpose_hit, k=3, exclude=(), max_yoga=2, avoid=(), kcal=None):
+    """
+    rank_candidates 의 배열 버전: 후보 위치(0-based) 상위 k개.
+    (운동명 배열, 목적 일치 mask, 예상 kcal 배열 또는 None) — replay.py 처럼 행마다 DataFrame 을
+    만들 필요 없이 같은 규칙을 반복 적용할 때 사용
+    """
+    score = np.asarray(purpose_hit, dtype=float) * 2
+    if avoid:
+        avoid = set(avoid)
+        score -= np.fromiter((n in avoid for n in names), dtype=float, count=len(names))
+    if kcal is not None:
+        score += kcal_rank_score(kcal)
+    # 점수 내림차순, 동점은 원래 순서
+    order = np.argsort(-score, kind="stable")
+
+    exclude = set(exclude)
+    yoga_used = sum(is_yoga_family(n) for n in exclude)
+    picked = []
+    for i in order:
+        name = names[i]
+        if name in exclude:
+            continue
+        if is_yoga_family(name):
+            if yoga_used >= max_yoga:
+                continue
+            yoga_used += 1
+        picked.append(int(i))
+        exclude.add(name)
+        if len(picked) >= k:
+            break
+    return picked
+
+
+def rank_candidates(candidates: pd.DataFrame, purpose, k=3, exclude=(), max_yoga=2, avoid=()):
+    """
+    후보군에서 규칙 점수 상위 k개의 행(dict) 목록을 반환.
+    - avoid: 최근 추천된 운동 등, 제외까지는 아니지만 순위를 낮출 운동명
+    - 목적이 '체중 감량'이고 후보에 '예상kcal' 컬럼이 있으면 칼로리 비율(0~1)을 더함
+    동점이면 카탈로그 순서를 유지하므로 같은 입력에는 항상 같은 결과가 나옵니다.
+    """
+    if candidates.empty or k <= 0:
+        return []
+
+    col = "운동목적_list" if "운동목적_list" in candidates.columns else "운동목적"
+    kcal = None
+    if normalize_tag(purpose) in KCAL_PURPOSES and "예상kcal" in candidates.columns:
+        kcal = candidates["예상kcal"].to_numpy()
+    picked = rank_positions(
+        candidates["운동명"].to_numpy(), purpose_mask(candidates[col].tolist(), purpose),
+        k=k, exclude=exclude, max_yoga=max_yoga, avoid=avoid, kcal=kcal,
+    )
+    return candidates.iloc[picked].to_dict("records")
+
+
+def fallback_reason(row, purpose, target_intensity=None) -> str:
+    """규칙 기반 추천용 짧은 이유 문장"""
+    parts = []
+    tags = [normalize_tag(t) for t in _tags(row.get("운동목적_list", row.get("운동목적", "")))]
+    if purpose and normalize_tag(purpose) in tags:
+        parts.append(f"오늘의 운동목적인 '{purpose}'에 맞는 운동입니다.")
+    elif row.get("운동목적"):
+        parts.append(f"'{row['운동목적']}'에 도움이 되는 운동입니다.")
+    # 감정 기반 후보군은 여러 강도가 섞이므로, 문장은 고른 운동 자체의 강도로
+    intensity = row.get("운동강도")
+    intensity = "" if intensity is None or pd.isna(intensity) else str(intensity).strip()
+    if intensity and intensity == target_intensity:
+        parts.append(f"오늘 감정 각성도에 맞춰 {intensity} 운동으로 골랐어요.")
+    elif intensity:
+        parts.append(f"{intensity} 운동입니다.")
+    parts.append("(응답 지연으로 규칙 기반 추천을 보여드립니다)")
+    return " ".join(parts)
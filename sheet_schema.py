@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+시트 스키마 레지스트리.
+
+users / daily / evaluation 시트의 열 구성을 여기 한 곳에 선언하고,
+각 시트의 헤더 행(1행)은 프로세스당 한 번만 읽어 이름 → 열 번호 매핑으로 캐시합니다.
+
+- 선언한 열이 헤더에 없거나 선언한 자리에 있지 않으면 SchemaError
+  (append_row 는 선언 순서대로 값을 쓰므로 순서도 확인)
+- 헤더가 비어 있으면 선언한 헤더 + 기록ID 열을 써 넣고, 기록ID 헤더만 없으면 그 칸만 채움
+  → 앱 시작 시 워밍업 스레드가 bootstrap() 으로 한 번 실행
+- 페이지가 이미 시트 전체를 읽었다면 observe(시트, 헤더) 로 추가 요청 없이 매핑을 얻음
+  (헤더가 캐시와 같으면 검증도 다시 하지 않음)
+- 헤더 이름 비교는 공백과 "(단위)" 를 무시 (예: '몸무게' == '몸무게(kg)')
+"""
+import threading
+
+import streamlit as st
+from sheets_auth import connect_gsheet
+
+RECORD_ID_HEADER = "기록ID"
+
+SCHEMAS = {
+    "users": (
+        "이름", "나이", "성별", "키(cm)", "몸무게(kg)", "평소 활동량", "부상 여부", "부상 부위",
+    ),
+    "daily": (
+        "날짜", "이름", "감정", "감정_평균각성점수", "수면 시간", "운동 가능 시간(분)",
+        "스트레스", "운동목적", "운동장소", "보유장비",
+        "추천운동1", "추천운동2", "추천운동3", "추천이유1", "추천이유2", "추천이유3",
+    ),
+    "evaluation": (
+        "날짜", "이름",
+        "추천운동1", "추천운동2", "추천운동3",
+        "운동1_평가", "운동2_평가", "운동3_평가",
+        "Q_fit(개인화적합)", "Q_explain_understand(이해)", "Q_explain_convince(설득)",
+        "Q_satis(만족)", "Q_reuse(재사용의향)",
+        "개선점", "좋았던점",
+    ),
+}
+
+RECOMMEND_COLUMNS = ("추천운동1", "추천운동2", "추천운동3")
+REASON_COLUMNS = ("추천이유1", "추천이유2", "추천이유3")
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def _key(name):
+    name = str(name).replace(" ", "")
+    return name.split("(")[0]
+
+
+class SheetLayout:
+    """헤더 한 줄로 만든 이름 → 위치 매핑 (읽기 전용)"""
+
+    def __init__(self, sheet, header):
+        self.sheet = sheet
+        self.header = [str(h).strip() for h in header]
+        self._pos = {}
+        for i, h in enumerate(self.header):
+            if h:
+                self._pos.setdefault(_key(h), i)
+
+    def __contains__(self, name):
+        return _key(name) in self._pos
+
+    def index(self, name) -> int:
+        """0-based 위치 (get_all_values 행 인덱싱용)"""
+        try:
+            return self._pos[_key(name)]
+        except KeyError:
+            raise SchemaError(f"{self.sheet} 시트에 '{name}' 컬럼이 없습니다.") from None
+
+    def col(self, name) -> int:
+        """1-based 열 번호 (update_cell 용)"""
+        return self.index(name) + 1
+
+    def cols(self, names):
+        return [self.col(n) for n in names]
+
+    def get(self, row, name, default=""):
+        """행(list) 에서 이름으로 값 꺼내기 (짧은 행이면 default)"""
+        i = self.index(name)
+        return row[i] if i < len(row) else default
+
+    @property
+    def record_id_col(self) -> int:
+        if RECORD_ID_HEADER in self:
+            return self.col(RECORD_ID_HEADER)
+        return len(SCHEMAS.get(self.sheet, self.header)) + 1
+
+
+def validate(sheet, header, schemas=SCHEMAS):
+    """선언과 다른 점 목록 (없으면 빈 목록)"""
+    layout = SheetLayout(sheet, header)
+    problems = []
+    for pos, name in enumerate(schemas.get(sheet, ())):
+        if name not in layout:
+            problems.append(f"'{name}' 없음")
+        elif layout.index(name) != pos:
+            problems.append(f"'{name}' 위치 {layout.col(name)}열 (선언 {pos + 1}열)")
+    return problems
+
+
+class SchemaRegistry:
+    def __init__(self, open_spreadsheet, schemas=SCHEMAS):
+        self.open_spreadsheet = open_spreadsheet
+        self.schemas = schemas
+        self.header_reads = 0
+        self._layouts = {}
+        self._lock = threading.Lock()
+
+    def _build(self, sheet, header):
+        problems = validate(sheet, header, self.schemas)
+        if problems:
+            raise SchemaError(f"{sheet} 시트 헤더가 스키마와 다릅니다: " + ", ".join(problems))
+        layout = SheetLayout(sheet, header)
+        self._layouts[sheet] = layout
+        return layout
+
+    def _ensure(self, sheet, header, ws=None):
+        """
+        헤더 검증 + 매핑 캐시. 헤더가 비어 있으면 선언 헤더 + 기록ID 를 써 넣고,
+        기록ID 헤더만 없으면 그 칸만 채움 (ws 가 없으면 그때만 시트를 엶). self._lock 안에서 호출.
+        """
+        declared = list(self.schemas.get(sheet, ()))
+        if not header and declared:
+            ws = ws or self.open_spreadsheet().worksheet(sheet)
+            header = declared + [RECORD_ID_HEADER]
+            ws.append_row(header)
+        layout = self._build(sheet, header)
+        if declared and RECORD_ID_HEADER not in layout:
+            ws = ws or self.open_spreadsheet().worksheet(sheet)
+            col = layout.record_id_col
+            ws.update_cell(1, col, RECORD_ID_HEADER)
+            header = layout.header + [""] * (col - 1 - len(layout.header)) + [RECORD_ID_HEADER]
+            layout = self._build(sheet, header)
+        return layout
+
+    def layout(self, sheet, ws=None) -> SheetLayout:
+        """캐시된 매핑 (처음 한 번만 헤더 행을 읽고, 비어 있으면 선언 헤더를 써 넣음)"""
+        with self._lock:
+            cached = self._layouts.get(sheet)
+            if cached is not None:
+                return cached
+            ws = ws or self.open_spreadsheet().worksheet(sheet)
+            header = ws.row_values(1)
+            self.header_reads += 1
+            return self._ensure(sheet, header, ws)
+
+    def observe(self, sheet, header, ws=None) -> SheetLayout:
+        """
+        이미 읽은 헤더로 매핑 갱신 (캐시와 같으면 그대로, 바뀌었으면 다시 검증).
+        bootstrap 전에 불려도 layout() 과 같은 경로로 기록ID 헤더를 만들어 둠.
+        """
+        header = [str(h).strip() for h in header]
+        with self._lock:
+            cached = self._layouts.get(sheet)
+            if cached is not None and cached.header[:len(header)] == header[:len(cached.header)]:
+                return cached
+            return self._ensure(sheet, header, ws)
+
+    def bootstrap(self, sheets=None):
+        """선언한 시트 전부 헤더 확인/생성 + 매핑 캐시 (앱 시작 시 한 번)"""
+        sh = self.open_spreadsheet()
+        return {s: self.layout(s, sh.worksheet(s)) for s in (sheets or self.schemas)}
+
+    def invalidate(self, sheet=None):
+        with self._lock:
+            if sheet is None:
+                self._layouts.clear()
+            else:
+                self._layouts.pop(sheet, None)
+
+
+@st.cache_resource
+def get_schema_registry():
+    """프로세스 공용 레지스트리 (페이지 / WAL 리플레이어 / 워밍업이 같이 씀)"""
+    return SchemaRegistry(lambda: connect_gsheet("MoodFit"))
+
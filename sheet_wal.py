@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Google Sheets 쓰기용 로컬 WAL(write-ahead log).
+
+- 모든 append_row는 먼저 로컬 로그 파일에 한 줄(JSON)로 기록되고,
+  fsync가 끝나는 즉시 화면에서 "저장 완료"를 보여줄 수 있습니다.
+- 동시에 들어온 쓰기는 한 번의 fsync로 묶어서 처리합니다(group commit).
+- 백그라운드 리플레이어가 로그를 시트로 흘려보내며,
+  각 기록의 기록ID를 시트에도 남겨서 재전송해도 행이 중복되지 않습니다.
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+
+import streamlit as st
+from sheets_auth import connect_gsheet, evict_gsheet
+from sheet_schema import get_schema_registry, SchemaError
+
+WAL_DIR = os.getenv("MOODFIT_WAL_DIR", os.path.join(".moodfit", "wal"))
+
+logger = logging.getLogger("moodfit.wal")
+
+# ========================= WAL =========================
+class SheetWAL:
+    """
+    append-only 로그 파일 두 개로 구성됩니다.
+    - records.log : {"id", "sheet", "row", "ts"} 한 줄씩
+    - applied.log : 시트 반영이 끝난 기록ID 한 줄씩
+    미반영 기록이 하나도 없으면 두 파일을 비워서 크기를 유지합니다.
+    """
+
+    def __init__(self, directory=WAL_DIR, sync_window=0.002):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sync_window = sync_window
+
+        self._records_path = os.path.join(directory, "records.log")
+        self._applied_path = os.path.join(directory, "applied.log")
+
+        self._lock = threading.Lock()
+        self._sync_cond = threading.Condition()
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+
+        self._pending = self._recover()
+        self._records = open(self._records_path, "a", encoding="utf-8")
+        self._applied = open(self._applied_path, "a", encoding="utf-8")
+
+    def _recover(self):
+        """재시작 시 로그를 다시 읽어 미반영 기록만 복원 (잘린 마지막 줄은 무시)"""
+        applied = set()
+        if os.path.exists(self._applied_path):
+            with open(self._applied_path, encoding="utf-8") as f:
+                applied = {line.strip() for line in f if line.strip()}
+
+        pending = {}
+        if os.path.exists(self._records_path):
+            with open(self._records_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if rec.get("id") and rec["id"] not in applied:
+                        pending[rec["id"]] = rec
+        return pending
+
+    # ---------- 쓰기 ----------
+    def append(self, sheet: str, row) -> str:
+        """
+        기록을 로그에 남기고 디스크에 내려간(fsync) 뒤 기록ID를 반환.
+        이 함수가 반환되면 프로세스가 죽어도 기록은 남아 있습니다.
+        """
+        rec = {
+            "id": uuid.uuid4().hex,
+            "sheet": sheet,
+            "row": list(row),
+            "ts": time.time(),
+        }
+        line = json.dumps(rec, ensure_ascii=False, default=str) + "\n"
+
+        with self._lock:
+            self._records.write(line)
+            self._records.flush()
+            self._written += 1
+            seq = self._written
+            self._pending[rec["id"]] = rec
+
+        self._wait_durable(seq)
+        return rec["id"]
+
+    def _wait_durable(self, seq):
+        """
+        group commit: 먼저 도착한 스레드가 잠깐 기다렸다가 fsync 한 번으로
+        그 사이 쌓인 쓰기를 모두 확정하고, 나머지 스레드는 결과만 기다립니다.
+        """
+        with self._sync_cond:
+            while self._synced < seq and self._syncing:
+                self._sync_cond.wait()
+            if self._synced >= seq:
+                return
+            self._syncing = True
+
+        target = None
+        try:
+            if self.sync_window:
+                time.sleep(self.sync_window)
+            with self._lock:
+                target = self._written
+                fd = self._records.fileno()
+            os.fsync(fd)
+        finally:
+            with self._sync_cond:
+                self._syncing = False
+                if target is not None:
+                    self._synced = max(self._synced, target)
+                self._sync_cond.notify_all()
+
+    # ---------- 조회 ----------
+    def pending(self, sheet: str = None):
+        """시트에 아직 반영되지 않은 기록 (기록 순서 유지)"""
+        with self._lock:
+            recs = list(self._pending.values())
+        if sheet is not None:
+            recs = [r for r in recs if r["sheet"] == sheet]
+        return recs
+
+    def pending_column(self, sheet: str, index: int):
+        """미반영 기록의 특정 열 값 (예: users의 이름 중복 체크용)"""
+        return [
+            str(r["row"][index]).strip()
+            for r in self.pending(sheet)
+            if len(r["row"]) > index
+        ]
+
+    # ---------- 반영 완료 처리 ----------
+    def mark_applied(self, record_ids):
+        record_ids = [rid for rid in record_ids if rid]
+        if not record_ids:
+            return
+
+        with self._lock:
+            self._applied.write("".join(f"{rid}\n" for rid in record_ids))
+            self._applied.flush()
+            os.fsync(self._applied.fileno())
+            for rid in record_ids:
+                self._pending.pop(rid, None)
+
+            # 전부 반영됐으면 로그를 비움 (파일 핸들은 그대로 유지)
+            if not self._pending:
+                self._records.truncate(0)
+                self._applied.truncate(0)
+
+
+# ========================= 리플레이어 =========================
+class SheetReplayer:
+    """
+    WAL의 미반영 기록을 시트로 흘려보냅니다.
+    - 시트별로 기록ID 열을 한 번 읽어 이미 들어간 기록은 건너뜀 (멱등)
+      읽은 ID 는 시트별로 기억하고 보낸 ID 를 더해 감, 전송이 실패했을 때만 다시 읽음
+    - 헤더/기록ID 열 위치는 스키마 레지스트리에서 (헤더 행은 프로세스당 한 번만 읽음)
+    - 나머지는 append_rows 한 번으로 묶어서 전송
+    - 실패하면 기록은 그대로 남고 다음 주기에 다시 시도
+    - 헤더가 스키마와 다른 시트(SchemaError)는 재시도해도 낫지 않으므로 한 번만 알리고 멈춤
+      (기록은 WAL 에 남음, 헤더를 고친 뒤 unblock())
+    - 값이 기록ID 열 앞 칸 수보다 많은 기록은 잘라 보내지 않고 한 번만 알린 뒤 WAL 에 남김
+    """
+
+    def __init__(self, wal: SheetWAL, open_spreadsheet, registry, interval=5.0, evict_spreadsheet=None):
+        self.wal = wal
+        self.open_spreadsheet = open_spreadsheet
+        self.evict_spreadsheet = evict_spreadsheet    # 실패한 연결을 공용 캐시에서 버리는 함수 (sh 를 받음)
+        self.registry = registry
+        self.interval = interval
+
+        self._drain_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._sh = None
+        self.blocked = {}       # 시트 이름 → SchemaError 메시지 (반영 중단)
+        self.rejected = set()   # 열 수가 맞지 않아 보내지 않은 기록ID
+        self._known_ids = {}    # (시트, 기록ID 열) → 시트에 있는 기록ID
+
+    def _spreadsheet(self):
+        if self._sh is None:
+            self._sh = self.open_spreadsheet()
+        return self._sh
+
+    def drain(self) -> int:
+        """미반영 기록을 모두 시트에 반영하고, 새로 반영한 행 수를 반환"""
+        with self._drain_lock:
+            pending = self.wal.pending()
+            if not pending:
+                return 0
+
+            by_sheet = {}
+            for rec in pending:
+                by_sheet.setdefault(rec["sheet"], []).append(rec)
+
+            sh = self._spreadsheet()
+            sent = 0
+            for sheet, recs in by_sheet.items():
+                recs = [r for r in recs if r["id"] not in self.rejected]
+                if sheet in self.blocked or not recs:
+                    continue
+                ws = sh.worksheet(sheet)
+                try:
+                    id_col = self.registry.layout(sheet, ws).record_id_col
+                except SchemaError as e:
+                    self.blocked[sheet] = str(e)
+                    logger.error("WAL replay stopped for sheet %s, %d records kept in the log: %s",
+                                 sheet, len(recs), e)
+                    continue
+
+                key = (sheet, id_col)
+                existing = self._known_ids.get(key)
+                if existing is None:
+                    existing = self._known_ids[key] = set(ws.col_values(id_col))
+                done = [r["id"] for r in recs if r["id"] in existing]
+
+                rows, ids = [], []
+                for r in recs:
+                    if r["id"] in existing:
+                        continue
+                    row = list(r["row"])
+                    if len(row) > id_col - 1:
+                        self.rejected.add(r["id"])
+                        logger.error("WAL record %s for sheet %s has %d values but 기록ID is column %d; "
+                                     "kept in the log, not sent", r["id"], sheet, len(row), id_col)
+                        continue
+                    rows.append(row + [""] * (id_col - 1 - len(row)) + [r["id"]])
+                    ids.append(r["id"])
+
+                if rows:
+                    try:
+                        ws.append_rows(rows)
+                    except Exception:
+                        # 일부만 들어갔을 수도 있으므로 다음에는 기록ID 열을 다시 읽음
+                        self._known_ids.pop(key, None)
+                        raise
+                    existing.update(ids)
+                    sent += len(rows)
+
+                self.wal.mark_applied(done + ids)
+            return sent
+
+    def unblock(self, sheet=None):
+        """헤더를 고친 뒤 반영 재개 (캐시된 매핑도 버려서 헤더를 다시 읽음)"""
+        for name in [sheet] if sheet else list(self.blocked):
+            self.blocked.pop(name, None)
+            self.registry.invalidate(name)
+            self._known_ids = {k: v for k, v in self._known_ids.items() if k[0] != name}
+        self.kick()
+
+    # ---------- 백그라운드 실행 ----------
+    def kick(self):
+        """새 기록이 들어왔으니 다음 주기를 기다리지 말고 바로 전송"""
+        self._wakeup.set()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="moodfit-wal-replayer", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception as e:
+                # 시트 장애: 기록은 WAL에 남아 있으므로 다음 주기에 재시도 (연결도 새로 엶)
+                if self._sh is not None and self.evict_spreadsheet is not None:
+                    self.evict_spreadsheet(self._sh)
+                self._sh = None
+                logger.warning("WAL replay failed, will retry (%s: %s)", type(e).__name__, e)
+
+
+# ========================= Streamlit 공용 핸들 =========================
+@st.cache_resource
+def get_wal():
+    """프로세스 전체에서 WAL 하나를 공유 (세션 스레드 간 group commit)"""
+    return SheetWAL()
+
+
+@st.cache_resource
+def get_replayer():
+    replayer = SheetReplayer(
+        get_wal(), lambda: connect_gsheet("MoodFit"), get_schema_registry(),
+        evict_spreadsheet=lambda sh: evict_gsheet("MoodFit", sh),
+    )
+    replayer.start()
+    return replayer
+
+
+def append_row(sheet: str, row) -> str:
+    """WAL에 기록하고 리플레이어를 깨운 뒤 바로 반환 (시트 응답을 기다리지 않음)"""
+    record_id = get_wal().append(sheet, row)
+    get_replayer().kick()
+    return record_id
+
+
+def flush_pending():
+    """
+    시트를 읽기 직전에 호출: 아직 안 넘어간 기록을 먼저 반영해서
+    방금 저장한 행이 조회 결과에 보이도록 함. 실패하면 False.
+    """
+    try:
+        get_replayer().drain()
+        return True
+    except Exception:
+        return False
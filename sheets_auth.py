@@ -1,8 +1,18 @@
-import gspread
-from google.oauth2.service_account import Credentials
+import threading
+
 import streamlit as st
 
-def connect_gsheet(sheet_name: str):
+# 열어 둔 스프레드시트 (시트 이름 → 객체). 워밍업 스레드와 페이지가 같은 연결을 공유
+_OPENED = {}
+_OPENING = {}       # 시트 이름 → 여는 중 잠금 (같은 이름만 서로 기다림)
+_LOCK = threading.Lock()    # 위 두 dict 조회/갱신만 (네트워크 호출 동안은 잡지 않음)
+
+
+def _open(sheet_name):
+    # gspread / google-auth 는 처음 연결할 때만 import (첫 화면 로딩에 포함되지 않게)
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     creds_info = st.secrets["gcp_service_account"]
 
     creds = Credentials.from_service_account_info(
@@ -12,5 +22,32 @@ def connect_gsheet(sheet_name: str):
     )
 
     gc = gspread.authorize(creds)
-    sh = gc.open(sheet_name)
-    return sh
+    return gc.open(sheet_name)
+
+
+def connect_gsheet(sheet_name: str):
+    with _LOCK:
+        sh = _OPENED.get(sheet_name)
+        if sh is not None:
+            return sh
+        opening = _OPENING.setdefault(sheet_name, threading.Lock())
+
+    # 같은 시트를 동시에 열려는 스레드는 먼저 연 쪽 결과를 씀, 다른 시트/캐시 조회는 막지 않음
+    with opening:
+        with _LOCK:
+            sh = _OPENED.get(sheet_name)
+        if sh is None:
+            sh = _open(sheet_name)
+            with _LOCK:
+                _OPENED[sheet_name] = sh
+        return sh
+
+
+def evict_gsheet(sheet_name: str, sh=None):
+    """
+    캐시된 연결 버리기 (호출 실패 후 다음 connect_gsheet 에서 새로 열도록).
+    sh 를 주면 캐시가 아직 그 객체일 때만 (다른 스레드가 이미 새로 연 연결은 유지)
+    """
+    with _LOCK:
+        if sh is None or _OPENED.get(sheet_name) is sh:
+            _OPENED.pop(sheet_name, None)
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+users / daily / evaluation 시트의 열 지향 스냅샷 (오프라인 분석용).
+
+시트 UI 나 get_all_values 로 전체를 매번 내려받는 대신, 이 작업이 시트를 Parquet(zstd) 파일로
+떠 두고 분석 쪽은 파일만 읽습니다.
+
+- 타입 있는 열: typed_tables 와 같은 규칙 (이름/범주 → dictionary, 숫자 → float32, 날짜 → timestamp)
+  + 시트 행 번호 _row
+- 증분: 지난 스냅샷 뒤에 늘어난 행만 시트 범위(A{n}:...) 로 읽어 새 파트 파일로 추가
+  · 추천 결과처럼 저장 직후 채워지는 칸을 위해 마지막 TAIL_ROWS 행은 다시 읽어 비교하고,
+    바뀐 행부터 새 파트로 다시 씀 (이전 파트는 그 앞까지만 유효)
+  · 헤더가 바뀌었거나 행이 줄었으면 그 시트만 전체 다시 export
+  · 파트가 MAX_PARTS 개를 넘으면 로컬에서 하나로 합침 (시트를 다시 읽지 않음)
+- 일관성: 세 시트를 다 쓴 뒤 manifest.json 을 원자적으로 교체
+  → 읽는 쪽은 manifest 한 번으로 세 표가 같은 시점인 스냅샷을 봄
+  (직전 manifest 가 가리키던 파일은 한 세대 더 남겨 두어 읽는 중인 쪽이 깨지지 않음)
+- 읽기: load_table / load_snapshot 이 manifest 의 파트를 memory_map 으로 열고
+  필요한 열만 디코딩
+
+    python snapshot_export.py              # 증분 export (.moodfit/snapshots)
+    python snapshot_export.py --full       # 처음부터 다시
+    python snapshot_export.py --bench 200000
+"""
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from typed_tables import DAILY_SCHEMA, USERS_SCHEMA, to_typed, kind_map
+
+SNAPSHOT_DIR = os.getenv("MOODFIT_SNAPSHOT_DIR", os.path.join(".moodfit", "snapshots"))
+MANIFEST = "manifest.json"
+SHEETS = ("users", "daily", "evaluation")
+TAIL_ROWS = 500
+MAX_PARTS = 32
+
+EXPORT_SCHEMAS = {
+    "users": {**USERS_SCHEMA, "키": "number", "몸무게": "number"},
+    "daily": DAILY_SCHEMA,
+    "evaluation": {
+        "날짜": "date", "이름": "name",
+        "추천운동1": "category", "추천운동2": "category", "추천운동3": "category",
+        "운동1_평가": "number", "운동2_평가": "number", "운동3_평가": "number",
+        "Q_fit": "number", "Q_explain_understand": "number", "Q_explain_convince": "number",
+        "Q_satis": "number", "Q_reuse": "number",
+    },
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("스냅샷 export 에는 pyarrow 가 필요합니다 (pip install pyarrow).")
+
+
+def _row_hash(row):
+    return hashlib.sha1("\x1f".join(row).encode("utf-8")).hexdigest()[:16]
+
+
+def _col_letter(col):
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _pad(rows, width):
+    return [[str(v) for v in r[:width]] + [""] * (width - len(r[:width])) for r in rows]
+
+
+# ========================= 변환 =========================
+def arrow_schema(sheet, header):
+    kind_type = {
+        "name": pa.dictionary(pa.int32(), pa.string()),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "number": pa.float32(),
+        "date": pa.timestamp("us"),
+        "text": pa.string(),
+    }
+    kinds = kind_map(header, EXPORT_SCHEMAS[sheet])
+    return pa.schema([("_row", pa.int32())] + [(c, kind_type[kinds[c]]) for c in header])
+
+
+def to_arrow(sheet, header, rows, start):
+    """시트 행(문자열) → 타입 있는 Arrow 표. start: 첫 행의 0-based 데이터 행 번호"""
+    df = to_typed(header, rows, EXPORT_SCHEMAS[sheet])
+    df.insert(0, "_row", pd.Series(range(start + 2, start + 2 + len(rows)), dtype="int32"))
+    return pa.Table.from_pandas(df, schema=arrow_schema(sheet, header), preserve_index=False)
+
+
+# ========================= manifest =========================
+def read_manifest(directory=SNAPSHOT_DIR):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {"version": 0, "sheets": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(directory, manifest):
+    tmp = os.path.join(directory, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(directory, MANIFEST))
+
+
+def _files(manifest):
+    return {p["file"] for entry in manifest.get("sheets", {}).values() for p in entry["parts"]}
+
+
+# ========================= export =========================
+class SnapshotExporter:
+    def __init__(self, directory=SNAPSHOT_DIR, tail_rows=TAIL_ROWS, max_parts=MAX_PARTS):
+        _require_pyarrow()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.tail_rows = tail_rows
+        self.max_parts = max_parts
+
+    def _write_part(self, sheet, version, table, start):
+        name = f"{sheet}-{version:05d}-{start:07d}.parquet"
+        pq.write_table(table, os.path.join(self.directory, name), compression="zstd")
+        return {"file": name, "start": start, "rows": table.num_rows}
+
+    def _full(self, sheet, ws, version):
+        values = ws.get_all_values()
+        if not values:
+            return None, 0
+        header = [str(h).strip() for h in values[0]]
+        width = len(header)
+        while width and not header[width - 1]:
+            width -= 1
+        header = header[:width]
+        rows = _pad(values[1:], width)
+        parts = [self._write_part(sheet, version, to_arrow(sheet, header, rows, 0), 0)] if rows else []
+        entry = {"header": header, "rows": len(rows), "parts": parts,
+                 "tail_hashes": [_row_hash(r) for r in rows[-self.tail_rows:]]}
+        return entry, len(rows)
+
+    def _incremental(self, sheet, ws, entry, version):
+        """(새 entry, 새로 쓴 행 수) — 증분이 불가능하면 (None, None)"""
+        header = entry["header"]
+        row1 = [str(h).strip() for h in ws.row_values(1)]
+        while row1 and not row1[-1]:
+            row1.pop()
+        if row1 != header:
+            return None, None  # 열이 바뀜
+
+        n, tail = entry["rows"], entry["tail_hashes"]
+        tail_start = n - len(tail)
+        rng = f"A{tail_start + 2}:{_col_letter(len(header))}"
+        fetched = _pad(ws.get(rng) or [], len(header))
+        while fetched and not any(fetched[-1]):
+            fetched.pop()
+        if len(fetched) < len(tail):
+            return None, None  # 행이 지워졌음
+
+        hashes = [_row_hash(r) for r in fetched]
+        changed = next((i for i, (a, b) in enumerate(zip(tail, hashes)) if a != b), len(tail))
+        if changed == len(fetched):
+            return entry, 0
+
+        start = tail_start + changed
+        new_rows = fetched[changed:]
+        parts = []
+        for p in entry["parts"]:
+            if p["start"] >= start:
+                continue
+            parts.append({**p, "rows": min(p["rows"], start - p["start"])})
+        table = to_arrow(sheet, header, new_rows, start)
+
+        if len(parts) + 1 > self.max_parts:
+            # 작은 파트가 쌓이면 로컬 파일끼리 하나로 합침 (시트는 다시 읽지 않음)
+            old = _read_parts(self.directory, parts)
+            parts = [self._write_part(sheet, version, pa.concat_tables([old, table]), 0)]
+        else:
+            parts.append(self._write_part(sheet, version, table, start))
+
+        return {
+            "header": header,
+            "rows": start + len(new_rows),
+            "parts": parts,
+            "tail_hashes": (tail[:changed] + hashes[changed:])[-self.tail_rows:],
+        }, len(new_rows)
+
+    def export(self, spreadsheet, sheets=SHEETS, full=False):
+        """스냅샷 한 세대 만들기. 반환: {시트: 새로 쓴 행 수}"""
+        previous = read_manifest(self.directory)
+        version = previous["version"] + 1
+        manifest = {"version": version, "created": datetime.now().isoformat(timespec="seconds"),
+                    "sheets": dict(previous.get("sheets", {}))}
+        written = {}
+        for sheet in sheets:
+            ws = spreadsheet.worksheet(sheet)
+            entry = previous["sheets"].get(sheet)
+            new_entry, count = (None, None) if full or entry is None else self._incremental(sheet, ws, entry, version)
+            if new_entry is None:
+                new_entry, count = self._full(sheet, ws, version)
+            if new_entry is not None:
+                manifest["sheets"][sheet] = new_entry
+            written[sheet] = count or 0
+
+        _write_manifest(self.directory, manifest)
+
+        # 이번 세대 + 직전 세대가 가리키는 파일만 남김
+        keep = _files(manifest) | _files(previous)
+        for name in os.listdir(self.directory):
+            if name.endswith(".parquet") and name not in keep:
+                os.remove(os.path.join(self.directory, name))
+        return written
+
+
+# ========================= 읽기 =========================
+def _read_parts(directory, parts, columns=None):
+    tables = [
+        pq.read_table(os.path.join(directory, p["file"]), columns=columns, memory_map=True).slice(0, p["rows"])
+        for p in parts
+    ]
+    return pa.concat_tables(tables) if len(tables) != 1 else tables[0]
+
+
+def load_table(sheet, columns=None, directory=SNAPSHOT_DIR, manifest=None):
+    """스냅샷의 한 시트 → Arrow 표 (columns 를 주면 그 열만 디코딩)"""
+    _require_pyarrow()
+    manifest = manifest or read_manifest(directory)
+    entry = manifest["sheets"].get(sheet)
+    if entry is None:
+        raise FileNotFoundError(f"{directory} 에 {sheet} 스냅샷이 없습니다. 먼저 python snapshot_export.py")
+    if not entry["parts"]:
+        schema = arrow_schema(sheet, entry["header"])
+        return (schema if columns is None else pa.schema([schema.field(c) for c in columns])).empty_table()
+    return _read_parts(directory, entry["parts"], columns)
+
+
+def load_snapshot(columns=None, directory=SNAPSHOT_DIR):
+    """
+    세 시트를 같은 세대에서 DataFrame 으로 ({시트: DataFrame}).
+    columns: {시트: [열, ...]} (없는 시트는 전체 열)
+    """
+    manifest = read_manifest(directory)
+    columns = columns or {}
+    return {
+        sheet: load_table(sheet, columns.get(sheet), directory, manifest).to_pandas()
+        for sheet in manifest["sheets"]
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="시트 → 열 지향 스냅샷 (Parquet)")
+    ap.add_argument("--dir", default=SNAPSHOT_DIR)
+    ap.add_argument("--full", action="store_true", help="증분 대신 전체 다시 export")
+    ap.add_argument("--bench", type=int, default=0, help="가짜 daily N행으로 export/읽기 시간 측정")
+    args = ap.parse_args()
+
+    if not args.bench:
+        from sheets_auth import connect_gsheet
+
+        t0 = time.perf_counter()
+        written = SnapshotExporter(args.dir).export(connect_gsheet("MoodFit"), full=args.full)
+        print(f"{read_manifest(args.dir)['version']}세대 ({time.perf_counter() - t0:.1f}s):",
+              ", ".join(f"{s} +{n}행" for s, n in written.items()))
+        raise SystemExit
+
+    # 가짜 daily N행으로 export / 증분 / 읽기 시간 측정 (검증은 tests/test_snapshot_export.py)
+    import csv
+    import io
+    import shutil
+    import tempfile
+
+    import numpy as np
+    from sheet_schema import SCHEMAS
+
+    rng = np.random.default_rng(0)
+    emotions = ["기쁨, 신남", "피곤", "불안, 긴장", "차분함", "짜증"]
+    workouts = ["요가", "걷기", "스쿼트", "필라테스", "수영", "줄넘기"]
+
+    def daily_row(i):
+        return [f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", f"사용자{i % 500}", emotions[i % 5],
+                f"{rng.uniform(1, 5):.2f}", str(rng.integers(4, 10)), "30", "보통", "체중 감량",
+                "실내(집)", "요가매트", *rng.choice(workouts, 3), "이유1", "이유2", "이유3", f"id{i}"]
+
+    class FakeWS:
+        def __init__(self, values):
+            self.values = values
+            self.cells_read = 0
+
+        def get_all_values(self):
+            self.cells_read += sum(map(len, self.values))
+            return [list(r) for r in self.values]
+
+        def row_values(self, i):
+            return list(self.values[i - 1])
+
+        def get(self, rng_a1):
+            start = int(rng_a1.split(":")[0][1:])
+            out = [list(r) for r in self.values[start - 1:]]
+            self.cells_read += sum(map(len, out))
+            return out
+
+    n = args.bench
+    book = {
+        "daily": FakeWS([list(SCHEMAS["daily"]) + ["기록ID"]] + [daily_row(i) for i in range(n)]),
+        "users": FakeWS([list(SCHEMAS["users"])] + [[f"사용자{i}", "30", "여성", "160", "55", "보통", "없음", ""]
+                                                    for i in range(500)]),
+        "evaluation": FakeWS([list(SCHEMAS["evaluation"])] + [["2025-01-01", "사용자1", "요가", "걷기", "수영",
+                                                               "4", "3", "5", "4", "4", "3", "4", "5", "", ""]] * 1000),
+    }
+
+    class FakeBook:
+        def worksheet(self, name):
+            return book[name]
+
+    tmp = tempfile.mkdtemp()
+    exporter = SnapshotExporter(tmp)
+    t0 = time.perf_counter()
+    exporter.export(FakeBook())
+    t1 = time.perf_counter()
+
+    # 새 행 100개 + 방금 저장한 행에 추천 결과가 채워진 경우 → 증분
+    book["daily"].values[-1][10] = "바뀐운동"
+    book["daily"].values += [daily_row(n + i) for i in range(100)]
+    before = book["daily"].cells_read
+    t2 = time.perf_counter()
+    written = exporter.export(FakeBook())
+    t3 = time.perf_counter()
+
+    t4 = time.perf_counter()
+    load_table("daily", ["이름", "감정_평균각성점수"], tmp).to_pandas()
+    t5 = time.perf_counter()
+
+    # 비교: 전체 값을 CSV 로 저장해 두고 매번 다시 파싱하는 방식
+    buf = io.StringIO()
+    csv.writer(buf).writerows(book["daily"].values)
+    csv_bytes = len(buf.getvalue().encode("utf-8"))
+    t6 = time.perf_counter()
+    pd.read_csv(io.StringIO(buf.getvalue()), usecols=["이름", "감정_평균각성점수"])
+    t7 = time.perf_counter()
+
+    size = sum(os.path.getsize(os.path.join(tmp, p["file"])) for p in read_manifest(tmp)["sheets"]["daily"]["parts"])
+    print(f"daily {n:,}행: 전체 export {t1 - t0:.2f}s, 증분(+100행, 수정 1행) {(t3 - t2) * 1000:.0f}ms "
+          f"(다시 쓴 행 {written['daily']}개, 시트 셀 읽기 {book['daily'].cells_read - before:,}개)")
+    print(f"파일 {size / 1e6:.1f}MB (CSV {csv_bytes / 1e6:.1f}MB), 2열 읽기 {(t5 - t4) * 1000:.0f}ms "
+          f"/ CSV 2열 파싱 {(t7 - t6) * 1000:.0f}ms")
+    shutil.rmtree(tmp)
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 응답 구조화 출력 + 검증 + 부분 수리.
+
+- TOP3_FORMAT / QUERY_FORMAT: response_format 으로 넘기는 JSON schema (strict)
+    · 스키마는 요청마다 같은 고정값 (후보 이름 enum 을 넣으면 요청마다 스키마가 달라져
+      서버가 매번 새로 컴파일하므로, 이름 검사는 여기 Top3Validator 에서)
+    · 키 순서가 rank → 운동명 → 이유 로 고정되므로 스트리밍 파서가 운동명을 이유보다 먼저 받음
+- load_json(text): 구조화 출력이면 json.loads 한 번으로 끝. 실패할 때만 가장 바깥 {...} 을 잘라 한 번 더
+- Top3Validator: 후보 이름 색인으로 항목을 한 번씩만 보고 자리(0~2)에 배정
+    · 띄어쓰기/대소문자/구분점만 다른 이름은 정식 운동명으로 바로 고침 (LLM 호출 없음)
+    · 후보 밖 이름, 중복, 요가 계열 초과, 빈 이유는 problems 에 남기고 그 자리만 비워 둠
+- repair_messages: 비어 있는 자리만 다시 요청 (원래 messages 뒤에 덧붙여 prefix 캐시를 그대로 씀)
+  → 전체 재시도 대신 짧은 응답 한 번, 그래도 남는 자리는 페이지에서 규칙 기반으로 채움
+
+    python structured_output.py     # 파싱 속도 비교 + 잘못된 응답 수리 확인
+"""
+import json
+from collections import namedtuple
+
+from rule_engine import is_yoga_family
+
+TOP3_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "top3": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "rank": {"type": "integer"},
+                    "운동명": {"type": "string"},
+                    "이유": {"type": "string"},
+                },
+                "required": ["rank", "운동명", "이유"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["top3"],
+    "additionalProperties": False,
+}
+
+QUERY_SCHEMA = {
+    "type": "object",
+    "properties": {"query": {"type": "string"}},
+    "required": ["query"],
+    "additionalProperties": False,
+}
+
+TOP3_FORMAT = {"type": "json_schema", "json_schema": {"name": "top3", "strict": True, "schema": TOP3_SCHEMA}}
+QUERY_FORMAT = {"type": "json_schema", "json_schema": {"name": "query", "strict": True, "schema": QUERY_SCHEMA}}
+
+REPAIR_MIN_SEC = 1.5     # 부분 재요청을 보낼 최소 남은 LLM 예산 (그보다 짧으면 규칙 기반으로 채움)
+
+Problem = namedtuple("Problem", ["index", "name", "reason"])
+
+_LOOSE = str.maketrans("", "", " \t·-_")
+
+
+def _loose(name):
+    return str(name).translate(_LOOSE).lower()
+
+
+def load_json(text):
+    """응답 문자열 → dict (구조화 출력이면 한 번에, 코드블록/설명이 섞이면 가장 바깥 {...} 만)"""
+    text = (text or "").strip()
+    if not text:
+        raise ValueError("LLM 응답이 비어 있습니다.")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end <= start:
+            raise
+        data = json.loads(text[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("LLM 응답이 JSON 객체가 아닙니다.")
+    return data
+
+
+class Top3Validator:
+    """
+    후보 이름으로 항목을 검사하고 자리를 배정 (스트리밍 이벤트 / 응답 전체 둘 다).
+    자리 번호는 통과한 순서대로 0, 1, 2 — 잘못된 항목이 끼어도 뒤 항목이 앞으로 당겨짐.
+    """
+
+    def __init__(self, names, k=3, max_yoga=2):
+        self.k = k
+        self.max_yoga = max_yoga
+        self._exact = set(names)
+        self._loose = {}
+        for n in names:
+            self._loose.setdefault(_loose(n), n)
+        self.chosen = {}        # 자리 → 정식 운동명 (작업 시작됨)
+        self.items = {}         # 자리 → 완성된 항목 {"rank", "운동명", "이유"}
+        self.problems = []
+        self.repaired = {}      # LLM 이 쓴 이름 → 고친 정식 이름
+        self._slot_of = {}      # 응답 안 항목 index → 자리
+
+    def resolve(self, name):
+        """정식 운동명 / 후보에 없으면 None"""
+        name = str(name or "").strip()
+        if name in self._exact:
+            return name
+        canonical = self._loose.get(_loose(name))
+        if canonical is not None:
+            self.repaired[name] = canonical
+        return canonical
+
+    def _reject(self, name):
+        canonical = self.resolve(name)
+        if canonical is None:
+            return "후보에 없음"
+        if canonical in self.chosen.values():
+            return "중복"
+        if len(self.chosen) >= self.k:
+            return "3개 초과"
+        if is_yoga_family(canonical) and sum(map(is_yoga_family, self.chosen.values())) >= self.max_yoga:
+            return "요가 계열 초과"
+        return None
+
+    def accept_name(self, index, name):
+        """운동명이 나온 순간: 통과하면 (자리, 정식 운동명), 아니면 None"""
+        if index in self._slot_of:
+            return None
+        reason = self._reject(name)
+        if reason:
+            self.problems.append(Problem(index, str(name or ""), reason))
+            return None
+        slot = next(s for s in range(self.k) if s not in self.chosen)
+        self.chosen[slot] = self.resolve(name)
+        self._slot_of[index] = slot
+        return slot, self.chosen[slot]
+
+    def accept_entry(self, index, entry):
+        """
+        항목이 닫힌 순간: 통과하면 (자리, 항목, 새로 배정됐는지), 아니면 None.
+        운동명 이벤트를 못 받은 항목(키 누락 등)은 여기서 이름까지 검사.
+        """
+        if not isinstance(entry, dict):
+            self.problems.append(Problem(index, "", "형식 오류"))
+            return None
+        new = False
+        if index not in self._slot_of:
+            if any(p.index == index for p in self.problems):
+                return None
+            if self.accept_name(index, entry.get("운동명")) is None:
+                return None
+            new = True
+        slot = self._slot_of[index]
+        reason = str(entry.get("이유") or "").strip()
+        if not reason:
+            self.problems.append(Problem(index, self.chosen[slot], "이유 없음"))
+            return None
+        self.items[slot] = {"rank": slot + 1, "운동명": self.chosen[slot], "이유": reason}
+        return slot, self.items[slot], new
+
+    def validate(self, data, key="top3"):
+        """응답 전체를 한 번에 검사: [(자리, 항목, 새로 배정됐는지), ...]"""
+        entries = data.get(key) if isinstance(data, dict) else None
+        out = []
+        for index, entry in enumerate(entries if isinstance(entries, list) else []):
+            if isinstance(entry, dict) and "운동명" in entry:
+                self.accept_name(index, entry["운동명"])
+            result = self.accept_entry(index, entry)
+            if result:
+                out.append(result)
+        return out
+
+    def missing(self):
+        """항목이 없는 자리 (이름만 있는 자리 포함)"""
+        return [s for s in range(self.k) if s not in self.items]
+
+    # ---------- 부분 수리 ----------
+    def repair_messages(self, messages, raw):
+        """비어 있는 자리만 다시 받는 messages (원래 대화 + 원래 응답 + 고칠 자리 안내)"""
+        lines = ["위 응답에서 아래 자리만 다시 작성해 같은 형식 {\"top3\": [...]} 으로 그 자리들만 출력하세요."]
+        done = [f"{s + 1}위 {self.items[s]['운동명']}" for s in sorted(self.items)]
+        if done:
+            lines.append("확정(다시 쓰지 말 것): " + ", ".join(done))
+        for s in self.missing():
+            if s in self.chosen:
+                lines.append(f"- rank {s + 1}: 운동명 '{self.chosen[s]}' 그대로, 이유만 작성")
+            else:
+                lines.append(f"- rank {s + 1}: rule_candidates 안의 새 운동 (확정된 운동과 중복 금지)")
+        rejected = [f"'{p.name}'({p.reason})" for p in self.problems if p.name and p.reason != "이유 없음"]
+        if rejected:
+            lines.append("사용 불가: " + ", ".join(rejected))
+        return list(messages) + [
+            {"role": "assistant", "content": raw},
+            {"role": "user", "content": "\n".join(lines)},
+        ]
+
+    def apply_repair(self, data):
+        """수리 응답 반영: 비어 있던 자리만 채움. [(자리, 항목, 새로 배정됐는지), ...]"""
+        entries = data.get("top3") if isinstance(data, dict) else None
+        out = []
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            rank = entry.get("rank")
+            slot = rank - 1 if isinstance(rank, int) else None
+            if slot not in self.missing():
+                continue
+            new = slot not in self.chosen
+            if new:
+                problem = self._reject(entry.get("운동명"))
+                if problem:
+                    self.problems.append(Problem(None, str(entry.get("운동명") or ""), problem))
+                    continue
+                self.chosen[slot] = self.resolve(entry.get("운동명"))
+            # 이름이 정해져 있던 자리는 이름을 바꾸지 못하게 (이미 시트 기록/플레이리스트 조회가 시작됨)
+            reason = str(entry.get("이유") or "").strip()
+            if not reason:
+                continue
+            self.items[slot] = {"rank": slot + 1, "운동명": self.chosen[slot], "이유": reason}
+            out.append((slot, self.items[slot], new))
+        return out
+
+
+if __name__ == "__main__":
+    # 파싱 속도 (기존 정규식 parse_json vs load_json) + 규칙 위반 응답의 로컬/부분 수리 (검증은 tests/test_structured_output.py)
+    #   python structured_output.py
+    import re
+    import time
+    from catalog import load_catalog
+    from emotion_model import EmotionWorkoutIndex, select_candidates
+    from prompt_builder import count_tokens
+
+    def parse_json_regex(text):
+        text = text.strip()
+        text = re.sub(r"^```json", "", text, flags=re.IGNORECASE).strip()
+        text = re.sub(r"^```", "", text, flags=re.IGNORECASE).strip()
+        text = re.sub(r"```$", "", text).strip()
+        m = re.search(r"\{[\s\S]*\}", text)
+        if m:
+            text = m.group(0)
+        return json.loads(text)
+
+    workouts = load_catalog().to_frame()
+    workouts["운동목적_list"] = [[t.strip() for t in str(x).split(",") if t.strip()] for x in workouts["운동목적"]]
+    cands, _ = select_candidates(workouts, EmotionWorkoutIndex.from_catalog(workouts), "피곤", 2.5)
+    names = list(cands["운동명"])
+    reason = "오늘 수면이 6시간으로 짧고 각성도가 낮아 부담이 적은 운동이 좋습니다. " * 3
+    good = json.dumps({"top3": [{"rank": i + 1, "운동명": n, "이유": reason} for i, n in enumerate(names[:3])]},
+                      ensure_ascii=False)
+
+    n = 20000
+    fenced = "```json\n" + good + "\n```"
+    for label, text in (("JSON 그대로", good), ("코드블록", fenced)):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            parse_json_regex(text)
+        t1 = time.perf_counter()
+        for _ in range(n):
+            load_json(text)
+        t2 = time.perf_counter()
+        print(f"{label}: 정규식 parse_json {(t1 - t0) / n * 1e6:.1f}µs / load_json {(t2 - t1) / n * 1e6:.1f}µs")
+    t0 = time.perf_counter()
+    for _ in range(n):
+        Top3Validator(names).validate(load_json(good))
+    print(f"후보 {len(names)}개 색인 + 검증 포함 {(time.perf_counter() - t0) / n * 1e6:.1f}µs/응답")
+
+    # 띄어쓰기만 다른 이름 / 후보 밖 이름 / 중복 / 빈 이유
+    spaced = names[0][:1] + " " + names[0][1:] if len(names[0]) > 1 else names[0]
+    bad = {"top3": [
+        {"rank": 1, "운동명": spaced, "이유": reason},
+        {"rank": 2, "운동명": "없는운동", "이유": reason},
+        {"rank": 3, "운동명": names[0], "이유": reason},
+        {"rank": 4, "운동명": names[1], "이유": ""},
+    ]}
+    v = Top3Validator(names)
+    v.validate(bad)
+    raw = json.dumps(bad, ensure_ascii=False)
+    tail = v.repair_messages([], raw)[-1]["content"]
+    fixed = v.apply_repair({"top3": [
+        {"rank": 2, "운동명": "다른이름", "이유": "이유 보충"},
+        {"rank": 3, "운동명": names[2], "이유": reason},
+    ]})
+    print(f"로컬 수리 {v.repaired} / 문제 {[(p.name, p.reason) for p in v.problems]}")
+    print(f"부분 수리 요청 (원래 messages 뒤에 덧붙임, {count_tokens(tail)} tokens):\n{tail}")
+    print(f"수리 응답 completion ≈{count_tokens(json.dumps({'top3': [e[1] for e in fixed]}, ensure_ascii=False))} "
+          f"tokens vs 전체 재시도 ≈{count_tokens(good)} tokens")
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""저장소 최상위 모듈(flat)을 tests/ 에서 바로 import 하도록 경로 추가"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""gspread Worksheet / Spreadsheet 대신 쓰는 메모리 시트 (호출 횟수 기록)"""
+import re
+from collections import Counter
+
+
+class FakeWorksheet:
+    def __init__(self, header=(), rows=()):
+        self.rows = ([list(header)] if header else []) + [list(r) for r in rows]
+        self.calls = Counter()
+
+    def row_values(self, i):
+        self.calls["row_values"] += 1
+        return list(self.rows[i - 1]) if len(self.rows) >= i else []
+
+    def col_values(self, c):
+        self.calls["col_values"] += 1
+        return [r[c - 1] if len(r) >= c else "" for r in self.rows]
+
+    def get_all_values(self):
+        self.calls["get_all_values"] += 1
+        return [list(r) for r in self.rows]
+
+    def get(self, rng):
+        self.calls["get"] += 1
+        m = re.fullmatch(r"A(\d+):([A-Z]+)", rng)
+        start, last = int(m.group(1)), m.group(2)
+        width = 0
+        for ch in last:
+            width = width * 26 + ord(ch) - 64
+        return [list(r[:width]) for r in self.rows[start - 1:]]
+
+    def append_row(self, row):
+        self.calls["append_row"] += 1
+        self.rows.append(list(row))
+
+    def append_rows(self, rows):
+        self.calls["append_rows"] += 1
+        self.rows.extend(list(r) for r in rows)
+
+    def update_cell(self, r, c, v):
+        self.calls["update_cell"] += 1
+        while len(self.rows) < r:
+            self.rows.append([])
+        row = self.rows[r - 1]
+        row += [""] * (c - len(row))
+        row[c - 1] = v
+
+
+class FakeSpreadsheet:
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.opened = 0
+
+    def worksheet(self, name):
+        return self.sheets[name]
+
+    def __call__(self):
+        """open_spreadsheet 자리에 그대로 넘길 수 있게"""
+        self.opened += 1
+        return self
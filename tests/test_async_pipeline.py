@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""비동기 코어: 의존 그래프 겹쳐 실행 / 실패 대체, 다리, 공유 클라이언트"""
+import asyncio
+import threading
+
+import pytest
+
+import async_pipeline
+from async_pipeline import AsyncBridge, TaskGraph, blocking, get_async_openai
+
+
+@pytest.fixture(scope="module")
+def bridge():
+    return AsyncBridge()
+
+
+def _sleep(value, seconds):
+    async def run(*_deps):
+        await asyncio.sleep(seconds)
+        return value
+    return run
+
+
+def test_graph_overlaps_independent_tasks(bridge):
+    graph = TaskGraph()
+    for name in ("weather", "daily", "users"):
+        graph.add(name, _sleep(name, 0.1))
+
+    async def prompt(daily, weather):
+        return f"{daily}+{weather}"
+
+    graph.add("prompt", prompt, deps=("daily", "weather"))
+    assert bridge.run(graph.run())["prompt"] == "daily+weather"
+    path, end = graph.critical_path()
+    assert path[-1] == "prompt" and path[0] in ("daily", "weather")
+    assert end < graph.busy_seconds()       # 세 읽기가 겹쳐서 실행됨
+
+
+def test_failed_task_uses_fallback(bridge):
+    async def broken():
+        raise ConnectionError("sheet down")
+
+    graph = TaskGraph().add("daily", broken, fallback=[]).add("rows", _sleep("ok", 0), deps=("daily",))
+    assert bridge.run(graph.run()) == {"daily": [], "rows": "ok"}
+    assert isinstance(graph.errors["daily"], ConnectionError)
+    with pytest.raises(ValueError):
+        TaskGraph().add("top3", _sleep(None, 0), deps=("daily",))
+
+
+def test_bridge_iterate_and_blocking(bridge):
+    async def chunks():
+        for i in range(3):
+            yield await blocking(lambda x=i: x * 2)
+
+    assert list(bridge.iterate(chunks())) == [0, 2, 4]
+
+
+def test_openai_client_is_created_once_under_concurrency(monkeypatch):
+    monkeypatch.setattr(async_pipeline, "_OPENAI", {})
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def worker():
+        barrier.wait()
+        clients.append(get_async_openai("sk-test"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(clients) == 8 and len({id(c) for c in clients}) == 1
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""외부 호출 장부: 토큰/비용 기록, 예외 결과, 파일 회전, 집계"""
+from types import SimpleNamespace
+
+import pytest
+
+from call_ledger import CallLedger, call_cost, summarize
+from resilience import CircuitOpenError
+
+
+def _usage(prompt, completion, cached=0):
+    return SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion,
+                           prompt_tokens_details=SimpleNamespace(cached_tokens=cached))
+
+
+def test_call_cost_uses_cached_price():
+    full = call_cost("gpt-4o-mini", 2000, 100)
+    cached = call_cost("gpt-4o-mini", 2000, 100, cached_tokens=1024)
+    assert full == pytest.approx((2000 * 0.15 + 100 * 0.60) / 1e6)
+    assert cached < full
+    assert call_cost("unknown-model", 2000, 100) == 0.0
+
+
+def test_track_records_usage_and_outcome(tmp_path):
+    ledger = CallLedger(str(tmp_path))
+    with ledger.track("openai", op="top3", model="gpt-4o-mini", user="kim") as c:
+        c.estimate(900)
+        c.first_token()
+        c.set_usage(_usage(1200, 120, cached=1024))
+    with pytest.raises(TimeoutError):
+        with ledger.track("openai", op="top3", model="gpt-4o-mini"):
+            raise TimeoutError("budget")
+    with pytest.raises(CircuitOpenError):
+        with ledger.track("spotify", op="search"):
+            raise CircuitOpenError("spotify", 3.0)
+
+    df = ledger.load()
+    ok = df.iloc[0]
+    assert ok["prompt_tokens"] == 1200 and ok["cache"] == "hit" and not ok["estimated"]
+    assert ok["ttft_ms"] is not None and ok["cost_usd"] > 0
+    assert df["outcome"].tolist() == ["ok", "timeout", "circuit_open"]
+
+
+def test_rotation_keeps_recent_files(tmp_path):
+    ledger = CallLedger(str(tmp_path), max_bytes=4 * 1024, keep=3)
+    for i in range(500):
+        ledger.record("weather", op="get", user="kim", latency_ms=float(i))
+    files = ledger.files()
+    df = ledger.load()
+    assert len(files) == 4 and files[-1] == ledger.path
+    assert 0 < len(df) < 500 and df["latency_ms"].iloc[-1] == 499.0
+
+
+def test_summarize_by_dependency(tmp_path):
+    ledger = CallLedger(str(tmp_path))
+    for _ in range(3):
+        with ledger.track("openai", op="top3", model="gpt-4o-mini") as c:
+            c.set_usage(_usage(1000, 100))
+    ledger.record("spotify", op="search", latency_ms=200.0, outcome="error:HTTPError")
+    out = summarize(ledger.load(), by=("dependency",)).set_index("dependency")
+    assert out.loc["openai", "호출"] == 3 and out.loc["openai", "prompt토큰"] == 3000
+    assert out.loc["spotify", "실패율"] == 1.0
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""카탈로그 핫 리로드: 내용이 바뀔 때만 재빌드, 교체 후에도 이전 스냅샷은 그대로"""
+import os
+import shutil
+
+import pytest
+
+from catalog import ARTIFACT, SOURCE_PRIMARY, SOURCE_PURPOSE
+from catalog_watch import CatalogWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    sources = [shutil.copy(p, tmp_path) for p in (SOURCE_PRIMARY, SOURCE_PURPOSE)]
+    # interval=0: 감시 스레드 없이 check() 를 직접 호출
+    return CatalogWatcher(str(tmp_path / ARTIFACT), sources, interval=0,
+                          index_path=str(tmp_path / "search.npz"))
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_touch_without_change_keeps_snapshot(watcher):
+    first = watcher.current()
+    _bump_mtime(watcher.sources[0])
+    assert watcher.check() is False
+    assert watcher.swaps == 0 and watcher.current() is first
+
+
+def test_content_change_swaps_snapshot(watcher):
+    first = watcher.current()
+    name = first.workouts["운동명"].iloc[0]
+    old = first.intensity_map[name]
+    new = "고강도" if old != "고강도" else "저강도"
+
+    with open(watcher.sources[0], encoding="utf-8-sig") as f:
+        lines = f.read().splitlines(True)
+    lines[1] = lines[1].replace(old, new, 1)
+    with open(watcher.sources[0], "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    _bump_mtime(watcher.sources[0])
+
+    assert watcher.check() is True
+    snap = watcher.current()
+    assert watcher.swaps == 1 and snap.version != first.version
+    assert snap.intensity_map[name] == new
+    # 이전 스냅샷을 잡고 있던 rerun 은 끝까지 이전 값, 캐시도 버전별
+    assert first.intensity_map[name] == old and first.cache("x") is not snap.cache("x")
+
+
+def test_broken_source_keeps_previous_snapshot(watcher):
+    first = watcher.current()
+    with open(watcher.sources[0], "w", encoding="utf-8") as f:
+        f.write("not,a,catalog\n1,2,3\n")     # 필수 컬럼 없음
+    _bump_mtime(watcher.sources[0])
+
+    assert watcher.check() is False
+    assert watcher.current() is first and watcher.last_error
+    assert watcher.check() is False    # 같은 변경은 한 번만 시도
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""키/몸무게 파싱과 사용자×운동 kcal 행렬"""
+import numpy as np
+import pandas as pd
+
+from catalog import load_catalog
+from energy import cohort_kcal, kcal_rank_score, parse_height_cm, parse_weight_kg, session_kcal
+
+
+def test_parse_height_cm():
+    got = parse_height_cm(["170", "170cm", "1.72m", "1.65", "175 센티", "", "abc", "17", "999"])
+    expected = [170, 170, 172, 165, 175, np.nan, np.nan, np.nan, np.nan]
+    assert np.allclose(got, expected, equal_nan=True)
+
+
+def test_parse_weight_kg():
+    got = parse_weight_kg(["65", "65kg", "65.5 키로", "143lb", "70,5", "", "6", "1000"])
+    expected = [65, 65, 65.5, 143 * 0.45359237, 70.5, np.nan, np.nan, np.nan]
+    assert np.allclose(got, expected, equal_nan=True)
+
+
+def test_cohort_kcal_matches_loop():
+    catalog = load_catalog().to_frame()
+    rng = np.random.default_rng(0)
+    n = 50
+    users = pd.DataFrame({
+        "이름": [f"user{i}" for i in range(n)],
+        "몸무게": [f"{w:.1f}kg" for w in rng.uniform(45, 100, n)],
+    })
+    minutes = rng.integers(10, 120, n)
+    table = cohort_kcal(users, catalog, minutes)
+
+    energy = catalog["단위체중당에너지소비량"].tolist()
+    loop = [[e * float(w.replace("kg", "")) * m / 60 for e in energy]
+            for w, m in zip(users["몸무게"], minutes)]
+    assert table.shape == (n, len(catalog))
+    assert np.allclose(table.to_numpy(), np.array(loop), rtol=1e-4)
+
+
+def test_session_kcal_unparsed_weight_is_nan():
+    assert np.isnan(session_kcal("모름", 30, [5.0, 7.0])).all()
+    assert np.allclose(session_kcal("60kg", 30, [5.0, 7.0]), [150.0, 210.0])
+
+
+def test_kcal_rank_score():
+    assert np.allclose(kcal_rank_score([100.0, np.nan, 50.0]), [1.0, 0.0, 0.5])
+    assert kcal_rank_score([]).size == 0
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""evaluation 증분 집계: 열 위치는 헤더 매핑으로, 증분 = 전체 재계산"""
+import numpy as np
+import pytest
+
+from eval_analytics import EvalAnalytics, QUESTIONS
+from fakes import FakeWorksheet
+from sheet_schema import RECORD_ID_HEADER, SCHEMAS, SheetLayout
+
+HEADER = list(SCHEMAS["evaluation"]) + [RECORD_ID_HEADER]
+
+
+def _row(name, rating, answers):
+    return ["2025-03-01", "kim", name, "요가", "", str(rating), "4", "", *map(str, answers), "", ""]
+
+
+def _rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    names = ["다트", "요가", "줄넘기", "수영"]
+    return [_row(names[rng.integers(0, 4)], rng.integers(1, 6), rng.integers(1, 6, len(QUESTIONS)))
+            for _ in range(n)]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return EvalAnalytics({"다트": "저강도", "요가": "저강도"}, path=str(tmp_path / "state.json"))
+
+
+def test_incremental_refresh_equals_rebuild(engine, tmp_path):
+    ws = FakeWorksheet(HEADER, _rows(40))
+    engine.refresh(ws)
+    ws.rows.extend(_rows(25, seed=1))
+    engine.refresh(ws)
+    assert engine.cursor == 65
+
+    full = EvalAnalytics(engine.intensity_map, path=str(tmp_path / "full.json"))
+    full.rebuild(ws)
+    assert engine.workout_summary().equals(full.workout_summary())
+    assert engine.cronbach_alpha() == pytest.approx(full.cronbach_alpha())
+    assert engine.intensity_breakdown().equals(full.intensity_breakdown())
+
+
+def test_columns_follow_header_layout(tmp_path):
+    # 선언 순서와 다른 위치 (예: 앞에 열이 하나 더 있는 사본 시트)
+    header = ["메모"] + HEADER
+    rows = [[""] + r for r in _rows(30)]
+    shifted = EvalAnalytics(path=str(tmp_path / "a.json"), layout=SheetLayout("evaluation", header))
+    shifted.rebuild(FakeWorksheet(header, rows))
+    plain = EvalAnalytics(path=str(tmp_path / "b.json"))
+    plain.rebuild(FakeWorksheet(HEADER, _rows(30)))
+    assert shifted.workout_summary().equals(plain.workout_summary())
+    assert shifted.columns.range(2) == "A2:N"
+
+
+def test_cronbach_alpha_known_value(engine):
+    engine.ingest([_row("다트", 3, [s] * len(QUESTIONS)) for s in (1, 2, 3, 4, 5)])
+    assert engine.cronbach_alpha() == pytest.approx(1.0)
+
+
+def test_state_roundtrip(engine, tmp_path):
+    engine.rebuild(FakeWorksheet(HEADER, _rows(20)))
+    loaded = EvalAnalytics(path=engine.path)
+    assert loaded.load() and loaded.cursor == 20
+    assert loaded.question_distribution().equals(engine.question_distribution())
+
+
+def test_state_keeps_intensity_map(engine):
+    engine.rebuild(FakeWorksheet(HEADER, _rows(20)), intensity_map={"다트": "고강도"})
+    # 재시작: 새 카탈로그 매핑으로 만들어도 저장된 집계가 쓰던 매핑을 복원 (바뀐 것을 알아챌 수 있게)
+    loaded = EvalAnalytics({"다트": "저강도"}, path=engine.path)
+    assert loaded.load() and loaded.intensity_map == {"다트": "고강도"}
+    assert loaded.intensity_breakdown().equals(engine.intensity_breakdown())
+
+
+class _BrokenSheet:
+    def get(self, *_a, **_k):
+        raise ConnectionError("sheet down")
+
+
+def test_failed_rebuild_is_attempted_once_per_catalog_version(engine):
+    assert engine.catalog_outdated("v2", {"다트": "고강도"})
+    with pytest.raises(ConnectionError):
+        engine.rebuild(_BrokenSheet(), intensity_map={"다트": "고강도"}, catalog_version="v2")
+    # 같은 버전으로는 다시 재계산하지 않음 (rerun 마다 실패를 반복하지 않게)
+    assert not engine.catalog_outdated("v2", {"다트": "고강도"})
+    assert engine.catalog_outdated("v3", {"다트": "중강도"})
+
+
+def test_catalog_change_without_new_intensity_skips_rebuild(engine):
+    assert not engine.catalog_outdated("v2", dict(engine.intensity_map))
+    assert engine.catalog_version == "v2"
+    engine.rebuild(FakeWorksheet(HEADER, _rows(5)))
+    loaded = EvalAnalytics(path=engine.path)
+    assert loaded.load() and loaded.catalog_version == "v2"
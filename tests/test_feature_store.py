@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""사용자별 최근 이력 피처 저장소"""
+import json
+import math
+
+import pytest
+
+from feature_store import FeatureStore, UserFeatures
+from sheet_schema import SCHEMAS
+from typed_tables import typed_daily
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeatureStore(str(tmp_path))
+
+
+# ---------- 빈 칸 (타입 있는 daily 프레임의 NaN) ----------
+def test_blank_cells_are_missing_not_nan(store):
+    header = list(SCHEMAS["daily"])
+    blank = ["2025-03-01", "kim", "피곤", "", "", "30", "보통", "체중 감량", "실내(집)", ""] + [""] * 6
+    full = ["2025-03-02", "kim", "피곤", "3.0", "7", "30", "높음", "체중 감량", "실내(집)", "", "다트"] + [""] * 5
+    rows = typed_daily([header, blank, full]).to_dict("records")
+    assert math.isnan(rows[0]["수면 시간"])
+
+    store.backfill("kim", rows)
+    summary = store.get("kim")
+    assert summary["기록일수_7일"] == 2
+    assert summary["수면_7일평균"] == 7.0 and summary["각성_7일평균"] == 3.0
+    with open(store._path("kim"), encoding="utf-8") as f:
+        assert "NaN" not in f.read()
+
+
+def test_stored_nan_is_dropped_on_load():
+    uf = UserFeatures.from_json({"window": [["2025-03-01", float("nan"), float("nan")], ["2025-03-02", 7.0, 3.0]],
+                                 "last_date": "2025-03-02"})
+    assert uf.summary()["수면_7일평균"] == 7.0 and uf.summary()["각성_7일평균"] == 3.0
+
+
+# ---------- 창 / 추세 ----------
+def test_window_keeps_last_seven_days(store):
+    for day in range(1, 11):
+        store.record_daily("kim", f"2025-03-{day:02d}", day, "보통", 3.0)
+    summary = store.get("kim")
+    assert summary["기록일수_7일"] == 7
+    assert summary["수면_7일평균"] == round(sum(range(4, 11)) / 7, 1)
+
+
+def test_same_day_save_replaces_entry(store):
+    store.record_daily("lee", "2025-03-02", 7, "보통", 3.0)
+    store.record_daily("lee", "2025-03-03", 6, "높음", 4.0)
+    store.record_daily("lee", "2025-03-03", 8, "낮음", 2.0)
+    again = store.get("lee")
+
+    fresh = FeatureStore(store.directory + "_fresh")
+    fresh.record_daily("lee", "2025-03-02", 7, "보통", 3.0)
+    fresh.record_daily("lee", "2025-03-03", 8, "낮음", 2.0)
+    assert again == fresh.get("lee")
+    assert again["기록일수_7일"] == 2 and again["수면_7일평균"] == 7.5
+
+
+# ---------- backfill ----------
+SHEET = [{"날짜": "2025-03-01", "수면 시간": "5", "스트레스": "높음", "감정_평균각성점수": "4", "추천운동1": "요가"},
+         {"날짜": "2025-03-03", "수면 시간": "8", "스트레스": "낮음", "감정_평균각성점수": "2"}]
+
+
+def test_backfill_merges_into_existing_user_once(store):
+    # page 2 가 먼저 기록을 만든 기존 사용자도 시트 이력을 한 번 합침
+    store.record_daily("lee", "2025-03-03", 8, "낮음", 2.0)
+    store.record_daily("lee", "2025-03-04", 6, "보통", 3.0)
+    assert store.backfill("lee", SHEET)
+    assert not store.backfill("lee", SHEET)
+
+    merged = FeatureStore(store.directory).get("lee")   # 파일에서 다시 읽어도 같음
+    assert merged["기록일수_7일"] == 3
+    assert merged["수면_7일평균"] == round((5 + 8 + 6) / 3, 1)
+    assert merged["최근추천"] == ["요가"]
+
+
+def test_backfill_flag_is_persisted(store):
+    store.backfill("kim", SHEET)
+    with open(store._path("kim"), encoding="utf-8") as f:
+        assert json.load(f)["backfilled"] is True
+    # 이전 버전 파일 (플래그 없음, 창 항목에 스트레스 없음) → 한 번 더 합침
+    with open(store._path("old"), "w", encoding="utf-8") as f:
+        json.dump({"window": [["2025-03-04", 6.0, 3.0]], "last_date": "2025-03-04"}, f)
+    assert store.backfill("old", SHEET)
+    assert store.get("old")["기록일수_7일"] == 3
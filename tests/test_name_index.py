@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""이름 인덱스: 접두어 검색/페이지, 중복 이름 추천, sync/add"""
+from name_index import NameIndex
+
+
+def test_suggest_next_free_suffix():
+    idx = NameIndex(["김민준"] + [f"김민준_{i}" for i in range(2, 50)] + ["이서연"])
+    assert idx.suggest("김민준") == "김민준_50" and "김민준_50" not in idx
+    assert idx.suggest("박지호") == "박지호"
+    assert idx.suggest(" 이서연 ") == "이서연_2"
+
+
+def test_search_prefix_first_then_contains():
+    idx = NameIndex(["김민수", "박김민", "김민준", "이서연", "김서준"])
+    page, total = idx.search("김민")
+    assert page == ["김민수", "김민준", "박김민"] and total == 3
+    assert idx.search("")[1] == 5
+
+
+def test_search_paging():
+    idx = NameIndex([f"회원{i:03d}" for i in range(120)])
+    first, total = idx.search("회원", page=0, page_size=50)
+    last, _ = idx.search("회원", page=2, page_size=50)
+    assert total == 120 and len(first) == 50 and len(last) == 20
+    assert first == sorted(first) and last[-1] == "회원119"
+
+
+def test_add_and_sync():
+    idx = NameIndex()
+    idx.sync(["홍길동", "홍길동_2"])
+    assert idx.suggest("홍길동") == "홍길동_3"
+    idx.add("홍길동_3")
+    assert idx.suggest("홍길동") == "홍길동_4" and len(idx) == 3
+    idx.sync(["홍길동"])        # 시트 기준으로 다시 맞춤
+    assert idx.suggest("홍길동") == "홍길동_2" and len(idx) == 1
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""플랜 모드: 한 번에 보내는 프롬프트 크기, 규칙을 어긴 응답 보정, 시트 기록 범위"""
+import json
+
+import pytest
+
+from catalog import load_catalog
+from emotion_model import EmotionWorkoutIndex, select_candidates
+from plan_mode import MAX_REPEAT, MAX_YOGA, PlanDay, finalize_plan, parse_plan, sheet_updates
+from prompt_builder import build_messages, build_plan_messages, count_message_tokens
+from rule_engine import is_yoga_family
+
+USER = {"나이": 29, "성별": "여성", "키(cm)": 163, "몸무게(kg)": 55, "평소 활동량": "보통", "부상 여부": "없음"}
+MOODS = ["기쁨, 신남", "피곤", "불안, 긴장", "차분함", "짜증", "우울", "활기참"]
+PURPOSES = ["체중 감량", "스트레스 해소", "체력 향상", "체형 교정"]
+
+
+@pytest.fixture(scope="module")
+def days():
+    workouts = load_catalog().to_frame()
+    workouts["운동목적_list"] = [[t.strip() for t in str(x).split(",") if t.strip()] for x in workouts["운동목적"]]
+    index = EmotionWorkoutIndex.from_catalog(workouts)
+    out = []
+    for i, mood in enumerate(MOODS):
+        row = {"감정": mood, "감정_평균각성점수": 3.0, "수면 시간": 7, "운동 가능 시간(분)": 30,
+               "스트레스": "보통", "운동목적": PURPOSES[i % 4], "운동장소": "실내(집)", "보유장비": "요가매트"}
+        cands, target = select_candidates(workouts, index, mood, row["감정_평균각성점수"])
+        out.append(PlanDay(f"2025-03-{i + 1:02d}", i + 2, row, cands, row["운동목적"], target))
+    return out
+
+
+def test_plan_prompt_smaller_than_daily_prompts(days):
+    single = sum(sum(count_message_tokens(build_messages(USER, d.daily_row, "clear", 12.0, d.candidates)))
+                 for d in days)
+    plan = sum(count_message_tokens(build_plan_messages(
+        USER, [(d.label, d.daily_row, d.candidates) for d in days], "clear", 12.0)))
+    assert plan < single / 2
+
+
+def test_rule_breaking_response_is_repaired(days):
+    # 연속 반복 / 후보 밖 이름 / 빈 날짜
+    same = days[0].candidates["운동명"].iloc[0]
+    bad = {"plan": [
+        {"date": days[0].label, "top3": [{"rank": 1, "운동명": same, "이유": "a"}, {"rank": 2, "운동명": "없는운동", "이유": "b"}]},
+        {"date": days[1].label, "top3": [{"rank": 1, "운동명": same, "이유": "c"}]},
+    ]}
+    picks = parse_plan(json.dumps(bad, ensure_ascii=False), days)
+    assert [e["운동명"] for e in picks[0]] == [same]
+    plan = finalize_plan(days, picks)
+
+    assert all(len(day) == 3 for day in plan)
+    for prev, cur in zip(plan, plan[1:]):
+        assert not {e["운동명"] for e in prev} & {e["운동명"] for e in cur}, "연속 반복"
+    names = [e["운동명"] for day in plan for e in day]
+    assert max(names.count(x) for x in names) <= MAX_REPEAT
+    assert all(sum(is_yoga_family(e["운동명"]) for e in day) <= MAX_YOGA for day in plan)
+    assert all(e["운동명"] in set(d.candidates["운동명"]) for d, day in zip(days, plan) for e in day)
+    assert plan[0][0]["운동명"] == same and not plan[0][0].get("규칙보충")
+
+
+def test_unparseable_response_is_all_rules(days):
+    plan = finalize_plan(days, parse_plan("not json", days))
+    assert all(len(day) == 3 and all(e["규칙보충"] for e in day) for day in plan)
+
+
+def test_sheet_updates_one_range_per_day(days):
+    plan = finalize_plan(days, parse_plan("{}", days))
+    updates = sheet_updates(days, plan, [11, 12, 13], [14, 15, 16])
+    assert len(updates) == len(days)
+    assert updates[0]["range"] == "K2:P2" and updates[-1]["range"] == f"K{len(days) + 1}:P{len(days) + 1}"
+    assert updates[0]["values"][0][:3] == [e["운동명"] for e in plan[0]]
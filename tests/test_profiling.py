@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""재실행 프로파일: 저장 / 보관 개수 / 페이지별 요약 / 함수별 누적"""
+import pytest
+
+from profiling import ProfileStore, RerunProfile
+
+
+def _busy(n=20000):
+    return sum(i * i for i in range(n))
+
+
+def test_store_keeps_latest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), keep=4)
+    for _ in range(6):
+        with RerunProfile("3_recommendation", store) as prof:
+            _busy()
+    assert len(store.load_index()) == 4     # 보관 개수 초과분 삭제
+    assert prof.entry["outcome"] == "ok" and prof.entry["wall_ms"] > 0
+
+
+def test_summaries_by_page_and_function(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    for page in ("3_recommendation", "3_recommendation", "5_analytics"):
+        with RerunProfile(page, store):
+            _busy()
+    pages = store.page_summary()
+    assert dict(zip(pages["page"], pages["재실행"])) == {"3_recommendation": 2, "5_analytics": 1}
+    assert len(store.load_index(page="5_analytics")) == 1
+
+    funcs = store.summarize()
+    row = funcs[funcs["함수"] == "_busy"].iloc[0]
+    assert row["재실행"] == 3 and row["위치"].startswith("tests")
+
+
+def test_failed_rerun_is_saved_and_reraised(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    with pytest.raises(ZeroDivisionError):
+        with RerunProfile("4_evaluation", store) as prof:
+            1 / 0
+    assert prof.entry["outcome"].startswith("error") and len(store.load_index()) == 1
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""압축 후보 표가 기존 JSON 프롬프트보다 토큰을 충분히 줄이는지 (번들 카탈로그 기준)"""
+import pytest
+
+from catalog import load_catalog
+from prompt_builder import (
+    SYSTEM_PROMPT, build_messages, count_message_tokens, count_tokens, encode_candidates,
+    legacy_candidates_json,
+)
+
+MIN_REDUCTION = 0.45    # 측정값 49~58% (tiktoken / 바이트 근사치 모두)
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    df = load_catalog().to_frame()
+    df["운동강도"] = df["운동강도"].astype(str).str.strip()
+    return df
+
+
+def _groups(df):
+    return [("전체", df)] + [(k, g) for k, g in df.groupby("운동강도")]
+
+
+def test_candidate_table_cuts_tokens(catalog):
+    for label, df in _groups(catalog):
+        before = count_tokens(legacy_candidates_json(df))
+        after = count_tokens(encode_candidates(df))
+        assert 1 - after / before >= MIN_REDUCTION, (label, before, after)
+
+
+def test_candidate_table_keeps_every_workout(catalog):
+    for _, df in _groups(catalog):
+        lines = encode_candidates(df).split("\n")[1:]
+        assert len(lines) == len(df)
+        assert [line.split("|")[0] for line in lines] == [" ".join(str(n).split()) for n in df["운동명"]]
+
+
+def test_single_intensity_moves_to_header(catalog):
+    df = catalog[catalog["운동강도"] == "고강도"]
+    header, first = encode_candidates(df).split("\n")[:2]
+    assert "운동강도=고강도 공통" in header
+    assert first.count("|") == 1
+
+
+def test_system_prompt_is_static_prefix(catalog):
+    user = {"나이": 25, "성별": "남성", "키": 175, "몸무게": 70}
+    daily = {"감정": "기쁨", "수면 시간": 7}
+    a = build_messages(user, daily, "맑음", 20, catalog.head(10))
+    b = build_messages(user, daily, "비", 12, catalog.tail(10))
+    assert a[0]["content"] is SYSTEM_PROMPT and b[0]["content"] is SYSTEM_PROMPT
+    static, dynamic = count_message_tokens(a)
+    assert static == count_tokens(SYSTEM_PROMPT) and dynamic > 0
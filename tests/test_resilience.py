@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""재시도 / 서킷 브레이커: 일시적 오류 분류는 한 곳에서 (재시도, 브레이커, 장부가 같은 기준)"""
+import openai
+import pytest
+import requests
+
+from call_ledger import outcome_of
+from resilience import HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, call, is_timeout, is_transient
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _StatusError(Exception):
+    def __init__(self, code):
+        super().__init__(f"status {code}")
+        self.status_code = code
+
+
+class TimeoutConfigError(ValueError):
+    """이름에 timeout 이 들어가도 시간 초과가 아닌 오류"""
+
+
+def _httpx_error(name, *args):
+    """httpx 는 선택 의존성 (없으면 그 경우만 건너뜀)"""
+    httpx = pytest.importorskip("httpx")
+    return getattr(httpx, name)(*args, request=httpx.Request("GET", "https://example.com"))
+
+
+@pytest.mark.parametrize("exc", [
+    TimeoutError("budget"),
+    lambda: openai.APITimeoutError(request=None),
+    lambda: _httpx_error("ReadTimeout", "read"),
+    requests.Timeout("read"),
+])
+def test_timeouts_by_type(exc):
+    exc = exc() if callable(exc) else exc
+    assert is_timeout(exc) and is_transient(exc)
+    assert outcome_of(exc) == "timeout"
+
+
+@pytest.mark.parametrize("exc", [
+    ConnectionResetError("reset"),
+    lambda: openai.APIConnectionError(request=None),
+    lambda: _httpx_error("ConnectError", "refused"),
+    requests.ConnectionError("refused"),
+    _StatusError(429),
+    _StatusError(503),
+])
+def test_transient_errors(exc):
+    exc = exc() if callable(exc) else exc
+    assert is_transient(exc) and not is_timeout(exc)
+
+
+@pytest.mark.parametrize("exc", [_StatusError(400), _StatusError(404), ValueError("bad json"), TimeoutConfigError("x")])
+def test_request_errors_are_not_transient(exc):
+    assert not is_transient(exc) and not is_timeout(exc)
+    assert outcome_of(exc) == f"error:{type(exc).__name__}"
+
+
+def test_request_errors_do_not_count_as_success():
+    clock = _Clock()
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_error(TimeoutError())
+    breaker.record_error(_StatusError(400))       # 실패 횟수를 지우지 않음
+    breaker.record_error(TimeoutError())
+    assert breaker.state == OPEN
+
+
+def test_request_error_releases_half_open_probe():
+    clock = _Clock()
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_error(TimeoutError())
+    clock.now = 11
+    breaker.before_call()
+    breaker.record_error(_StatusError(400))
+    # 시험 호출 자리를 돌려받아 다음 호출이 다시 시험 (닫히지도, 영영 막히지도 않음)
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    breaker.record_success()
+    breaker.before_call()
+
+
+def test_call_retries_only_transient_errors():
+    attempts = []
+
+    def flaky(exc):
+        attempts.append(exc)
+        raise exc
+
+    with pytest.raises(_StatusError):
+        call("test-4xx", flaky, _StatusError(400), retries=2, backoff=0)
+    assert len(attempts) == 1
+
+    attempts.clear()
+    with pytest.raises(ConnectionResetError):
+        call("test-conn", flaky, ConnectionResetError(), retries=2, backoff=0)
+    assert len(attempts) == 3
+    with pytest.raises(CircuitOpenError):
+        call("test-conn", flaky, ConnectionResetError(), retries=0)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""시트 스키마 레지스트리: 헤더 한 번만 읽기, 헤더/기록ID 생성, 검증"""
+import pytest
+
+from fakes import FakeSpreadsheet, FakeWorksheet
+from sheet_schema import (
+    RECOMMEND_COLUMNS, RECORD_ID_HEADER, REASON_COLUMNS, SCHEMAS, SchemaError, SchemaRegistry, validate,
+)
+
+
+@pytest.fixture
+def sheets():
+    return {
+        "users": FakeWorksheet(SCHEMAS["users"] + (RECORD_ID_HEADER,)),
+        "daily": FakeWorksheet(SCHEMAS["daily"], rows=[["x"] * len(SCHEMAS["daily"])] * 50),
+        "evaluation": FakeWorksheet(),
+    }
+
+
+def test_bootstrap_writes_missing_headers(sheets):
+    registry = SchemaRegistry(FakeSpreadsheet(sheets))
+    layouts = registry.bootstrap()
+    assert sheets["evaluation"].rows[0] == list(SCHEMAS["evaluation"]) + [RECORD_ID_HEADER]
+    assert sheets["daily"].rows[0][16] == RECORD_ID_HEADER and layouts["daily"].record_id_col == 17
+    assert layouts["users"].record_id_col == 9 and layouts["users"].col("몸무게") == 5
+
+
+def test_header_read_once_per_sheet(sheets):
+    registry = SchemaRegistry(FakeSpreadsheet(sheets))
+    registry.bootstrap()
+    for _ in range(100):
+        registry.layout("evaluation")
+        registry.layout("daily").cols(RECOMMEND_COLUMNS + REASON_COLUMNS)
+    assert registry.header_reads == 3
+    assert all(ws.calls["row_values"] == 1 and ws.calls["get_all_values"] == 0 for ws in sheets.values())
+
+
+def test_observe_before_bootstrap_writes_record_id_header(sheets):
+    # 워밍업이 꺼졌거나 실패해서 bootstrap 없이 페이지가 먼저 헤더를 넘긴 경우
+    spreadsheet = FakeSpreadsheet(sheets)
+    registry = SchemaRegistry(spreadsheet)
+    layout = registry.observe("daily", sheets["daily"].rows[0])
+    assert layout.record_id_col == 17 and sheets["daily"].rows[0][16] == RECORD_ID_HEADER
+    assert registry.layout("daily") is layout and registry.header_reads == 0
+    # ws 를 넘기면 시트를 다시 열지 않음
+    registry.invalidate()
+    sheets["daily"].rows[0] = sheets["daily"].rows[0][:16]
+    opened = spreadsheet.opened
+    registry.observe("daily", sheets["daily"].rows[0], sheets["daily"])
+    assert spreadsheet.opened == opened and sheets["daily"].rows[0][16] == RECORD_ID_HEADER
+
+
+def test_observe_same_header_uses_cache(sheets):
+    registry = SchemaRegistry(FakeSpreadsheet(sheets))
+    first = registry.observe("users", sheets["users"].rows[0])
+    assert registry.observe("users", sheets["users"].rows[0]) is first
+    assert sheets["users"].calls["update_cell"] == 0
+
+
+def test_reordered_header_is_rejected(sheets):
+    bad = list(SCHEMAS["daily"])
+    bad[10], bad[13] = bad[13], bad[10]
+    assert validate("daily", bad)
+    with pytest.raises(SchemaError):
+        SchemaRegistry(FakeSpreadsheet(sheets)).observe("daily", bad)
+
+
+def test_unit_suffix_is_ignored():
+    header = [h.split("(")[0] for h in SCHEMAS["users"]]
+    assert validate("users", header) == []
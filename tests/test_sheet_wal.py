@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""로컬 WAL + 시트 리플레이어: 멱등 반영, 스키마 불일치 시트는 멈춤"""
+import pytest
+
+from fakes import FakeSpreadsheet, FakeWorksheet
+from sheet_schema import RECORD_ID_HEADER, SCHEMAS, SchemaRegistry
+from sheet_wal import SheetReplayer, SheetWAL
+
+USER_ROW = ["kim", "25", "남성", "175", "70", "보통", "없음", ""]
+
+
+@pytest.fixture
+def wal(tmp_path):
+    return SheetWAL(str(tmp_path))
+
+
+def _replayer(wal, sheets):
+    spreadsheet = FakeSpreadsheet(sheets)
+    return SheetReplayer(wal, spreadsheet, SchemaRegistry(spreadsheet))
+
+
+def test_drain_appends_once_with_record_id(wal):
+    users = FakeWorksheet(SCHEMAS["users"] + (RECORD_ID_HEADER,))
+    replayer = _replayer(wal, {"users": users})
+    rid = wal.append("users", USER_ROW)
+    assert replayer.drain() == 1
+    assert users.rows[-1] == USER_ROW + [rid]
+    assert replayer.drain() == 0 and wal.pending() == []
+
+
+def test_records_survive_restart(tmp_path):
+    SheetWAL(str(tmp_path)).append("users", USER_ROW)
+    assert [r["row"] for r in SheetWAL(str(tmp_path)).pending()] == [USER_ROW]
+
+
+def test_schema_error_blocks_only_that_sheet(wal, caplog):
+    bad = list(SCHEMAS["users"])
+    bad[0], bad[1] = bad[1], bad[0]
+    users = FakeWorksheet(bad)
+    evaluation = FakeWorksheet(SCHEMAS["evaluation"] + (RECORD_ID_HEADER,))
+    replayer = _replayer(wal, {"users": users, "evaluation": evaluation})
+    wal.append("users", USER_ROW)
+    wal.append("evaluation", ["2025-03-01", "kim"])
+
+    with caplog.at_level("ERROR", logger="moodfit.wal"):
+        assert replayer.drain() == 1
+        assert replayer.drain() == 0
+    assert "users" in replayer.blocked
+    assert len([r for r in caplog.records if r.levelname == "ERROR"]) == 1   # 한 번만 알림
+    assert users.calls["row_values"] == 1                                     # 다시 읽지 않음
+    assert [r["sheet"] for r in wal.pending()] == ["users"]                   # 기록은 남음
+
+    users.rows[0] = list(SCHEMAS["users"]) + [RECORD_ID_HEADER]
+    replayer.unblock("users")
+    assert replayer.drain() == 1 and wal.pending() == []
+
+
+def test_known_ids_read_once_until_append_fails(wal):
+    users = FakeWorksheet(SCHEMAS["users"] + (RECORD_ID_HEADER,))
+    replayer = _replayer(wal, {"users": users})
+    for _ in range(3):
+        wal.append("users", USER_ROW)
+        assert replayer.drain() == 1
+    assert users.calls["col_values"] == 1
+
+    def broken(rows):
+        users.rows.extend(rows)      # 들어갔지만 응답이 실패한 경우
+        raise ConnectionError("reset")
+    users.append_rows = broken
+    wal.append("users", USER_ROW)
+    with pytest.raises(ConnectionError):
+        replayer.drain()
+    del users.append_rows
+    assert replayer.drain() == 0 and wal.pending() == []      # 다시 읽어서 중복 없이 완료
+    assert users.calls["col_values"] == 2 and len(users.rows) == 5
+
+
+def test_too_long_row_is_refused_not_truncated(wal, caplog):
+    users = FakeWorksheet(SCHEMAS["users"] + (RECORD_ID_HEADER,))
+    replayer = _replayer(wal, {"users": users})
+    wal.append("users", USER_ROW + ["넘치는 값"])
+    wal.append("users", USER_ROW[:3])
+    with caplog.at_level("ERROR", logger="moodfit.wal"):
+        assert replayer.drain() == 1
+        assert replayer.drain() == 0
+    assert len([r for r in caplog.records if r.levelname == "ERROR"]) == 1
+    assert users.rows[-1][:3] == USER_ROW[:3] and users.rows[-1][3:8] == [""] * 5
+    assert [r["row"] for r in wal.pending()] == [USER_ROW + ["넘치는 값"]]
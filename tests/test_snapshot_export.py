@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""열 지향 스냅샷: 증분 export (새 행 + 바뀐 꼬리 행), 헤더 변경 시 전체, 파트 합치기"""
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from fakes import FakeSpreadsheet, FakeWorksheet
+from sheet_schema import RECORD_ID_HEADER, SCHEMAS
+from snapshot_export import SnapshotExporter, load_snapshot, load_table, read_manifest
+
+
+def _daily(i):
+    return [f"2025-01-{1 + i % 28:02d}", f"사용자{i % 7}", "피곤", "2.50", "7", "30", "보통", "체중 감량",
+            "실내(집)", "요가매트", "걷기", "수영", "스쿼트", "이유1", "이유2", "이유3", f"id{i}"]
+
+
+@pytest.fixture
+def book():
+    return FakeSpreadsheet({
+        "daily": FakeWorksheet(list(SCHEMAS["daily"]) + [RECORD_ID_HEADER], [_daily(i) for i in range(50)]),
+        "users": FakeWorksheet(SCHEMAS["users"], [[f"사용자{i}", "30", "여성", "160", "55", "보통", "없음", ""]
+                                                 for i in range(7)]),
+        "evaluation": FakeWorksheet(SCHEMAS["evaluation"]),
+    })
+
+
+def test_incremental_export_picks_up_new_and_changed_rows(book, tmp_path):
+    exporter = SnapshotExporter(str(tmp_path), tail_rows=10)
+    assert exporter.export(book) == {"users": 7, "daily": 50, "evaluation": 0}
+
+    daily = book.sheets["daily"]
+    daily.rows[-1][10] = "바뀐운동"           # 저장 직후 채워진 추천 결과
+    daily.rows += [_daily(50 + i) for i in range(5)]
+    daily.calls.clear()
+    assert exporter.export(book) == {"users": 0, "daily": 6, "evaluation": 0}
+    assert daily.calls["get_all_values"] == 0       # 꼬리 + 새 행만 범위로 읽음
+
+    table = load_table("daily", directory=str(tmp_path))
+    assert table.num_rows == 55
+    assert table.column("추천운동1")[49].as_py() == "바뀐운동"
+    assert table.column("_row").to_pylist() == list(range(2, 57))
+    assert len(load_table("daily", ["이름"], str(tmp_path)).column_names) == 1
+
+
+def test_header_change_falls_back_to_full_export(book, tmp_path):
+    exporter = SnapshotExporter(str(tmp_path))
+    exporter.export(book)
+    book.sheets["users"].rows[0].append("메모")
+    book.sheets["users"].calls.clear()
+    assert exporter.export(book)["users"] == 7
+    assert book.sheets["users"].calls["get_all_values"] == 1
+    assert read_manifest(str(tmp_path))["sheets"]["users"]["header"][-1] == "메모"
+
+
+def test_parts_are_merged_locally(book, tmp_path):
+    exporter = SnapshotExporter(str(tmp_path), tail_rows=5, max_parts=3)
+    exporter.export(book)
+    daily = book.sheets["daily"]
+    for i in range(4):
+        daily.rows.append(_daily(100 + i))
+        exporter.export(book)
+    entry = read_manifest(str(tmp_path))["sheets"]["daily"]
+    assert len(entry["parts"]) <= 3
+    frames = load_snapshot(directory=str(tmp_path))
+    assert len(frames["daily"]) == 54 and len(frames["evaluation"]) == 0
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Top3 응답 파싱/검증: 띄어쓰기만 다른 이름은 로컬 수리, 빈 자리만 부분 재요청"""
+import json
+
+import pytest
+
+from structured_output import Top3Validator, load_json
+
+NAMES = ["스쿼트", "걷기", "수영", "필라테스", "줄넘기"]
+REASON = "오늘 수면이 짧고 각성도가 낮아 부담이 적은 운동이 좋습니다."
+
+
+def _top3(*entries):
+    return {"top3": [{"rank": i + 1, "운동명": n, "이유": r} for i, (n, r) in enumerate(entries)]}
+
+
+def test_load_json_plain_and_fenced():
+    data = _top3(*[(n, REASON) for n in NAMES[:3]])
+    text = json.dumps(data, ensure_ascii=False)
+    assert load_json(text) == data
+    assert load_json("```json\n" + text + "\n```") == data
+    with pytest.raises(ValueError):
+        load_json("")
+    with pytest.raises(ValueError):
+        load_json("[1, 2]")
+
+
+def test_validate_repairs_locally_and_reports_problems():
+    v = Top3Validator(NAMES)
+    accepted = v.validate(_top3(("스 쿼트", REASON), ("없는운동", REASON), ("스쿼트", REASON), ("걷기", "")))
+    assert [a[1]["운동명"] for a in accepted] == ["스쿼트"]
+    assert v.chosen[1] == "걷기"        # 이름은 살리고 이유만 비어 있음
+    assert v.missing() == [1, 2]
+    assert [p.reason for p in v.problems] == ["후보에 없음", "중복", "이유 없음"]
+
+
+def test_repair_fills_only_missing_slots():
+    v = Top3Validator(NAMES)
+    bad = _top3(("스쿼트", REASON), ("없는운동", REASON), ("스쿼트", REASON), ("걷기", ""))
+    v.validate(bad)
+    tail = v.repair_messages([], json.dumps(bad, ensure_ascii=False))[-1]["content"]
+    assert tail
+    fixed = v.apply_repair({"top3": [
+        {"rank": 1, "운동명": "수영", "이유": "채워진 자리는 바꾸지 않음"},
+        {"rank": 2, "운동명": "다른이름", "이유": "이유 보충"},
+        {"rank": 3, "운동명": "수영", "이유": REASON},
+    ]})
+    assert not v.missing()
+    assert [e[0] for e in fixed] == [1, 2]
+    assert [v.items[i]["운동명"] for i in range(3)] == ["스쿼트", "걷기", "수영"]
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""타입 있는 시트 테이블: 변환 결과, 코드 비교 필터, 뒤에 붙은 행만 증분 변환"""
+import numpy as np
+import pandas as pd
+
+from typed_tables import DAILY_SCHEMA, TypedTable, code_mask, to_typed
+
+HEADER = ["날짜", "이름", "감정", "감정_평균각성점수", "수면 시간", "운동 가능 시간(분)",
+          "스트레스", "운동목적", "운동장소", "보유장비", "추천운동1", "추천운동2", "추천운동3"]
+
+
+def _rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [[
+        f"2025-01-{rng.integers(1, 29):02d}", f"사용자{rng.integers(0, 20)} ", "기쁨, 신남",
+        f"{rng.uniform(1, 5):.2f}", str(rng.integers(3, 10)), "", "보통", "체중 감량",
+        "실내(집)", "요가매트", "요가", "걷기", "수영",
+    ] for _ in range(n)]
+
+
+def test_to_typed_dtypes():
+    rows = _rows(5) + [["잘못된 날짜", "kim", "", "abc", "", "", "", "", "", ""]]
+    df = to_typed(HEADER, rows, DAILY_SCHEMA)
+    assert isinstance(df["이름"].dtype, pd.CategoricalDtype)
+    assert "사용자" in df["이름"].iloc[0] and not df["이름"].iloc[0].endswith(" ")
+    assert df["감정_평균각성점수"].dtype == np.float32
+    assert pd.api.types.is_datetime64_any_dtype(df["날짜"])
+    last = df.iloc[-1]
+    assert pd.isna(last["날짜"]) and np.isnan(last["감정_평균각성점수"]) and np.isnan(last["수면 시간"])
+    assert last["추천운동3"] == ""   # 짧은 행은 빈 칸으로 채움
+
+
+def test_code_mask_matches_equality():
+    df = to_typed(HEADER, _rows(200), DAILY_SCHEMA)
+    name = df["이름"].iloc[3]
+    assert (code_mask(df["이름"], name) == (df["이름"].astype(str) == name).to_numpy()).all()
+    assert not code_mask(df["이름"], "없는사람").any()
+    assert code_mask(df["운동장소"].astype(str), "실내(집)").all()
+
+
+def test_incremental_update_equals_full_conversion():
+    values = [HEADER] + _rows(300)
+    table = TypedTable(DAILY_SCHEMA)
+    first = table.update(values[:-100])
+    assert table.update(values[:-100]) is first     # 내용이 같으면 그대로
+    df = table.update(values)
+    assert len(df) == 300 and isinstance(df["이름"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(df.astype(str), to_typed(HEADER, values[1:], DAILY_SCHEMA).astype(str))
+
+
+def test_edited_row_triggers_full_rebuild():
+    values = [HEADER] + _rows(20)
+    table = TypedTable(DAILY_SCHEMA)
+    table.update(values)
+    edited = [list(r) for r in values]
+    edited[5][4] = "9"
+    assert table.update(edited)["수면 시간"].iloc[4] == 9
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""n-gram TF-IDF 운동 검색 인덱스: 역색인 점수, 검색 순서, 저장/복원"""
+import numpy as np
+import pytest
+
+from catalog import load_catalog
+from workout_search import WorkoutSearchIndex, catalog_fingerprint, load_or_build
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return load_catalog().to_frame()
+
+
+@pytest.fixture(scope="module")
+def index(catalog):
+    return WorkoutSearchIndex.build(catalog)
+
+
+def test_sparse_scores_match_dense(index):
+    # 역색인 점수 = 밀집 행렬×벡터 결과
+    dense = np.zeros((len(index.names), len(index.vocab)), dtype=np.float32)
+    col_of = np.repeat(np.arange(len(index.vocab)), np.diff(index.indptr))
+    dense[index.rows, col_of] = index.weights
+    cols, qv = index._query_vector("스트레스 해소 차분함")
+    qd = np.zeros(len(index.vocab), dtype=np.float32)
+    qd[cols] = qv
+    assert np.allclose(dense @ qd, index.scores("스트레스 해소 차분함"), atol=1e-5)
+
+
+def test_search_sorted_and_thresholded(index):
+    hits = index.search("요가", top_n=5)
+    assert 0 < len(hits) <= 5
+    scores = [s for _, s in hits]
+    assert scores == sorted(scores, reverse=True) and min(scores) >= 0.05
+    assert any("요가" in name for name, _ in hits)
+    assert index.search("ㅁㅁㅁ") == []
+
+
+def test_save_load_roundtrip(index, catalog, tmp_path):
+    path = str(tmp_path / "idx.npz")
+    WorkoutSearchIndex.build(catalog).save(path)
+    loaded = WorkoutSearchIndex.load(path)
+    assert list(loaded.names) == list(index.names)
+    assert np.allclose(loaded.scores("체중 감량 고강도"), index.scores("체중 감량 고강도"))
+
+
+def test_load_or_build_rebuilds_on_catalog_change(catalog, tmp_path):
+    path = str(tmp_path / "idx.npz")
+    first = load_or_build(catalog, path)
+    assert first.fingerprint == catalog_fingerprint(catalog)
+    assert load_or_build(catalog, path).fingerprint == first.fingerprint
+    changed = catalog.head(50)
+    assert load_or_build(changed, path).fingerprint == catalog_fingerprint(changed) != first.fingerprint
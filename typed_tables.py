@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+users / daily 시트의 타입 있는 메모리 표현.
+
+get_all_values() 결과(전부 문자열)를 그대로 DataFrame 으로 두면
+- 같은 이름/스트레스/목적/장소 문자열이 행마다 따로 저장되고
+- 수면 시간, 각성점수 같은 숫자를 쓸 때마다 safe_float 로 다시 파싱해야 합니다.
+
+여기서는 스키마대로 한 번만 변환합니다.
+- 이름·스트레스·목적·장소 등 반복 값 → category (정수 코드 + 한 번만 저장된 문자열)
+- 수면 시간·운동 가능 시간·각성점수·나이 → float32
+- 날짜 → datetime64
+필터는 category 코드 비교(code_mask)로 벡터화됩니다.
+
+변환 결과는 프로세스 캐시(TypedTable)에 두고 rerun 마다 재사용하며,
+시트 뒤에 행이 추가된 경우에는 새 행만 변환해서 붙입니다.
+"""
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 컬럼 → 종류 (name / category / number / date / text). 헤더의 공백·"(단위)" 차이는 무시
+DAILY_SCHEMA = {
+    "날짜": "date",
+    "이름": "name",
+    "감정": "text",
+    "감정_평균각성점수": "number",
+    "수면 시간": "number",
+    "운동 가능 시간": "number",
+    "스트레스": "category",
+    "운동목적": "category",
+    "운동장소": "category",
+    "보유장비": "category",
+    "추천운동1": "category",
+    "추천운동2": "category",
+    "추천운동3": "category",
+}
+USERS_SCHEMA = {
+    "이름": "name",
+    "나이": "number",
+    "성별": "category",
+    "평소 활동량": "category",
+    "부상 여부": "category",
+}
+
+
+def _norm(col):
+    col = str(col).replace(" ", "")
+    return col.split("(")[0]
+
+
+def kind_map(columns, schema):
+    by_norm = {_norm(k): v for k, v in schema.items()}
+    return {c: by_norm.get(_norm(c), "text") for c in columns}
+
+
+def _interned_category(values: pd.Series) -> pd.Series:
+    s = values.astype(str).str.strip()
+    cat = s.astype("category")
+    return cat.cat.rename_categories([sys.intern(c) for c in cat.cat.categories])
+
+
+def to_typed(header, rows, schema) -> pd.DataFrame:
+    """시트 값(header + rows) → 스키마대로 변환한 DataFrame"""
+    width = len(header)
+    rows = [list(r[:width]) + [""] * (width - len(r[:width])) for r in rows]
+    df = pd.DataFrame(rows, columns=header, dtype=object)
+    for col, kind in kind_map(header, schema).items():
+        if kind in ("name", "category"):
+            df[col] = _interned_category(df[col])
+        elif kind == "number":
+            df[col] = pd.to_numeric(df[col].astype(str).str.strip(), errors="coerce").astype(np.float32)
+        elif kind == "date":
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        else:
+            df[col] = df[col].astype(str)
+    return df
+
+
+def _recategorize(df, schema):
+    """concat 후 category 가 object 로 풀린 컬럼을 다시 category 로"""
+    for col, kind in kind_map(df.columns, schema).items():
+        if kind in ("name", "category") and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = _interned_category(df[col])
+    return df
+
+
+def code_mask(series: pd.Series, value) -> np.ndarray:
+    """category 컬럼 == value 를 정수 코드 비교로 (없는 값이면 전부 False)"""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return (series == value).to_numpy()
+    cats = series.cat.categories
+    if value not in cats:
+        return np.zeros(len(series), dtype=bool)
+    return series.cat.codes.to_numpy() == cats.get_loc(value)
+
+
+class TypedTable:
+    """
+    한 시트의 타입 변환 캐시.
+    - 내용이 그대로면 이전 DataFrame 을 그대로 반환
+    - 앞부분이 같고 뒤에 행만 늘었으면 새 행만 변환해서 붙임
+    반환된 DataFrame 은 여러 세션이 공유하므로 읽기 전용으로 사용 (필터 결과는 새 객체)
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._lock = threading.Lock()
+        self._header = None
+        self._keys = []          # 행별 해시 (변경 감지용)
+        self.df = None
+
+    def update(self, values) -> pd.DataFrame:
+        header, rows = list(values[0]), values[1:]
+        keys = [hash(tuple(r)) for r in rows]
+        with self._lock:
+            n = len(self._keys)
+            if self.df is not None and header == self._header and keys[:n] == self._keys:
+                if len(keys) > n:
+                    tail = to_typed(header, rows[n:], self.schema)
+                    tail.index = range(n, len(keys))
+                    self.df = _recategorize(pd.concat([self.df, tail]), self.schema)
+                    self._keys = keys
+                return self.df
+            self._header = header
+            self._keys = keys
+            self.df = to_typed(header, rows, self.schema)
+            return self.df
+
+
+@st.cache_resource
+def get_typed_tables():
+    """프로세스 공용 캐시: {"users": TypedTable, "daily": TypedTable}"""
+    return {"users": TypedTable(USERS_SCHEMA), "daily": TypedTable(DAILY_SCHEMA)}
+
+
+def typed_daily(values) -> pd.DataFrame:
+    """daily 시트 get_all_values() → 타입 있는 DataFrame (category 값은 앞뒤 공백 제거)"""
+    return get_typed_tables()["daily"].update(values)
+
+
+def typed_users(values) -> pd.DataFrame:
+    """users 시트 get_all_values() → 타입 있는 DataFrame"""
+    return get_typed_tables()["users"].update(values)
+
+
+if __name__ == "__main__":
+    # 메모리/필터 비교: 문자열 DataFrame vs 타입 있는 DataFrame (검증은 tests/test_typed_tables.py)
+    #   python typed_tables.py
+    import time
+
+    rng = np.random.default_rng(0)
+    n = 50_000
+    header = ["날짜", "이름", "감정", "감정_평균각성점수", "수면 시간", "운동 가능 시간(분)",
+              "스트레스", "운동목적", "운동장소", "보유장비", "추천운동1", "추천운동2", "추천운동3"]
+    names = [f"사용자{i}" for i in range(500)]
+    workouts = ["요가", "걷기", "스쿼트", "필라테스", "수영", "줄넘기"]
+    rows = [[
+        str(pd.Timestamp("2025-01-01") + pd.Timedelta(days=int(rng.integers(0, 365))))[:10],
+        names[rng.integers(0, 500)], "기쁨, 신남", f"{rng.uniform(1, 5):.2f}", str(rng.integers(3, 10)),
+        str(rng.integers(10, 120)), ["낮음", "보통", "높음"][rng.integers(0, 3)],
+        ["체중 감량", "체력 향상", "스트레스 해소", "체형 교정"][rng.integers(0, 4)],
+        "실내(집)", "요가매트, 덤벨", *[workouts[rng.integers(0, 6)] for _ in range(3)],
+    ] for _ in range(n)]
+    values = [header] + rows
+
+    t0 = time.perf_counter()
+    plain = pd.DataFrame(rows, columns=header)
+    t1 = time.perf_counter()
+    typed = to_typed(header, rows, DAILY_SCHEMA)
+    t2 = time.perf_counter()
+
+    b_plain = plain.memory_usage(deep=True).sum() / n
+    b_typed = typed.memory_usage(deep=True).sum() / n
+    print(f"{n}행: 문자열 {b_plain:.0f} B/행 → 타입 {b_typed:.0f} B/행 ({1 - b_typed / b_plain:.0%} 감소)")
+    print(f"변환: 문자열 {(t1 - t0) * 1000:.0f}ms / 타입 {(t2 - t1) * 1000:.0f}ms")
+
+    t0 = time.perf_counter()
+    for _ in range(50):
+        plain[plain["이름"] == "사용자7"]
+    t1 = time.perf_counter()
+    for _ in range(50):
+        typed[code_mask(typed["이름"], "사용자7")]
+    t2 = time.perf_counter()
+    print(f"이름 필터: 문자열 {(t1 - t0) * 20:.2f}ms / 코드 비교 {(t2 - t1) * 20:.2f}ms")
+
+    table = TypedTable(DAILY_SCHEMA)
+    table.update(values[:-100])
+    t0 = time.perf_counter()
+    df = table.update(values)
+    t1 = time.perf_counter()
+    print(f"새 행 100개 추가 반영: {(t1 - t0) * 1000:.0f}ms")
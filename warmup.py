@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+첫 화면(app.py)에 머무는 동안 무거운 모듈/연결을 미리 준비하는 워밍업 스레드.
+
+페이지들은 openai / spotipy / gspread / google-auth / tiktoken 을 실제로 쓰는 코드 경로에서만
+import 하므로 첫 렌더링이 빨라지고, 그 사이 이 스레드가 같은 모듈을 sys.modules 에 올려 두고
+구글 시트 연결과 카탈로그를 열어 둡니다. 사용자가 다음 페이지로 넘어갈 때는 이미 준비된 상태입니다.
+pandas / numpy 는 모든 페이지가 매 실행마다 DataFrame 을 다루므로 지연 대상이 아님 (최상단 import 그대로,
+미리 올리지도 않음 — 올려 두면 아래 측정에서 페이지의 실제 import 비용이 가려짐).
+
+- 프로세스당 한 번만 실행 (여러 세션이 홈에 들어와도 스레드 1개)
+- 환경변수 MOODFIT_WARMUP=0 이면 끔
+- 실패는 로그만 남기고 무시 (각 페이지가 원래 경로로 다시 시도)
+
+    python warmup.py     # 페이지별 / 모듈별 import 시간 측정
+"""
+import os
+import time
+import logging
+import importlib
+import threading
+
+logger = logging.getLogger("moodfit.warmup")
+
+# 무거운 순서대로 (페이지 3 버튼 경로 → 시트 연결 경로)
+HEAVY_MODULES = (
+    "openai",
+    "gspread",
+    "google.oauth2.service_account",
+    "spotipy",
+    "tiktoken",
+)
+
+_STARTED = False
+_LOCK = threading.Lock()
+timings = {}        # 단계 이름 → 걸린 시간(초). 워밍업이 끝나면 "total" 포함
+
+
+def _timed(name, fn):
+    t0 = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        logger.info("warm-up %s skipped (%s: %s)", name, type(e).__name__, e)
+    finally:
+        timings[name] = round(time.perf_counter() - t0, 3)
+
+
+def _run(sheet_name):
+    t0 = time.perf_counter()
+    for mod in HEAVY_MODULES:
+        _timed(f"import {mod}", lambda m=mod: importlib.import_module(m))
+
+    def open_sheet():
+        from sheets_auth import connect_gsheet
+        connect_gsheet(sheet_name)
+
+    def sheet_schema():
+        # 시트별 헤더를 한 번 읽어 검증/생성하고 열 매핑을 캐시 (이후 제출/조회는 헤더를 다시 읽지 않음)
+        from sheet_schema import get_schema_registry
+        get_schema_registry().bootstrap()
+
+    def load_catalog():
+        # 카탈로그 + 감정/검색 인덱스 첫 스냅샷 (이후 변경은 감시 스레드가 교체)
+        from catalog_watch import get_catalog_watcher
+        get_catalog_watcher()
+
+    def token_encoder():
+        from prompt_builder import count_tokens
+        count_tokens("warm-up")
+
+    _timed("connect sheet", open_sheet)
+    _timed("sheet schema", sheet_schema)
+    _timed("load catalog", load_catalog)
+    _timed("token encoder", token_encoder)
+    timings["total"] = round(time.perf_counter() - t0, 3)
+    logger.info("warm-up done in %.2fs", timings["total"])
+
+
+def start_warmup(sheet_name="MoodFit"):
+    """워밍업 스레드 시작 (이미 시작했거나 꺼져 있으면 아무것도 안 함). 새로 시작하면 True."""
+    global _STARTED
+    if os.getenv("MOODFIT_WARMUP", "1") == "0":
+        return False
+    with _LOCK:
+        if _STARTED:
+            return False
+        _STARTED = True
+    threading.Thread(target=_run, args=(sheet_name,), name="moodfit-warmup", daemon=True).start()
+    return True
+
+
+# ========================= 시작 시간 측정 =========================
+def _top_level_imports(path):
+    """페이지 파일의 모듈 최상단 import 문만 추출 (함수 안의 지연 import 는 제외)"""
+    import ast
+
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(
+        ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def _measure(code, preload="import streamlit"):
+    """새 인터프리터에서 preload 후 code 실행 시간(ms) — 모듈 캐시 영향 없이"""
+    import sys
+    import subprocess
+
+    script = (
+        f"{preload}\n"
+        "import time as _t\n_t0 = _t.perf_counter()\n"
+        f"{code}\n"
+        "print((_t.perf_counter() - _t0) * 1000)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    if out.returncode != 0:
+        return float("nan")
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    import glob
+
+    repeat = int(os.getenv("BENCH_REPEAT", "3"))
+    base = os.path.dirname(os.path.abspath(__file__))
+
+    print("페이지별 최상단 import 시간 (streamlit 제외, 새 프로세스 중앙값)")
+    for page in [os.path.join(base, "app.py")] + sorted(glob.glob(os.path.join(base, "pages", "*.py"))):
+        code = _top_level_imports(page)
+        runs = sorted(_measure(code) for _ in range(repeat))
+        print(f"  {os.path.relpath(page, base):<28}{runs[len(runs) // 2]:>8.1f} ms")
+
+    print("무거운 모듈 단독 import 시간 (이제 필요한 경로에서만 / 워밍업에서 로드)")
+    for mod in HEAVY_MODULES:
+        runs = sorted(_measure(f"import {mod}") for _ in range(repeat))
+        print(f"  {mod:<28}{runs[len(runs) // 2]:>8.1f} ms")
+
+    print("공통 (모든 페이지 최상단, 위 페이지별 시간에 포함)")
+    runs = sorted(_measure("import pandas") for _ in range(repeat))
+    print(f"  {'pandas':<28}{runs[len(runs) // 2]:>8.1f} ms")
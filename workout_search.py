@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+운동 카탈로그 로컬 검색 인덱스 (문자 n-gram TF-IDF).
+
+운동명 / 감정매핑 / 운동목적 / 운동강도 를 문자 2~3-gram 으로 쪼개 TF-IDF 벡터를 만들고,
+자유 입력("오늘 좀 우울해서 가볍게 땀 빼고 싶어")을 같은 방식으로 벡터화해 코사인 점수로 Top-N 을 돌려줍니다.
+
+- 띄어쓰기 차이("체중감량" / "체중 감량")는 태그 안의 공백을 지워서 같은 n-gram 이 되게 함
+- 행렬은 n-gram(열) 기준 역색인(CSC 형태: indptr / 운동 번호 / 가중치)으로 저장
+  → 질의에 나온 n-gram 의 열만 읽어서 np.bincount 한 번으로 모든 운동 점수 계산
+  → 운동 수만 개여도 밀집 행렬(W×V) 메모리 없이 동작
+- 카탈로그 내용 해시와 함께 .moodfit/index/ 에 npz 로 저장해 두고, 카탈로그가 바뀌면 다시 만듦
+
+네트워크/외부 모델 없이 numpy 만 사용합니다.
+"""
+import os
+import re
+import hashlib
+import threading
+
+import numpy as np
+
+INDEX_DIR = os.getenv("MOODFIT_INDEX_DIR", os.path.join(".moodfit", "index"))
+
+NGRAM_RANGE = (2, 3)
+# 필드별 가중치 (감정/목적 태그가 자유 입력과 가장 잘 맞음)
+FIELD_WEIGHTS = {"운동명": 1.0, "감정매핑": 1.5, "운동목적": 1.5, "운동강도": 0.5}
+
+_SPLIT = re.compile(r"[,\s/·]+")
+
+
+def _tags(value):
+    """'체중 감량, 체형교정' → ['체중감량', '체형교정'] (태그 안 공백 제거)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return []
+    return [re.sub(r"\s+", "", t).lower() for t in str(value).split(",") if t.strip()]
+
+
+def _words(text):
+    """자유 입력 → 단어 목록"""
+    return [w.lower() for w in _SPLIT.split(str(text)) if w]
+
+
+def _ngrams(token, lo=NGRAM_RANGE[0], hi=NGRAM_RANGE[1]):
+    """단어 경계를 표시한 문자 n-gram ('요가' → '<요', '요가', '가>', '<요가', '요가>')"""
+    s = f"<{token}>"
+    out = []
+    for n in range(lo, hi + 1):
+        out.extend(s[i:i + n] for i in range(len(s) - n + 1))
+    return out
+
+
+def catalog_fingerprint(df, fields=tuple(FIELD_WEIGHTS)):
+    """검색에 쓰는 컬럼 내용 해시 (캐시 무효화용)"""
+    h = hashlib.sha1()
+    for col in fields:
+        if col in df.columns:
+            h.update(col.encode("utf-8"))
+            h.update("\x1f".join(df[col].astype(str)).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+class WorkoutSearchIndex:
+    def __init__(self, names, vocab, idf, indptr, rows, weights, fingerprint=""):
+        self.names = np.asarray(names, dtype=object)
+        self.vocab = {g: i for i, g in enumerate(vocab)}
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.indptr = np.asarray(indptr, dtype=np.int64)     # (V+1,) 열별 시작 위치
+        self.rows = np.asarray(rows, dtype=np.int32)         # 운동 번호
+        self.weights = np.asarray(weights, dtype=np.float32) # L2 정규화된 TF-IDF 값
+        self.fingerprint = fingerprint
+
+    # ---------- 빌드 ----------
+    @classmethod
+    def build(cls, df):
+        names = df["운동명"].astype(str).str.strip().tolist()
+        vocab = {}
+        doc_rows, doc_cols, doc_vals = [], [], []
+
+        for w, rec in enumerate(df.to_dict("records")):
+            tf = {}
+            for field, fw in FIELD_WEIGHTS.items():
+                if field not in rec:
+                    continue
+                tokens = _words(rec[field]) if field == "운동명" else _tags(rec[field])
+                for tok in tokens:
+                    for g in _ngrams(tok):
+                        j = vocab.setdefault(g, len(vocab))
+                        tf[j] = tf.get(j, 0.0) + fw
+            doc_rows.extend([w] * len(tf))
+            doc_cols.extend(tf.keys())
+            doc_vals.extend(tf.values())
+
+        n_docs, n_terms = len(names), len(vocab)
+        rows = np.asarray(doc_rows, dtype=np.int32)
+        cols = np.asarray(doc_cols, dtype=np.int64)
+        vals = np.asarray(doc_vals, dtype=np.float32)
+
+        # sublinear tf × smooth idf, 운동별 L2 정규화
+        df_count = np.bincount(cols, minlength=n_terms)
+        idf = (np.log((1 + n_docs) / (1 + df_count)) + 1).astype(np.float32)
+        vals = (1 + np.log(vals)) * idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=vals ** 2, minlength=n_docs))
+        vals = vals / np.where(norms[rows] > 0, norms[rows], 1.0)
+
+        # n-gram(열) 기준 정렬 → 역색인
+        order = np.argsort(cols, kind="stable")
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df_count, out=indptr[1:])
+
+        vocab_list = [None] * n_terms
+        for g, j in vocab.items():
+            vocab_list[j] = g
+        return cls(names, vocab_list, idf, indptr, rows[order], vals[order], catalog_fingerprint(df))
+
+    # ---------- 검색 ----------
+    def _query_vector(self, text):
+        tf = {}
+        for tok in _words(text):
+            for g in _ngrams(tok):
+                j = self.vocab.get(g)
+                if j is not None:
+                    tf[j] = tf.get(j, 0.0) + 1.0
+        if not tf:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        cols = np.fromiter(tf.keys(), dtype=np.int64, count=len(tf))
+        vals = (1 + np.log(np.fromiter(tf.values(), dtype=np.float32, count=len(tf)))) * self.idf[cols]
+        return cols, vals / np.linalg.norm(vals)
+
+    def scores(self, text) -> np.ndarray:
+        """모든 운동의 코사인 점수 (W,) — 질의 n-gram 의 열만 읽는 희소 행렬×벡터 곱"""
+        cols, qvals = self._query_vector(text)
+        if cols.size == 0:
+            return np.zeros(len(self.names), dtype=np.float32)
+        starts, ends = self.indptr[cols], self.indptr[cols + 1]
+        lengths = ends - starts
+        # 각 질의 열의 postings 위치를 한 번에 펼침
+        pos = np.repeat(starts - np.cumsum(np.r_[0, lengths[:-1]]), lengths) + np.arange(lengths.sum())
+        contrib = self.weights[pos] * np.repeat(qvals, lengths)
+        return np.bincount(self.rows[pos], weights=contrib, minlength=len(self.names)).astype(np.float32)
+
+    def search(self, text, top_n=10, min_score=0.05):
+        """자유 입력 → [(운동명, 점수), ...] 점수 내림차순"""
+        s = self.scores(text)
+        if not s.any():
+            return []
+        k = min(top_n, s.size)
+        top = np.argpartition(-s, k - 1)[:k]
+        top = top[np.argsort(-s[top], kind="stable")]
+        return [(self.names[i], round(float(s[i]), 4)) for i in top if s[i] >= min_score]
+
+    # ---------- 저장/복원 ----------
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        vocab = [None] * len(self.vocab)
+        for g, j in self.vocab.items():
+            vocab[j] = g
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            names=np.asarray(self.names, dtype=str),
+            vocab=np.asarray(vocab, dtype=str),
+            idf=self.idf, indptr=self.indptr, rows=self.rows, weights=self.weights,
+            fingerprint=np.asarray(self.fingerprint),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            return cls(
+                z["names"].tolist(), z["vocab"].tolist(), z["idf"], z["indptr"], z["rows"], z["weights"],
+                str(z["fingerprint"]),
+            )
+
+
+_LOCK = threading.Lock()
+
+
+def load_or_build(df, path=None):
+    """저장된 인덱스가 현재 카탈로그와 같으면 불러오고, 아니면 새로 만들어 저장"""
+    path = path or os.path.join(INDEX_DIR, "workout_search.npz")
+    fp = catalog_fingerprint(df)
+    with _LOCK:
+        if os.path.exists(path):
+            try:
+                index = WorkoutSearchIndex.load(path)
+                if index.fingerprint == fp:
+                    return index
+            except (OSError, ValueError, KeyError):
+                pass
+        index = WorkoutSearchIndex.build(df)
+        try:
+            index.save(path)
+        except OSError:
+            pass  # 저장 실패해도 메모리 인덱스는 사용
+        return index
+
+
+if __name__ == "__main__":
+    # 카탈로그 인덱스 빌드/저장 + 간단한 검색/확장성 확인 (검증은 tests/test_workout_search.py)
+    #   python workout_search.py
+    import time
+    import pandas as pd
+    from catalog import load_catalog
+
+    catalog = load_catalog().to_frame()
+    t0 = time.perf_counter()
+    idx = WorkoutSearchIndex.build(catalog)
+    idx.save(os.path.join(INDEX_DIR, "workout_search.npz"))
+    print(f"build+save: {len(idx.names)}개 운동, n-gram {len(idx.vocab)}개, {time.perf_counter() - t0:.3f}s")
+
+    for q in ["우울해서 가볍게 기분 전환", "스트레스 풀고 싶음", "체중 감량 고강도", "요가"]:
+        print(q, "→", idx.search(q, top_n=5))
+
+    # 수만 개 규모: 카탈로그를 복제해서 빌드/질의 시간 측정
+    big = pd.concat([catalog] * 100, ignore_index=True)
+    big["운동명"] = big["운동명"] + "_" + (big.index // len(catalog)).astype(str)
+    t0 = time.perf_counter()
+    big_idx = WorkoutSearchIndex.build(big)
+    t1 = time.perf_counter()
+    for _ in range(100):
+        big_idx.search("스트레스 해소 차분함", top_n=10)
+    t2 = time.perf_counter()
+    print(f"{len(big)}개 운동: build {t1 - t0:.2f}s, query {(t2 - t1) * 10:.2f}ms")